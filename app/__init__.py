@@ -71,11 +71,62 @@ def create_app(config_name='development'):
         from app.sockets import chat_events
         chat_events.register_handlers(socketio)
     
-    # Create database tables (skip in serverless environments)
+    # Register CLI commands (flask db upgrade, ...)
+    from app.cli import cli_command, register_commands, migrations_in_use, serving_process
+    register_commands(app)
+    
+    # `flask db ...` owns the schema: creating tables here would make
+    # upgrade (or stamp on a pre-migration database) collide with them
+    if cli_command() == 'db':
+        app.config['DATABASE_MIGRATIONS'] = True
+    
+    # Create database tables unless the schema is managed by migrations
+    # (skip in serverless environments)
     if not os.environ.get('VERCEL'):
         with app.app_context():
-            db.create_all()
-            print("✅ Database tables created successfully!")
+            if app.config['DATABASE_MIGRATIONS'] or migrations_in_use(db):
+                print("ℹ️  Database schema managed by migrations (run `flask db upgrade`)")
+            else:
+                db.create_all()
+                # Full-text indexes and documents for tables that predate them
+                from app.services import search
+                search.ensure_indexes(db.session)
+                print("✅ Database tables created successfully!")
+    
+    # Keep researcher profile vectors current as profiles change
+    from app.services import matching
+    matching.init_app(app)
+    
+    # Research-domain autocomplete, kept current the same way
+    from app.services import domains
+    domains.init_app(app)
+    
+    # Full-text search documents, written in the same flush as papers/projects
+    from app.services import search
+    search.init_app(app)
+    
+    # Dashboard counters, adjusted in the same flush as messages and papers
+    from app.services import counters
+    counters.init_app(app)
+    
+    # Fingerprinted, precompressed static files (`flask assets build`)
+    from app import assets
+    assets.init_app(app)
+    
+    # Cached pages and template fragments (cached_fragment in templates)
+    from app.services import cache
+    cache.init_app(app)
+    
+    # Request/SQL/LLM instrumentation and /metrics
+    from app import metrics
+    metrics.init_app(app)
+    
+    # Load the LLM in the background so the first generation doesn't pay
+    # for it; only in the process that serves requests (not `flask db` etc.,
+    # not the reloader's watcher, not serverless)
+    if app.config['LLM_WARMUP'] and not os.environ.get('VERCEL') and serving_process(app):
+        from app.services.model_warmup import start_model_warmup
+        start_model_warmup(app)
     
     # Register error handlers
     register_error_handlers(app)
@@ -0,0 +1,197 @@
+"""
+ResearchHub AI - Static asset pipeline
+`flask assets build` copies every file in app/static to static/dist under
+a content-hashed name (css/custom.css -> dist/css/custom.1a2b3c4d5e.css),
+writes gzip and brotli variants of text assets next to it, and records the
+mapping in dist/manifest.json. With a manifest present, url_for('static', ...)
+and asset_url() link to the hashed copies, which are served precompressed
+with a one-year immutable Cache-Control: a changed file gets a new name, so
+repeat page loads never revalidate assets.
+
+Third-party browser scripts (the socket.io client) are downloaded once into
+static/vendor by `flask assets vendor` so pages don't depend on a CDN.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+# Hashed files never change, so browsers may keep them this long (seconds)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Worth precompressing (images and fonts are compressed already)
+COMPRESSIBLE = ('.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.xml', '.ico')
+SKIP = ('.md',)
+
+SOCKETIO_CLIENT_VERSION = '4.5.4'  # matches python-socketio 5.x (Engine.IO protocol 4)
+# static path -> where `flask assets vendor` fetches it from (and where
+# pages load it from until it has been vendored)
+VENDORED = {
+    'vendor/socket.io.min.js': f'https://cdn.socket.io/{SOCKETIO_CLIENT_VERSION}/socket.io.min.js',
+}
+
+def _hashed_name(path, digest):
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{digest}{ext}'
+
+def _source_files(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != os.path.join(static_folder, DIST_DIR))
+        for name in sorted(files):
+            if not name.endswith(SKIP):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+def _compress(path, data):
+    """Write path.gz and path.br when they are smaller than the original"""
+    written = []
+    variants = [('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+    try:
+        import brotli
+        variants.append(('.br', lambda raw: brotli.compress(raw, quality=11)))
+    except ImportError:
+        pass  # gzip only
+    for suffix, compress in variants:
+        packed = compress(data)
+        if len(packed) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(packed)
+            written.append(path + suffix)
+    return written
+
+def build(static_folder):
+    """
+    Fingerprint and precompress every static file into static/dist
+
+    Returns the manifest ({logical path: hashed path}); files left over
+    from earlier builds are removed.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    manifest, keep = {}, {os.path.join(dist, MANIFEST)}
+    for logical, source in _source_files(static_folder):
+        with open(source, 'rb') as f:
+            data = f.read()
+        hashed = _hashed_name(logical, hashlib.sha256(data).hexdigest()[:10])
+        target = os.path.join(dist, hashed)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            if logical.lower().endswith(COMPRESSIBLE):
+                _compress(target, data)
+        keep.update(target + suffix for suffix in ('', '.gz', '.br'))
+        manifest[logical] = f'{DIST_DIR}/{hashed}'
+
+    os.makedirs(dist, exist_ok=True)
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    for root, _, files in os.walk(dist):
+        for name in files:
+            if os.path.join(root, name) not in keep:
+                os.remove(os.path.join(root, name))
+    return manifest
+
+def vendor(static_folder, sources=None):
+    """
+    Download each VENDORED file into static_folder (sources maps a static
+    path to another URL or a local file, e.g. for air-gapped builds);
+    returns {static path: sha384 for an integrity attribute}
+    """
+    import base64
+    import urllib.request
+
+    hashes = {}
+    for path, url in VENDORED.items():
+        source = (sources or {}).get(path, url)
+        if os.path.isfile(source):
+            with open(source, 'rb') as f:
+                data = f.read()
+        else:
+            with urllib.request.urlopen(source, timeout=30) as response:
+                data = response.read()
+        if not data:
+            raise ValueError(f"Empty download for {path} from {source}")
+        target = os.path.join(static_folder, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        hashes[path] = 'sha384-' + base64.b64encode(hashlib.sha384(data).digest()).decode()
+    return hashes
+
+# ---------------------------------------------------------------------------
+# Linking and serving
+# ---------------------------------------------------------------------------
+
+def load_manifest(app):
+    """Read static/dist/manifest.json into the app ({} if there is no build)"""
+    manifest = {}
+    if app.config.get('ASSETS_FINGERPRINT', True) and app.static_folder:
+        try:
+            with open(os.path.join(app.static_folder, DIST_DIR, MANIFEST)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Asset manifest unreadable, serving unhashed assets: {e}")
+    app.extensions['assets'] = manifest
+    return manifest
+
+def _fingerprint(endpoint, values):
+    """url_defaults hook: url_for('static', filename=...) picks the hashed copy"""
+    if endpoint == 'static' and 'filename' in values:
+        from flask import current_app
+        hashed = current_app.extensions.get('assets', {}).get(values['filename'])
+        if hashed:
+            values['filename'] = hashed
+
+_missing_vendored = set()
+
+def asset_url(filename, **values):
+    """
+    url_for('static', filename=...) that also covers vendored scripts:
+    until `flask assets vendor` has run, those still load from their CDN
+    """
+    from flask import current_app, url_for
+
+    if filename in VENDORED and filename not in current_app.extensions.get('assets', {}):
+        if not os.path.isfile(os.path.join(current_app.static_folder, filename)):
+            if filename not in _missing_vendored:
+                _missing_vendored.add(filename)
+                print(f"⚠️  {filename} not vendored yet (run `flask assets vendor`), using the CDN")
+            return VENDORED[filename]
+    return url_for('static', filename=filename, **values)
+
+def send_static(filename):
+    """
+    The static endpoint: hashed files (dist/...) are sent precompressed
+    when the client accepts it, and cached for good; others as usual
+    """
+    from flask import current_app, request, send_from_directory
+
+    if not filename.startswith(DIST_DIR + '/'):
+        return current_app.send_static_file(filename)
+
+    folder = current_app.static_folder
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in request.accept_encodings and os.path.isfile(os.path.join(folder, filename + suffix)):
+            response = send_from_directory(folder, filename + suffix, mimetype=mimetype,
+                                           max_age=IMMUTABLE_MAX_AGE)
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(folder, filename, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response
+
+def init_app(app):
+    """Link and serve built assets, and expose asset_url() to templates"""
+    load_manifest(app)
+    app.url_defaults(_fingerprint)
+    if 'static' in app.view_functions:
+        app.view_functions['static'] = send_static
+    app.jinja_env.globals['asset_url'] = asset_url
@@ -0,0 +1,246 @@
+"""
+ResearchHub AI - Flask CLI Commands
+Schema migrations (`flask db ...`) backed by Alembic, AI usage reports
+(`flask ai usage`), researcher matching index maintenance (`flask matching ...`),
+the search index (`flask search reindex`), dashboard counters
+(`flask counters reconcile`) and static assets (`flask assets ...`)
+"""
+import os
+import click
+from flask.cli import AppGroup
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+db_cli = AppGroup('db', help='Database schema migrations (Alembic).')
+ai_cli = AppGroup('ai', help='AI usage and capacity reports.')
+matching_cli = AppGroup('matching', help='Researcher matching index.')
+search_cli = AppGroup('search', help='Full-text search over papers and projects.')
+counters_cli = AppGroup('counters', help='Maintained dashboard counters.')
+assets_cli = AppGroup('assets', help='Fingerprinted, precompressed static assets.')
+
+def _alembic_config():
+    """Build an Alembic config pointing at the migrations directory"""
+    from alembic.config import Config
+
+    alembic_cfg = Config(os.path.join(MIGRATIONS_DIR, 'alembic.ini'))
+    alembic_cfg.set_main_option('script_location', MIGRATIONS_DIR)
+    return alembic_cfg
+
+@db_cli.command('upgrade')
+@click.argument('revision', default='head')
+def upgrade(revision):
+    """Upgrade the database to a revision (default: head)"""
+    from alembic import command
+    command.upgrade(_alembic_config(), revision)
+
+@db_cli.command('downgrade')
+@click.argument('revision', default='-1')
+def downgrade(revision):
+    """Revert the database to a revision (default: one step back)"""
+    from alembic import command
+    command.downgrade(_alembic_config(), revision)
+
+@db_cli.command('stamp')
+@click.argument('revision', default='head')
+def stamp(revision):
+    """Mark the database as being at a revision without running migrations"""
+    from alembic import command
+    command.stamp(_alembic_config(), revision)
+
+@db_cli.command('current')
+def current():
+    """Show the current database revision"""
+    from alembic import command
+    command.current(_alembic_config(), verbose=True)
+
+@db_cli.command('history')
+def history():
+    """List migrations"""
+    from alembic import command
+    command.history(_alembic_config())
+
+@db_cli.command('revision')
+@click.option('-m', '--message', required=True, help='Revision message')
+@click.option('--autogenerate', is_flag=True, help='Diff models against the database')
+def revision(message, autogenerate):
+    """Create a new migration script"""
+    from alembic import command
+    command.revision(_alembic_config(), message=message, autogenerate=autogenerate)
+
+@ai_cli.command('usage')
+@click.option('--days', default=7, show_default=True, help='Report window in days')
+@click.option('--by', 'group_by', default='model', show_default=True,
+              type=click.Choice(['model', 'backend', 'section', 'provider', 'user_id']))
+@click.option('--json', 'as_json', is_flag=True, help='Print JSON instead of a table')
+def usage(days, group_by, as_json):
+    """Throughput and latency per model (or backend, section, user) from the AI call log"""
+    import json
+    from datetime import datetime, timedelta
+    from app.services.call_log import usage_report
+
+    report = usage_report(datetime.utcnow() - timedelta(days=days), group_by)
+    if as_json:
+        click.echo(json.dumps(report, indent=2, default=str))
+        return
+    if not report:
+        click.echo(f"No AI calls logged in the last {days} days")
+        return
+
+    click.echo(f"{group_by:<28} {'calls':>7} {'errors':>6} {'hits':>5} {'cold':>5} "
+               f"{'calls/h':>8} {'tok/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'busy s':>9}")
+    for row in report:
+        click.echo(f"{str(row[group_by])[:28]:<28} {row['calls']:>7} {row['errors']:>6} "
+                   f"{row['cache_hits']:>5} {row['cold_starts']:>5} {row['calls_per_hour']:>8} "
+                   f"{row['tokens_per_second'] or '-':>7} {_ms(row['p50_ms']):>8} "
+                   f"{_ms(row['p95_ms']):>8} {row['busy_seconds']:>9}")
+
+def _ms(value):
+    return '-' if value is None else f"{value:.0f}"
+
+@matching_cli.command('rebuild')
+@click.option('--ann', 'kind', default=None, type=click.Choice(['auto', 'faiss', 'hnsw', 'off']),
+              help='ANN index to build (default: MATCHING_ANN)')
+def matching_rebuild(kind):
+    """Rebuild the profile index (and ANN index) from the database and save it"""
+    from flask import current_app
+    from app.services.matching import build_index, index_dir
+
+    app = current_app._get_current_object()
+    index = build_index(app.config)
+    if (kind or app.config.get('MATCHING_ANN', 'auto')) != 'off':
+        index.build_ann(kind or app.config.get('MATCHING_ANN', 'auto'))
+    directory = index_dir(app)
+    if directory:
+        index.save(directory)
+        click.echo(f"Saved {len(index)} profiles to {directory}")
+
+@matching_cli.command('recall')
+@click.option('--queries', default=200, show_default=True, help='Profiles to use as queries')
+@click.option('-k', default=10, show_default=True, help='Suggestions per query')
+def matching_recall(queries, k):
+    """Recall@k and latency of the saved ANN index against the exact scan"""
+    import json
+    import random
+    from flask import current_app
+    from app.services.matching import measure_recall, open_index
+
+    index = open_index(current_app._get_current_object())
+    if index.ann is None:
+        click.echo("No ANN index saved; run `flask matching rebuild` first")
+        return
+    rows = random.Random(0).sample(range(len(index)), min(queries, len(index)))
+    click.echo(json.dumps(measure_recall(index, [index.matrix[row] for row in rows], k), indent=2))
+
+@matching_cli.command('suggestions')
+@click.option('-k', default=None, type=int, help='Suggestions per researcher (default: SUGGESTIONS_K)')
+@click.option('--chunk', default=None, type=int, help='Researchers per batch (default: SUGGESTIONS_CHUNK)')
+def matching_suggestions(k, chunk):
+    """Recompute every researcher's stored suggestions (run nightly)"""
+    import time
+    from flask import current_app
+    from app.services.matching import get_profile_index
+    from app.services.suggestions import refresh_all
+
+    config = current_app.config
+    started = time.perf_counter()
+    users, rows = refresh_all(get_profile_index(), k or config.get('SUGGESTIONS_K', 20),
+                              chunk or config.get('SUGGESTIONS_CHUNK', 256))
+    click.echo(f"Stored {rows} suggestions for {users} researchers in {time.perf_counter() - started:.1f}s")
+
+@search_cli.command('reindex')
+def search_reindex():
+    """Rebuild every paper and project search document"""
+    from app import db
+    from app.services.search import reindex
+
+    click.echo(f"Indexed {reindex(db.session)} papers and projects")
+
+@counters_cli.command('reconcile')
+def counters_reconcile():
+    """Recount every user's dashboard counters and correct any drift"""
+    import time
+    from app import db
+    from app.services.counters import reconcile
+
+    started = time.perf_counter()
+    users, drifted = reconcile(db.session)
+    click.echo(f"Reconciled {users} users in {time.perf_counter() - started:.1f}s ({drifted} had drifted)")
+
+@assets_cli.command('build')
+def assets_build():
+    """Fingerprint and precompress app/static into app/static/dist"""
+    from flask import current_app
+    from app import assets
+
+    folder = current_app.static_folder
+    missing = [path for path in assets.VENDORED if not os.path.isfile(os.path.join(folder, path))]
+    if missing:
+        click.echo(f"⚠️  Not vendored yet (run `flask assets vendor`): {', '.join(missing)}")
+    manifest = assets.build(folder)
+    assets.load_manifest(current_app)
+    click.echo(f"Built {len(manifest)} assets into {os.path.join(folder, assets.DIST_DIR)}")
+
+@assets_cli.command('vendor')
+@click.option('--source', 'sources', multiple=True, metavar='PATH=URL_OR_FILE',
+              help='Fetch a vendored file from elsewhere, e.g. vendor/socket.io.min.js=/mnt/socket.io.min.js')
+def assets_vendor(sources):
+    """Download third-party browser scripts into app/static/vendor"""
+    from flask import current_app
+    from app import assets
+
+    overrides = dict(source.split('=', 1) for source in sources)
+    for path, integrity in assets.vendor(current_app.static_folder, overrides).items():
+        click.echo(f"{path}  {integrity}")
+    click.echo("Run `flask assets build` to fingerprint them")
+
+# Options of the `flask` command itself that take a value
+_VALUE_OPTIONS = ('--app', '-A', '--env-file', '-e')
+
+def cli_command(argv=None):
+    """
+    The `flask` subcommand this process was started for ('db', 'run', ...),
+    None when the app is not being loaded by the flask CLI
+
+    create_app() runs before the command's group does, so it has to look
+    at the command line to know what it is being built for.
+    """
+    import sys
+
+    argv = sys.argv if argv is None else argv
+    if not argv:
+        return None
+    script = os.path.normpath(argv[0])
+    if (os.path.basename(script) not in ('flask', 'flask.exe')
+            and not script.endswith(os.path.join('flask', '__main__.py'))):
+        return None
+    args = iter(argv[1:])
+    for arg in args:
+        if arg in _VALUE_OPTIONS:
+            next(args, None)
+        elif not arg.startswith('-'):
+            return arg
+    return None
+
+def serving_process(app, argv=None):
+    """
+    True if this process is going to serve requests: not a `flask` command
+    other than `run`, and not the parent the debug reloader only watches
+    files from (the serving child has WERKZEUG_RUN_MAIN set)
+    """
+    if cli_command(argv) not in (None, 'run'):
+        return False
+    return not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+
+def migrations_in_use(db):
+    """True if the connected database is managed by Alembic"""
+    from sqlalchemy import inspect
+    return inspect(db.engine).has_table('alembic_version')
+
+def register_commands(app):
+    """Register CLI command groups on the app"""
+    app.cli.add_command(db_cli)
+    app.cli.add_command(ai_cli)
+    app.cli.add_command(matching_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(assets_cli)
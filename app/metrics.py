@@ -0,0 +1,278 @@
+"""
+ResearchHub AI - Instrumentation
+Per-request timing, SQL query counts, LLM latency/tokens and socket event
+timing, exposed in Prometheus text format at /metrics
+"""
+import bisect
+import functools
+import threading
+import time
+from flask import g, has_app_context, request, Response, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Seconds; sized for both millisecond queries and multi-minute LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+# A generation whose model load took longer than this counts as a cold start
+COLD_START_SECONDS = 0.5
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Thread-safe in-process metrics store (one per worker process)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}  # name -> (type, help, buckets)
+        self._values = {}  # (name, labels) -> float | Histogram
+
+    def counter(self, name, help_text):
+        self._meta[name] = ('counter', help_text, None)
+
+    def gauge(self, name, help_text):
+        self._meta[name] = ('gauge', help_text, None)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self._meta[name] = ('histogram', help_text, buckets)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._values.get(key)
+            if hist is None:
+                hist = self._values[key] = Histogram(self._meta[name][2])
+            hist.observe(value)
+
+    def get(self, name, **labels):
+        """Current value (counters/gauges) or Histogram, for tests and reports"""
+        return self._values.get((name, tuple(sorted(labels.items()))))
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda kv: kv[0])
+
+        lines = []
+        current = None
+        for (name, labels), value in items:
+            metric_type, help_text, _ = self._meta.get(name, ('untyped', '', None))
+            if name != current:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                current = name
+
+            if isinstance(value, Histogram):
+                cumulative = 0
+                for bound, count in zip(value.buckets + ('+Inf',), value.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {value.sum}")
+                lines.append(f"{name}_count{_labels(labels)} {value.count}")
+            else:
+                lines.append(f"{name}{_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pairs
+    )
+    return '{' + body + '}'
+
+metrics = MetricsRegistry()
+
+metrics.histogram('http_request_duration_seconds', 'HTTP request latency by endpoint')
+metrics.histogram('http_request_db_queries', 'SQL queries issued per HTTP request', COUNT_BUCKETS)
+metrics.histogram('http_request_db_seconds', 'Time spent in SQL per HTTP request')
+metrics.counter('http_slow_requests_total', 'Requests slower than SLOW_REQUEST_THRESHOLD_MS')
+metrics.counter('db_queries_total', 'SQL statements executed')
+metrics.histogram('db_query_duration_seconds', 'SQL statement latency')
+metrics.histogram('llm_request_duration_seconds', 'LLM generation latency')
+metrics.counter('llm_requests_total', 'LLM generation calls')
+metrics.counter('llm_prompt_tokens_total', 'Prompt tokens sent to the LLM')
+metrics.counter('llm_completion_tokens_total', 'Completion tokens produced by the LLM')
+metrics.histogram('llm_request_prompt_tokens', 'Prompt tokens per LLM call', TOKEN_BUCKETS)
+metrics.histogram('llm_request_completion_tokens', 'Completion tokens per LLM call', TOKEN_BUCKETS)
+metrics.histogram('llm_request_duration_by_start_seconds', 'LLM generation latency, cold vs warm model')
+metrics.counter('llm_cold_starts_total', 'LLM generations that had to load the model first')
+metrics.histogram('llm_model_load_seconds', 'Model load time (cold starts and warm-ups)')
+metrics.counter('llm_warmups_total', 'Background model warm-up / keep-warm pings')
+metrics.gauge('llm_backend_outstanding', 'In-flight LLM requests per backend')
+metrics.gauge('llm_backend_up', 'Whether the LLM backend passed its last health check')
+metrics.counter('llm_backend_failures_total', 'Failed LLM requests per backend')
+metrics.counter('ai_call_log_dropped_total', 'AI call log rows lost (buffer full or write failed)')
+metrics.counter('llm_coalesced_requests_total', 'LLM requests served by an identical in-flight call')
+metrics.counter('llm_backend_busy_total', 'LLM requests that found every backend at its concurrency cap')
+metrics.counter('ai_requests_rejected_total', 'AI endpoint requests turned away with 429 (by scope and reason)')
+metrics.counter('ai_review_parse_total', 'AI review outputs by parse outcome (valid, repaired, failed)')
+metrics.counter('suggestion_reads_total', 'Collaborator suggestion reads, from the precomputed table or computed live')
+metrics.counter('suggestion_refresh_users_total', 'Users whose suggestions were recomputed after profile edits')
+metrics.counter('counter_drift_total', 'Dashboard counter rows corrected by reconciliation')
+metrics.counter('response_cache_total', 'Response cache lookups by kind (page, fragment) and result (hit, miss)')
+metrics.histogram('socketio_event_duration_seconds', 'Socket.IO event handler latency')
+metrics.counter('socketio_events_total', 'Socket.IO events handled')
+metrics.histogram('socketio_event_db_queries', 'SQL queries issued per Socket.IO event', COUNT_BUCKETS)
+metrics.histogram('socketio_event_db_seconds', 'Time spent in SQL per Socket.IO event')
+metrics.gauge('app_start_time_seconds', 'Unix time the app was created')
+
+# SQL instrumentation: counts every statement on every engine, and
+# attributes it to the current request/socket event when there is one
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the execution context, not the connection: a statement that raises
+    # never reaches after_cursor_execute, and must not leave a start behind
+    if context is not None:
+        context._metrics_start_time = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_metrics_start_time', None)
+    elapsed = time.perf_counter() - start if start is not None else 0.0
+    metrics.inc('db_queries_total')
+    metrics.observe('db_query_duration_seconds', elapsed)
+
+    if has_app_context() and 'sql_query_count' in g:
+        g.sql_query_count += 1
+        g.sql_query_time += elapsed
+
+def _start_request_timer():
+    g.request_start_time = time.perf_counter()
+    g.sql_query_count = 0
+    g.sql_query_time = 0.0
+
+def _record_request(response):
+    if 'request_start_time' not in g:
+        return response
+
+    elapsed = time.perf_counter() - g.request_start_time
+    endpoint = request.endpoint or 'unmatched'
+    labels = {'endpoint': endpoint, 'method': request.method}
+
+    metrics.observe('http_request_duration_seconds', elapsed, status=response.status_code, **labels)
+    metrics.observe('http_request_db_queries', g.sql_query_count, **labels)
+    metrics.observe('http_request_db_seconds', g.sql_query_time, **labels)
+
+    threshold_ms = current_app.config.get('SLOW_REQUEST_THRESHOLD_MS')
+    if threshold_ms and elapsed * 1000 >= threshold_ms:
+        metrics.inc('http_slow_requests_total', **labels)
+        current_app.logger.warning(
+            "Slow request: %s %s -> %s in %.0f ms (%d queries, %.0f ms SQL)",
+            request.method, request.full_path.rstrip('?'), response.status_code,
+            elapsed * 1000, g.sql_query_count, g.sql_query_time * 1000
+        )
+    return response
+
+def record_llm_call(provider, model, elapsed, prompt_tokens=None, completion_tokens=None, status='ok',
+                    load_seconds=None):
+    """Record one LLM generation (called by AIService)"""
+    metrics.inc('llm_requests_total', provider=provider, model=model, status=status)
+    metrics.observe('llm_request_duration_seconds', elapsed, provider=provider, model=model)
+    if load_seconds is not None:
+        # Only backends that report model load time (Ollama) are split cold/warm
+        start = 'cold' if load_seconds >= COLD_START_SECONDS else 'warm'
+        metrics.observe('llm_request_duration_by_start_seconds', elapsed,
+                        provider=provider, model=model, start=start)
+        if start == 'cold':
+            metrics.inc('llm_cold_starts_total', provider=provider, model=model)
+            metrics.observe('llm_model_load_seconds', load_seconds, provider=provider, model=model)
+    if prompt_tokens:
+        metrics.inc('llm_prompt_tokens_total', prompt_tokens, provider=provider, model=model)
+        metrics.observe('llm_request_prompt_tokens', prompt_tokens, provider=provider, model=model)
+    if completion_tokens:
+        metrics.inc('llm_completion_tokens_total', completion_tokens, provider=provider, model=model)
+        metrics.observe('llm_request_completion_tokens', completion_tokens, provider=provider, model=model)
+
+def timed_socket_event(event_name):
+    """Decorator timing a Socket.IO handler (apply below @socketio.on)"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            status = 'ok'
+            # Count this event's SQL on its own, even when the handler runs
+            # inside an app context that is already counting something else
+            counting = has_app_context()
+            if counting:
+                outer = (g.get('sql_query_count'), g.get('sql_query_time'))
+                g.sql_query_count = 0
+                g.sql_query_time = 0.0
+            try:
+                return handler(*args, **kwargs)
+            except Exception:
+                status = 'error'
+                raise
+            finally:
+                metrics.inc('socketio_events_total', event=event_name, status=status)
+                metrics.observe('socketio_event_duration_seconds',
+                                time.perf_counter() - start, event=event_name)
+                if counting:
+                    metrics.observe('socketio_event_db_queries', g.sql_query_count, event=event_name)
+                    metrics.observe('socketio_event_db_seconds', g.sql_query_time, event=event_name)
+                    if outer[0] is None:
+                        g.pop('sql_query_count', None)
+                        g.pop('sql_query_time', None)
+                    else:
+                        g.sql_query_count = outer[0] + g.sql_query_count
+                        g.sql_query_time = outer[1] + g.sql_query_time
+        return wrapper
+    return decorator
+
+def metrics_endpoint():
+    """
+    Prometheus scrape endpoint, for METRICS_ALLOWED_IPS or a request with
+    `Authorization: Bearer <METRICS_TOKEN>`; 404 for everyone else
+    """
+    import hmac
+    from flask import abort
+
+    config = current_app.config
+    allowed = {ip.strip() for ip in (config.get('METRICS_ALLOWED_IPS') or '').split(',') if ip.strip()}
+    token = config.get('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    if not (request.remote_addr in allowed
+            or (token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()))):
+        abort(404)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def init_app(app):
+    """Install request hooks and, if METRICS_ENDPOINT, the /metrics endpoint"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    metrics.set('app_start_time_seconds', time.time())
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request)
+    if app.config.get('METRICS_ENDPOINT', True):
+        app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
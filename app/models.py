@@ -1,6 +1,7 @@
 """
 ResearchHub AI - Database Models
 """
+import zlib
 from datetime import datetime
 from app import db
 from flask_login import UserMixin
@@ -9,14 +10,14 @@ from werkzeug.security import generate_password_hash, check_password_hash
 # Association Tables
 project_members = db.Table('project_members',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('project_id', db.Integer, db.ForeignKey('project.id'), primary_key=True),
+    db.Column('project_id', db.Integer, db.ForeignKey('project.id'), primary_key=True, index=True),
     db.Column('role', db.String(20), default='Contributor'),  # Lead, Contributor
     db.Column('joined_at', db.DateTime, default=datetime.utcnow)
 )
 
 collaboration_requests = db.Table('collaboration_requests',
     db.Column('sender_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('receiver_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Column('receiver_id', db.Integer, db.ForeignKey('user.id'), primary_key=True, index=True),
     db.Column('status', db.String(20), default='pending'),  # pending, accepted, rejected
     db.Column('message', db.Text),
     db.Column('created_at', db.DateTime, default=datetime.utcnow)
@@ -62,6 +63,19 @@ class User(UserMixin, db.Model):
             return [d.strip() for d in self.research_domains.split(',') if d.strip()]
         return []
     
+    # Fields shown on profile pages and researcher cards
+    PROFILE_FIELDS = ('name', 'email', 'institution', 'bio', 'research_domains',
+                      'current_interests', 'availability', 'role', 'avatar_url')
+    
+    @property
+    def profile_version(self):
+        """
+        Changes whenever a field shown on the profile does (a cache key;
+        an updated_at column would also move with every last_seen write)
+        """
+        fields = '\x1f'.join(str(getattr(self, name) or '') for name in self.PROFILE_FIELDS)
+        return format(zlib.crc32(fields.encode()), '08x')
+    
     def __repr__(self):
         return f'<User {self.email}>'
 
@@ -72,8 +86,8 @@ class Project(db.Model):
     abstract = db.Column(db.Text)
     keywords = db.Column(db.String(500))  # Comma-separated
     project_type = db.Column(db.String(20), default='Solo')  # Solo, Team
-    status = db.Column(db.String(20), default='Draft')  # Draft, Active, Completed
-    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(20), default='Draft', index=True)  # Draft, Active, Completed
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -127,14 +141,17 @@ class Paper(db.Model):
     # Metadata
     status = db.Column(db.String(20), default='Draft')  # Draft, Review, Final
     ai_generated = db.Column(db.Boolean, default=False)
-    author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'))
+    # active_history: the dashboard counters need the old values when these
+    # change, even on an instance whose attributes were expired
+    author_id = db.column_property(db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True),
+                                   active_history=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # AI Review
     review_feedback = db.Column(db.Text)  # JSON stored as text
-    last_reviewed = db.Column(db.DateTime)
+    last_reviewed = db.column_property(db.Column(db.DateTime, index=True), active_history=True)
     
     def __repr__(self):
         return f'<Paper {self.title}>'
@@ -143,20 +160,25 @@ class Message(db.Model):
     """Chat message model"""
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
-    sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'))  # For 1-to-1
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'))  # For group chat
+    sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)  # For 1-to-1
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), index=True)  # For group chat
     message_type = db.Column(db.String(20), default='text')  # text, file, system
-    is_read = db.Column(db.Boolean, default=False)
+    is_read = db.Column(db.Boolean, default=False)  # no longer written: see ReadWatermark
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
+    __table_args__ = (
+        # Unread counts are id ranges per (recipient, sender) past the read watermark
+        db.Index('ix_message_recipient_sender', 'recipient_id', 'sender_id', 'id'),
+    )
+    
     def __repr__(self):
         return f'<Message from User:{self.sender_id}>'
 
 class AIReview(db.Model):
     """AI paper review tracking"""
     id = db.Column(db.Integer, primary_key=True)
-    paper_id = db.Column(db.Integer, db.ForeignKey('paper.id'), nullable=False)
+    paper_id = db.Column(db.Integer, db.ForeignKey('paper.id'), nullable=False, index=True)
     review_type = db.Column(db.String(50))  # structure, clarity, logic, completeness
     findings = db.Column(db.Text)  # JSON stored as text
     severity = db.Column(db.String(20))  # low, medium, high, critical
@@ -167,3 +189,102 @@ class AIReview(db.Model):
     
     def __repr__(self):
         return f'<AIReview for Paper:{self.paper_id}>'
+
+class AICallLog(db.Model):
+    """One LLM call (append-only, written in batches) for usage and capacity reports"""
+    __tablename__ = 'ai_call_log'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
+    provider = db.Column(db.String(20))  # ollama, openai; empty for coalesced calls
+    backend = db.Column(db.String(200))  # e.g. ollama@http://node1:11434
+    model = db.Column(db.String(100), index=True)
+    section = db.Column(db.String(50))  # abstract, ..., review
+    prompt_version = db.Column(db.String(60))
+    prompt_tokens = db.Column(db.Integer)
+    completion_tokens = db.Column(db.Integer)
+    latency_ms = db.Column(db.Float, nullable=False)
+    cold_start = db.Column(db.Boolean, default=False)
+    cache_hit = db.Column(db.Boolean, default=False)  # served by an identical in-flight call
+    status = db.Column(db.String(10), default='ok')  # ok, error
+    error_class = db.Column(db.String(100))
+    
+    def __repr__(self):
+        return f'<AICallLog {self.model} {self.section} {self.latency_ms:.0f}ms>'
+
+class UserSuggestion(db.Model):
+    """Precomputed collaborator suggestion (rank 0 = best match), refreshed by a batch job"""
+    __tablename__ = 'user_suggestion'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    suggested_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    score = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<UserSuggestion {self.user_id} #{self.rank}: {self.suggested_id}>'
+
+class ReadWatermark(db.Model):
+    """
+    How far a user has read a conversation: every message up to
+    last_read_message_id counts as read (one row per user and conversation)
+    """
+    __tablename__ = 'read_watermark'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    kind = db.Column(db.String(10), primary_key=True)  # user, project
+    conversation_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # partner or project id
+    last_read_message_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<ReadWatermark {self.user_id} {self.kind}:{self.conversation_id} @{self.last_read_message_id}>'
+
+class UserCounter(db.Model):
+    """
+    Dashboard counts of one user, kept current by the write paths that
+    change them and reconciled against the source tables by a periodic job
+    """
+    __tablename__ = 'user_counter'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    unread_messages = db.Column(db.Integer, nullable=False, default=0)
+    pending_requests = db.Column(db.Integer, nullable=False, default=0)  # received, still pending
+    stale_reviews = db.Column(db.Integer, nullable=False, default=0)  # papers due for an AI review
+    stale_reviews_due_at = db.Column(db.DateTime)  # when the next reviewed paper goes stale
+    reconciled_at = db.Column(db.DateTime, index=True)
+    
+    def __repr__(self):
+        return f'<UserCounter {self.user_id}>'
+
+class SearchDocument(db.Model):
+    """
+    Searchable text of a paper or project, kept in sync on save
+    (full-text indexed: FTS5 on SQLite, tsvector on PostgreSQL)
+    """
+    __tablename__ = 'search_document'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(10), nullable=False)  # paper, project
+    object_id = db.Column(db.Integer, nullable=False)
+    # Who may see it: the author / project owner and the project's members
+    author_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), index=True)
+    title = db.Column(db.String(300))
+    keywords = db.Column(db.String(700))
+    body = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'object_id', name='uq_search_document_object'),
+    )
+    
+    def __repr__(self):
+        return f'<SearchDocument {self.kind}:{self.object_id}>'
+
+# The full-text indexes are dialect-specific DDL, created with their tables
+from app.services.search import install_message_index, install_search_index
+install_search_index(SearchDocument.__table__)
+install_message_index(Message.__table__)
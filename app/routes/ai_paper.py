@@ -9,27 +9,38 @@ from datetime import datetime
 import json
 from io import BytesIO
 
-# Try to import WeasyPrint (requires GTK on Windows)
-try:
-    from weasyprint import HTML
-    WEASYPRINT_AVAILABLE = True
-except (ImportError, OSError) as e:
-    WEASYPRINT_AVAILABLE = False
-    print(f"⚠️  WeasyPrint not available: {e}")
-    print("   PDF export will not work. Install GTK runtime to enable.")
-
-# Lazy import AI service to avoid initialization errors in serverless
-try:
-    from app.services.ai_service import AIService
-    ai_service = AIService()
-    AI_AVAILABLE = True
-except Exception as e:
-    print(f"⚠️  AI Service not available: {e}")
-    ai_service = None
-    AI_AVAILABLE = False
+from app.services import get_admission_controller, get_ai_service
+from app.services.cache import conditional, not_modified
+from app.services.llm_router import BackendsBusy
+from app.services.rate_limit import RateLimited
 
 bp = Blueprint('ai_paper', __name__, url_prefix='/paper')
 
+# WeasyPrint loads pango/cairo on import, so it is only imported on the first
+# PDF export instead of on every (serverless) cold start
+_weasyprint_html = None
+_weasyprint_checked = False
+
+def get_weasyprint_html():
+    """Return WeasyPrint's HTML class, or None if it is not available"""
+    global _weasyprint_html, _weasyprint_checked
+    if not _weasyprint_checked:
+        _weasyprint_checked = True
+        # Requires GTK on Windows
+        try:
+            from weasyprint import HTML
+            _weasyprint_html = HTML
+        except (ImportError, OSError) as e:
+            print(f"⚠️  WeasyPrint not available: {e}")
+            print("   PDF export will not work. Install GTK runtime to enable.")
+    return _weasyprint_html
+
+def _too_many_requests(response, error):
+    """429 with Retry-After for a request turned away by admission control"""
+    response = make_response(response, 429)
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
 @bp.route('/')
 @login_required
 def index():
@@ -37,6 +48,19 @@ def index():
     papers = current_user.papers.order_by(Paper.updated_at.desc()).all()
     return render_template('paper/index.html', papers=papers)
 
+@bp.route('/search')
+@login_required
+def search():
+    """Full-text search over the user's papers and projects (and their projects' papers)"""
+    from app.services.search import search as search_documents
+    
+    q = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    project_id = request.args.get('project_id', type=int)
+    results, has_next = search_documents(current_user, q, page=page, project_id=project_id)
+    return render_template('paper/search.html', q=q, results=results, page=page,
+                           has_next=has_next, project_id=project_id)
+
 @bp.route('/create', methods=['GET', 'POST'])
 @login_required
 def create():
@@ -96,7 +120,14 @@ def view(paper_id):
             flash('You do not have access to this paper.', 'warning')
             return redirect(url_for('ai_paper.index'))
     
-    return render_template('paper/view.html', paper=paper)
+    # Same paper version and viewer: the client's copy is still current
+    version = ('paper', paper.id, paper.updated_at, paper.author.name,
+               current_user.id, current_user.profile_version)
+    cached = not_modified(*version, last_modified=paper.updated_at)
+    if cached is not None:
+        return cached
+    response = make_response(render_template('paper/view.html', paper=paper))
+    return conditional(response, *version, last_modified=paper.updated_at)
 
 @bp.route('/<int:paper_id>/generate', methods=['GET', 'POST'])
 @login_required
@@ -116,20 +147,22 @@ def generate(paper_id):
             return render_template('paper/generate.html', paper=paper)
         
         # Check if AI service is available
-        if not AI_AVAILABLE or ai_service is None:
+        ai_service = get_ai_service()
+        if ai_service is None:
             flash('AI service is not available. Please configure AI provider.', 'danger')
             return render_template('paper/generate.html', paper=paper)
         
         try:
-            # Generate sections using AI
-            generated_content = ai_service.generate_paper_sections(
-                title=paper.title,
-                domain=paper.domain,
-                keywords=paper.keywords,
-                objective=paper.objective,
-                method_type=paper.method_type,
-                sections=sections
-            )
+            # Generate sections using AI (one LLM call per section)
+            with get_admission_controller().admit(current_user.id, cost=len(sections)):
+                generated_content = ai_service.generate_paper_sections(
+                    title=paper.title,
+                    domain=paper.domain,
+                    keywords=paper.keywords,
+                    objective=paper.objective,
+                    method_type=paper.method_type,
+                    sections=sections
+                )
             
             # Update paper with generated content
             for section, content in generated_content.items():
@@ -142,6 +175,9 @@ def generate(paper_id):
             flash('Sections generated successfully! Review and edit as needed.', 'success')
             return redirect(url_for('ai_paper.edit', paper_id=paper_id))
             
+        except (RateLimited, BackendsBusy) as e:
+            flash(f'{e} (try again in {e.retry_after}s).', 'warning')
+            return _too_many_requests(render_template('paper/generate.html', paper=paper), e)
         except Exception as e:
             flash(f'AI generation failed: {str(e)}', 'danger')
             print(f"AI generation error: {e}")
@@ -201,24 +237,29 @@ def improve_section(paper_id):
         return jsonify({'success': False, 'message': 'Section required'}), 400
     
     # Check if AI service is available
-    if not AI_AVAILABLE or ai_service is None:
+    ai_service = get_ai_service()
+    if ai_service is None:
         return jsonify({'success': False, 'message': 'AI service not available'}), 503
     
     try:
-        improved_text = ai_service.improve_text(
-            section_name=section,
-            current_text=current_text,
-            context={
-                'title': paper.title,
-                'domain': paper.domain,
-                'objective': paper.objective
-            }
-        )
+        with get_admission_controller().admit(current_user.id):
+            improved_text = ai_service.improve_text(
+                section_name=section,
+                current_text=current_text,
+                context={
+                    'title': paper.title,
+                    'domain': paper.domain,
+                    'objective': paper.objective
+                }
+            )
         
         return jsonify({
             'success': True,
             'improved_text': improved_text
         })
+    except (RateLimited, BackendsBusy) as e:
+        return _too_many_requests(jsonify({'success': False, 'message': str(e),
+                                           'retry_after': e.retry_after}), e)
     except Exception as e:
         print(f"Improvement error: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -234,13 +275,15 @@ def review(paper_id):
         return redirect(url_for('ai_paper.view', paper_id=paper_id))
     
     # Check if AI service is available
-    if not AI_AVAILABLE or ai_service is None:
+    ai_service = get_ai_service()
+    if ai_service is None:
         flash('AI service is not available. Please configure AI provider.', 'danger')
         return redirect(url_for('ai_paper.view', paper_id=paper_id))
     
     try:
         # Run AI review
-        review_results = ai_service.review_paper(paper)
+        with get_admission_controller().admit(current_user.id):
+            review_results = ai_service.review_paper(paper)
         
         # Store review results
         paper.review_feedback = json.dumps(review_results)
@@ -261,6 +304,9 @@ def review(paper_id):
         return render_template('paper/review.html',
                              paper=paper,
                              review_results=review_results)
+    except (RateLimited, BackendsBusy) as e:
+        flash(f'{e} (try again in {e.retry_after}s).', 'warning')
+        return _too_many_requests(render_template('paper/view.html', paper=paper), e)
     except Exception as e:
         flash(f'AI review failed: {str(e)}', 'danger')
         print(f"Review error: {e}")
@@ -326,7 +372,8 @@ def export_paper(paper_id):
         )
         
         # Try PDF generation if WeasyPrint is available
-        if WEASYPRINT_AVAILABLE:
+        HTML = get_weasyprint_html()
+        if HTML is not None:
             try:
                 # Generate PDF from HTML
                 pdf_buffer = BytesIO()
@@ -1,12 +1,14 @@
 """
 ResearchHub AI - Chat Routes
 """
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, url_for
 from flask_login import login_required, current_user
 from app import db
 from app.models import Message, User, Project
 from datetime import datetime
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, case, func
+from app.services.read_state import mark_read, watermark_of
+from app.services.search import message_context, search_messages
 
 bp = Blueprint('chat', __name__, url_prefix='/chat')
 
@@ -15,46 +17,36 @@ bp = Blueprint('chat', __name__, url_prefix='/chat')
 def index():
     """Chat inbox"""
     # Get recent conversations
-    # 1-to-1 chats
-    sent_messages = db.session.query(Message.recipient_id).filter(
-        Message.sender_id == current_user.id,
+    # 1-to-1 chats: partner, last message and unread count per conversation,
+    # fetched in a single query however many conversations there are
+    partner_id = case(
+        (Message.sender_id == current_user.id, Message.recipient_id),
+        else_=Message.sender_id
+    )
+    summary = db.session.query(
+        partner_id.label('partner_id'),
+        func.max(Message.id).label('last_message_id'),
+        func.sum(case(
+            (and_(Message.recipient_id == current_user.id,
+                  Message.id > watermark_of(current_user.id, Message.sender_id)), 1),
+            else_=0
+        )).label('unread_count')
+    ).filter(
+        or_(Message.sender_id == current_user.id, Message.recipient_id == current_user.id),
         Message.recipient_id != None
-    ).distinct().all()
-    
-    received_messages = db.session.query(Message.sender_id).filter(
-        Message.recipient_id == current_user.id
-    ).distinct().all()
-    
-    conversation_user_ids = set()
-    for msg in sent_messages:
-        conversation_user_ids.add(msg[0])
-    for msg in received_messages:
-        conversation_user_ids.add(msg[0])
-    
-    conversations = []
-    for user_id in conversation_user_ids:
-        user = User.query.get(user_id)
-        if user:
-            # Get last message
-            last_msg = Message.query.filter(
-                or_(
-                    and_(Message.sender_id == current_user.id, Message.recipient_id == user_id),
-                    and_(Message.sender_id == user_id, Message.recipient_id == current_user.id)
-                )
-            ).order_by(Message.created_at.desc()).first()
-            
-            # Count unread
-            unread = Message.query.filter(
-                Message.sender_id == user_id,
-                Message.recipient_id == current_user.id,
-                Message.is_read == False
-            ).count()
-            
-            conversations.append({
-                'user': user,
-                'last_message': last_msg,
-                'unread_count': unread
-            })
+    ).group_by(partner_id).subquery()
+    
+    rows = db.session.query(Message, User, summary.c.unread_count).join(
+        summary, Message.id == summary.c.last_message_id
+    ).join(
+        User, User.id == summary.c.partner_id
+    ).all()
+    
+    conversations = [{
+        'user': user,
+        'last_message': last_msg,
+        'unread_count': unread or 0
+    } for last_msg, user, unread in rows]
     
     # Sort by last message time
     conversations.sort(key=lambda x: x['last_message'].created_at if x['last_message'] else datetime.min, reverse=True)
@@ -75,25 +67,29 @@ def chat_with_user(user_id):
     if user.id == current_user.id:
         return "Cannot chat with yourself", 400
     
-    # Get message history
-    messages = Message.query.filter(
-        or_(
-            and_(Message.sender_id == current_user.id, Message.recipient_id == user_id),
-            and_(Message.sender_id == user_id, Message.recipient_id == current_user.id)
-        )
-    ).order_by(Message.created_at.asc()).all()
-    
-    # Mark messages as read
-    Message.query.filter(
-        Message.sender_id == user_id,
-        Message.recipient_id == current_user.id,
-        Message.is_read == False
-    ).update({'is_read': True})
-    db.session.commit()
+    # Jumping to a search result: only the messages around it
+    around = request.args.get('around', type=int)
+    context = message_context(current_user, around, before=50, after=50) if around else None
+    if context and context['conversation'] == ('user', user_id):
+        messages = context['messages']
+    else:
+        # Get message history
+        messages = Message.query.filter(
+            or_(
+                and_(Message.sender_id == current_user.id, Message.recipient_id == user_id),
+                and_(Message.sender_id == user_id, Message.recipient_id == current_user.id)
+            )
+        ).order_by(Message.created_at.asc()).all()
+    
+    # Mark messages as read: one watermark row, however many there were
+    if messages:
+        mark_read(db.session, current_user.id, 'user', user_id, messages[-1].id)
+        db.session.commit()
     
     return render_template('chat/user_chat.html',
                          chat_user=user,
-                         messages=messages)
+                         messages=messages,
+                         around=around)
 
 @bp.route('/project/<int:project_id>')
 @login_required
@@ -107,12 +103,22 @@ def project_chat(project_id):
     if not is_member:
         return "Access denied", 403
     
-    # Get message history
-    messages = project.messages.order_by(Message.created_at.asc()).all()
+    around = request.args.get('around', type=int)
+    context = message_context(current_user, around, before=50, after=50) if around else None
+    if context and context['conversation'] == ('project', project_id):
+        messages = context['messages']
+    else:
+        # Get message history
+        messages = project.messages.order_by(Message.created_at.asc()).all()
+    
+    if messages:
+        mark_read(db.session, current_user.id, 'project', project_id, messages[-1].id)
+        db.session.commit()
     
     return render_template('chat/project_chat.html',
                          project=project,
-                         messages=messages)
+                         messages=messages,
+                         around=around)
 
 @bp.route('/send', methods=['POST'])
 @login_required
@@ -163,12 +169,69 @@ def get_history(user_id):
     ).order_by(Message.created_at.asc()).all()
     
     return jsonify({
-        'messages': [{
-            'id': m.id,
-            'content': m.content,
-            'sender_id': m.sender_id,
-            'sender_name': m.sender.name,
-            'created_at': m.created_at.isoformat(),
-            'is_own': m.sender_id == current_user.id
-        } for m in messages]
+        'messages': [_message_json(m) for m in messages]
+    })
+
+def _message_json(m):
+    return {
+        'id': m.id,
+        'content': m.content,
+        'sender_id': m.sender_id,
+        'sender_name': m.sender.name,
+        'created_at': m.created_at.isoformat(),
+        'is_own': m.sender_id == current_user.id
+    }
+
+def _conversation_url(kind, conversation_id, message_id):
+    """Chat page opened at message_id"""
+    if kind == 'project':
+        return url_for('chat.project_chat', project_id=conversation_id, around=message_id,
+                       _anchor=f'message-{message_id}')
+    return url_for('chat.chat_with_user', user_id=conversation_id, around=message_id,
+                   _anchor=f'message-{message_id}')
+
+@bp.route('/search')
+@login_required
+def search():
+    """Search messages in the user's conversations and project chats (AJAX endpoint)"""
+    q = request.args.get('q', '').strip()
+    results, next_cursor = search_messages(
+        current_user, q,
+        before=request.args.get('before', type=int),
+        per_page=max(1, min(request.args.get('per_page', 20, type=int), 100)),
+        partner_id=request.args.get('user_id', type=int),
+        project_id=request.args.get('project_id', type=int)
+    )
+    
+    return jsonify({
+        'results': [{
+            'id': r['id'],
+            'snippet': str(r['snippet']),
+            'sender_id': r['sender_id'],
+            'sender_name': r['sender_name'],
+            'created_at': r['created_at'].isoformat(),
+            'conversation': {'type': r['conversation'][0], 'id': r['conversation'][1]},
+            'context_url': url_for('chat.context', message_id=r['id']),
+            'url': _conversation_url(*r['conversation'], r['id'])
+        } for r in results],
+        'next_cursor': next_cursor
+    })
+
+@bp.route('/messages/<int:message_id>/context')
+@login_required
+def context(message_id):
+    """Messages around one message, with cursors to scroll either way (AJAX endpoint)"""
+    before = min(request.args.get('before', 20, type=int), 100)
+    after = min(request.args.get('after', 20, type=int), 100)
+    context = message_context(current_user, message_id, before=max(before, 0), after=max(after, 0))
+    if context is None:
+        return jsonify({'success': False, 'message': 'Message not found'}), 404
+    
+    kind, conversation_id = context['conversation']
+    return jsonify({
+        'message_id': message_id,
+        'conversation': {'type': kind, 'id': conversation_id},
+        'messages': [_message_json(m) for m in context['messages']],
+        'earlier': context['earlier'],
+        'later': context['later']
     })
@@ -1,11 +1,12 @@
 """
 ResearchHub AI - Dashboard Routes
 """
-from flask import Blueprint, render_template
+from flask import Blueprint, current_app, render_template
 from flask_login import login_required, current_user
-from app.models import User, Project, Message, Paper
-from sqlalchemy import or_, and_, func
-from datetime import datetime, timedelta
+from app import db
+from app.models import Project, Paper
+from app.services.counters import get_counters
+from datetime import datetime
 
 bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 
@@ -22,61 +23,31 @@ def index():
     # Get suggested researchers (matching algorithm)
     suggested = get_suggested_researchers(current_user)
     
-    # Get recent unread messages count
-    unread_count = Message.query.filter(
-        and_(
-            Message.recipient_id == current_user.id,
-            Message.is_read == False
-        )
-    ).count()
+    # Unread messages, pending requests and AI alerts (papers needing
+    # review): maintained counters, one primary-key read
+    counters = get_counters(current_user.id)
     
     # Get recent papers
     recent_papers = current_user.papers.order_by(Paper.updated_at.desc()).limit(3).all()
     
-    # Get AI alerts (papers needing review)
-    papers_needing_review = current_user.papers.filter(
-        or_(
-            Paper.last_reviewed == None,
-            Paper.last_reviewed < datetime.utcnow() - timedelta(days=7)
-        )
-    ).count()
-    
-    return render_template('dashboard/index.html',
+    html = render_template('dashboard/index.html',
                          active_projects=active_projects,
                          suggested_researchers=suggested[:5],
-                         unread_messages=unread_count,
+                         unread_messages=counters.unread_messages,
+                         pending_requests=counters.pending_requests,
                          recent_papers=recent_papers,
-                         papers_needing_review=papers_needing_review)
+                         papers_needing_review=counters.stale_reviews)
+    # last_seen, and the counters if they were just recounted
+    db.session.commit()
+    return html
 
 def get_suggested_researchers(user, limit=10):
-    """Find researchers with matching interests"""
-    if not user.research_domains:
-        return []
-    
-    user_tags = set(user.get_domains_list())
-    
-    # Find users with common tags
-    all_users = User.query.filter(
-        User.id != user.id,
-        User.is_active == True,
-        User.research_domains != None
-    ).all()
-    
-    matches = []
-    for other_user in all_users:
-        other_tags = set(other_user.get_domains_list())
-        common = user_tags & other_tags
-        
-        if len(common) >= 1:  # MIN_COMMON_TAGS from config
-            matches.append({
-                'user': other_user,
-                'common_tags': list(common),
-                'score': len(common)
-            })
-    
-    # Sort by match score
-    matches.sort(key=lambda x: x['score'], reverse=True)
-    return matches[:limit]
+    """Researchers with similar domains, interests and bio (precomputed top-k, cosine similarity)"""
+    if not current_app.config.get('SUGGESTIONS_PRECOMPUTED', True):
+        from app.services.matching import suggest_researchers
+        return suggest_researchers(user, limit)
+    from app.services.suggestions import get_suggestions
+    return get_suggestions(user, limit)
 
 @bp.route('/stats')
 @login_required
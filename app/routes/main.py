@@ -3,10 +3,12 @@ ResearchHub AI - Main Routes
 """
 from flask import Blueprint, render_template
 from flask_login import current_user
+from app.services.cache import cache_page
 
 bp = Blueprint('main', __name__)
 
 @bp.route('/')
+@cache_page
 def index():
     """Landing page"""
     if current_user.is_authenticated:
@@ -15,11 +17,13 @@ def index():
     return render_template('main/landing.html')
 
 @bp.route('/about')
+@cache_page
 def about():
     """About page"""
     return render_template('main/about.html')
 
 @bp.route('/features')
+@cache_page
 def features():
     """Features page"""
     return render_template('main/features.html')
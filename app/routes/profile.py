@@ -1,10 +1,11 @@
 """
 ResearchHub AI - Profile Routes
 """
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, make_response
 from flask_login import login_required, current_user
 from app import db
 from app.models import User
+from app.services.cache import conditional, not_modified
 
 bp = Blueprint('profile', __name__, url_prefix='/profile')
 
@@ -13,7 +14,11 @@ bp = Blueprint('profile', __name__, url_prefix='/profile')
 def view(user_id):
     """View user profile"""
     user = User.query.get_or_404(user_id)
-    return render_template('profile/view.html', user=user)
+    version = ('profile', user.id, user.profile_version, current_user.id, current_user.profile_version)
+    cached = not_modified(*version)
+    if cached is not None:
+        return cached
+    return conditional(make_response(render_template('profile/view.html', user=user)), *version)
 
 @bp.route('/edit', methods=['GET', 'POST'])
 @login_required
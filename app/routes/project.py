@@ -75,25 +75,24 @@ def view(project_id):
     """View project details"""
     project = Project.query.get_or_404(project_id)
     
-    # Check if user is member
-    is_member = project.members.filter_by(id=current_user.id).first() is not None
+    # Get all members with their roles in one query
+    members_data = [
+        {'user': member, 'role': role}
+        for member, role in db.session.query(User, project_members.c.role).join(
+            project_members, project_members.c.user_id == User.id
+        ).filter(
+            project_members.c.project_id == project.id
+        ).all()
+    ]
+    
+    # Check if user is member and get their role
+    user_role = next((m['role'] for m in members_data if m['user'].id == current_user.id), None)
+    is_member = any(m['user'].id == current_user.id for m in members_data)
     
     if not is_member and project.owner_id != current_user.id:
         flash('You do not have access to this project.', 'warning')
         return redirect(url_for('project.index'))
     
-    # Get member role
-    user_role = project.get_member_role(current_user.id)
-    
-    # Get all members with roles
-    members_data = []
-    for member in project.members.all():
-        role = project.get_member_role(member.id)
-        members_data.append({
-            'user': member,
-            'role': role
-        })
-    
     return render_template('project/view.html',
                          project=project,
                          is_owner=(project.owner_id == current_user.id),
@@ -1,11 +1,12 @@
 """
 ResearchHub AI - Research Discovery & Matching Routes
 """
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for, jsonify
 from flask_login import login_required, current_user
 from app import db
 from app.models import User, collaboration_requests
 from sqlalchemy import or_, and_
+from app.services.counters import bump
 
 bp = Blueprint('research', __name__, url_prefix='/research')
 
@@ -34,29 +35,34 @@ def discover():
     if domain_filter:
         query = query.filter(User.research_domains.ilike(f'%{domain_filter}%'))
     
-    researchers = query.all()
-    
-    # Calculate match scores
-    user_tags = set(current_user.get_domains_list()) if current_user.research_domains else set()
-    
-    researcher_data = []
-    for researcher in researchers:
-        researcher_tags = set(researcher.get_domains_list()) if researcher.research_domains else set()
-        common_tags = user_tags & researcher_tags
-        
-        researcher_data.append({
-            'user': researcher,
-            'common_tags': list(common_tags),
-            'match_score': len(common_tags)
-        })
-    
-    # Sort by match score
-    researcher_data.sort(key=lambda x: x['match_score'], reverse=True)
+    from app.services.matching import get_profile_index, rank_researchers
+    
+    # Everyone who matches, most similar first, a page at a time: scoring
+    # the ids is one matrix product, only the page's profiles are loaded
+    per_page = current_app.config.get('MATCHING_DISCOVER_LIMIT', 60)
+    page = max(1, request.args.get('page', 1, type=int))
+    index = get_profile_index()
+    ids = db.session.connection().execute(query.with_entities(User.id).order_by(
+        User.last_seen.desc(), User.id).statement).scalars().all()
+    scores = index.scores(index.vector(current_user.research_domains, current_user.current_interests,
+                                       current_user.bio), ids)
+    ids.sort(key=lambda user_id: scores[user_id], reverse=True)
+    start = (page - 1) * per_page
+    page_ids = ids[start:start + per_page]
+    researchers = query.filter(User.id.in_(page_ids)).all() if page_ids else []
+    position = {user_id: i for i, user_id in enumerate(page_ids)}
+    researchers.sort(key=lambda user: position[user.id])
+    
+    # Similarity of each profile to the current user's (0..1)
+    researcher_data = rank_researchers(current_user, researchers)
     
     return render_template('research/discover.html',
                          researchers=researcher_data,
                          search_query=search_query,
-                         domain_filter=domain_filter)
+                         domain_filter=domain_filter,
+                         total=len(ids),
+                         first=start + 1,
+                         next_page=page + 1 if start + per_page < len(ids) else None)
 
 @bp.route('/suggestions')
 @login_required
@@ -67,6 +73,18 @@ def suggestions():
     suggested = get_suggested_researchers(current_user, limit=20)
     return render_template('research/suggestions.html', suggestions=suggested)
 
+@bp.route('/domains/suggest')
+@login_required
+def suggest_domains():
+    """Autocomplete for research-domain tags, most used first"""
+    from app.services.domains import get_domain_index
+    
+    prefix = request.args.get('prefix', '')
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    suggestions = get_domain_index().suggest(prefix, limit)
+    return jsonify({'prefix': prefix,
+                    'suggestions': [{'tag': tag, 'count': count} for tag, count in suggestions]})
+
 @bp.route('/request/<int:user_id>', methods=['POST'])
 @login_required
 def send_request(user_id):
@@ -101,6 +119,7 @@ def send_request(user_id):
     
     try:
         db.session.execute(stmt)
+        bump(db.session.connection(), receiver.id, pending_requests=1)
         db.session.commit()
         flash(f'Collaboration request sent to {receiver.name}!', 'success')
         return jsonify({'success': True})
@@ -113,49 +132,47 @@ def send_request(user_id):
 @login_required
 def requests_page():
     """View collaboration requests"""
-    # Received requests
+    # Received requests (joined with the sender to avoid a query per row)
     received = db.session.execute(
         db.select(
-            collaboration_requests.c.sender_id,
+            User,
             collaboration_requests.c.message,
             collaboration_requests.c.status,
             collaboration_requests.c.created_at
+        ).join(
+            collaboration_requests, collaboration_requests.c.sender_id == User.id
         ).where(
             collaboration_requests.c.receiver_id == current_user.id
         ).order_by(collaboration_requests.c.created_at.desc())
     ).all()
     
-    received_data = []
-    for req in received:
-        sender = User.query.get(req.sender_id)
-        received_data.append({
-            'sender': sender,
-            'message': req.message,
-            'status': req.status,
-            'created_at': req.created_at
-        })
+    received_data = [{
+        'sender': req.User,
+        'message': req.message,
+        'status': req.status,
+        'created_at': req.created_at
+    } for req in received]
     
     # Sent requests
     sent = db.session.execute(
         db.select(
-            collaboration_requests.c.receiver_id,
+            User,
             collaboration_requests.c.message,
             collaboration_requests.c.status,
             collaboration_requests.c.created_at
+        ).join(
+            collaboration_requests, collaboration_requests.c.receiver_id == User.id
         ).where(
             collaboration_requests.c.sender_id == current_user.id
         ).order_by(collaboration_requests.c.created_at.desc())
     ).all()
     
-    sent_data = []
-    for req in sent:
-        receiver = User.query.get(req.receiver_id)
-        sent_data.append({
-            'receiver': receiver,
-            'message': req.message,
-            'status': req.status,
-            'created_at': req.created_at
-        })
+    sent_data = [{
+        'receiver': req.User,
+        'message': req.message,
+        'status': req.status,
+        'created_at': req.created_at
+    } for req in sent]
     
     return render_template('research/requests.html',
                          received_requests=received_data,
@@ -179,7 +196,14 @@ def respond_request(sender_id):
     ).values(status=action)
     
     try:
-        db.session.execute(stmt)
+        # Only the response that actually moves it out of 'pending' counts,
+        # however many arrive at once
+        answered = db.session.execute(
+            stmt.where(collaboration_requests.c.status == 'pending')).rowcount
+        if answered:
+            bump(db.session.connection(), current_user.id, pending_requests=-1)
+        else:
+            db.session.execute(stmt)  # already answered: change the answer
         db.session.commit()
         flash(f'Request {action}!', 'success')
         return jsonify({'success': True})
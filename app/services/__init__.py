@@ -1 +1,58 @@
-# Empty init file for services module
+"""
+ResearchHub AI - Services
+"""
+import threading
+import time
+
+_ai_service = None
+_ai_service_lock = threading.Lock()
+# A failed construction is retried no sooner than this (seconds), so a
+# misconfigured provider doesn't cost every AI request a retry and a warning
+AI_SERVICE_RETRY_SECONDS = 60
+_ai_service_failed_at = None
+
+def _backing_off():
+    return (_ai_service_failed_at is not None
+            and time.monotonic() - _ai_service_failed_at < AI_SERVICE_RETRY_SECONDS)
+
+def get_ai_service():
+    """
+    Return the shared AIService, constructing it on first use
+
+    The service (and its provider client) is only built when an AI endpoint
+    is actually hit, so cold starts that serve other routes never pay for it.
+    Returns None if the service cannot be constructed (and, for the next
+    AI_SERVICE_RETRY_SECONDS, without trying again).
+    """
+    global _ai_service, _ai_service_failed_at
+    if _ai_service is None:
+        with _ai_service_lock:
+            if _ai_service is None:
+                if _backing_off():
+                    return None
+                try:
+                    from app.services.ai_service import AIService
+                    _ai_service = AIService()
+                    _ai_service_failed_at = None
+                except Exception as e:
+                    _ai_service_failed_at = time.monotonic()
+                    print(f"⚠️  AI Service not available (retrying in {AI_SERVICE_RETRY_SECONDS}s): {e}")
+                    return None
+    return _ai_service
+
+# Separate from _ai_service_lock: building the controller must never wait
+# behind (or hold up) a slow AIService construction
+_admission_lock = threading.Lock()
+
+def get_admission_controller():
+    """The current app's AdmissionController (rate limits for AI endpoints), built on first use"""
+    from flask import current_app
+    app = current_app._get_current_object()
+    controller = app.extensions.get('admission')
+    if controller is None:
+        with _admission_lock:
+            controller = app.extensions.get('admission')
+            if controller is None:
+                from app.services.rate_limit import AdmissionController
+                controller = app.extensions['admission'] = AdmissionController.from_config(app.config)
+    return controller
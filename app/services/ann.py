@@ -0,0 +1,339 @@
+"""
+ResearchHub AI - Approximate nearest-neighbour indexes
+HNSW graphs over unit-length profile vectors (inner product = cosine), so
+collaborator suggestions cost a few hundred dot products instead of a scan
+of every profile. FAISS is used when installed (requirements-advanced.txt);
+otherwise a NumPy/pure-Python HNSW with the same interface.
+
+Both support incremental adds; removals and updates leave a tombstone that
+is skipped at query time until the graph is rebuilt.
+"""
+import heapq
+import math
+import os
+import uuid
+
+class ANNIndex:
+    """Label bookkeeping shared by the HNSW implementations"""
+
+    kind = None
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.labels = []  # node -> label (user id)
+        self.node_of = {}  # label -> live node
+        self.deleted = set()  # tombstoned nodes
+
+    def __len__(self):
+        return len(self.node_of)
+
+    @property
+    def deleted_ratio(self):
+        return len(self.deleted) / len(self.labels) if self.labels else 0.0
+
+    def add(self, label, vector):
+        """Insert (or replace) one vector"""
+        self.remove(label)
+        self.node_of[label] = len(self.labels)
+        self.labels.append(label)
+        self._insert(vector)
+
+    def add_many(self, labels, vectors):
+        for label, vector in zip(labels, vectors):
+            self.add(int(label), vector)
+
+    def remove(self, label):
+        node = self.node_of.pop(label, None)
+        if node is not None:
+            self.deleted.add(node)
+
+    def search(self, vector, k, exclude=()):
+        """[(label, similarity)] of about the k nearest live vectors, best first"""
+        if not self.node_of or k <= 0:
+            return []
+        exclude = set(exclude)
+        fetch = k + len(exclude & self.node_of.keys())
+        results = []
+        for node, score in self._search(vector, fetch + min(len(self.deleted), fetch)):
+            if node in self.deleted:
+                continue
+            label = self.labels[node]
+            if label not in exclude:
+                results.append((label, score))
+                if len(results) == k:
+                    break
+        return results
+
+    def _insert(self, vector):
+        raise NotImplementedError
+
+    def _search(self, vector, k):
+        """[(node, similarity)] best first, tombstones included"""
+        raise NotImplementedError
+
+    def save(self, stem):
+        """Write the index to stem.npz (and any companion files next to it)"""
+        raise NotImplementedError
+
+class HNSWIndex(ANNIndex):
+    """
+    Hierarchical navigable small world graph (Malkov & Yashunin) in NumPy
+
+    Slower to build than FAISS (pure Python inserts), but queries only
+    touch a few hundred vectors regardless of index size.
+    """
+
+    kind = 'hnsw'
+
+    def __init__(self, dim, m=16, ef_construction=64, ef_search=128, seed=42):
+        import numpy as np
+
+        super().__init__(dim)
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.level_mult = 1 / math.log(m)
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.links = []  # node -> [neighbours at level 0, level 1, ...]
+        self.entry = None
+        self.max_level = -1
+        self._rng = np.random.default_rng(seed)
+
+    def _max_links(self, level):
+        return 2 * self.m if level == 0 else self.m
+
+    def _grow(self, count):
+        import numpy as np
+
+        if count <= len(self.vectors):
+            return
+        vectors = np.zeros((max(count, 2 * len(self.vectors), 1024), self.dim), dtype=np.float32)
+        vectors[:len(self.labels) - 1] = self.vectors[:len(self.labels) - 1]
+        self.vectors = vectors
+
+    def _insert(self, vector):
+        node = len(self.labels) - 1
+        self._grow(node + 1)
+        self.vectors[node] = vector
+        level = int(-math.log(1.0 - self._rng.random()) * self.level_mult)
+        self.links.append([[] for _ in range(level + 1)])
+
+        if self.entry is None:
+            self.entry, self.max_level = node, level
+            return
+
+        entry = self.entry
+        for layer in range(self.max_level, level, -1):
+            entry = self._search_layer(vector, [entry], 1, layer)[0][1]
+        for layer in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(vector, [entry], self.ef_construction, layer)
+            neighbours = self._select(found, self.m)
+            self.links[node][layer] = neighbours
+            for other in neighbours:
+                self._connect(other, node, layer)
+            entry = found[0][1]
+
+        if level > self.max_level:
+            self.entry, self.max_level = node, level
+
+    def _connect(self, node, new, layer):
+        links = self.links[node][layer]
+        links.append(new)
+        if len(links) > self._max_links(layer):
+            sims = self.vectors[links] @ self.vectors[node]
+            ranked = sorted(zip(sims.tolist(), links), reverse=True)
+            self.links[node][layer] = self._select(ranked, self._max_links(layer))
+
+    def _select(self, candidates, m):
+        """
+        Neighbour selection heuristic: keep a candidate only if it is closer
+        to the new node than to any neighbour already kept, which preserves
+        links into other clusters; top up with the closest of the rest.
+        """
+        selected, skipped = [], []
+        for sim, node in candidates:
+            if len(selected) == m:
+                break
+            if selected and (self.vectors[selected] @ self.vectors[node]).max() > sim:
+                skipped.append(node)
+            else:
+                selected.append(node)
+        return selected + skipped[:m - len(selected)]
+
+    def _search_layer(self, vector, entries, ef, layer):
+        """[(similarity, node)] of the ef closest nodes found on layer, best first"""
+        visited = set(entries)
+        sims = (self.vectors[entries] @ vector).tolist()
+        candidates = [(-sim, node) for sim, node in zip(sims, entries)]
+        heapq.heapify(candidates)
+        best = [(sim, node) for sim, node in zip(sims, entries)]
+        heapq.heapify(best)
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if len(best) >= ef and -neg_sim < best[0][0]:
+                break
+            links = self.links[node]
+            fresh = [n for n in links[layer] if n not in visited] if layer < len(links) else []
+            if not fresh:
+                continue
+            visited.update(fresh)
+            for sim, other in zip((self.vectors[fresh] @ vector).tolist(), fresh):
+                if len(best) < ef or sim > best[0][0]:
+                    heapq.heappush(candidates, (-sim, other))
+                    heapq.heappush(best, (sim, other))
+                    if len(best) > ef:
+                        heapq.heappop(best)
+        return sorted(best, reverse=True)
+
+    def _search(self, vector, k):
+        if self.entry is None:
+            return []
+        entry = self.entry
+        for layer in range(self.max_level, 0, -1):
+            entry = self._search_layer(vector, [entry], 1, layer)[0][1]
+        found = self._search_layer(vector, [entry], max(self.ef_search, k), 0)
+        return [(node, sim) for sim, node in found[:k]]
+
+    def save(self, stem):
+        """The graph as flat arrays"""
+        import numpy as np
+
+        counts, flat = [], []
+        for node_links in self.links:
+            counts.append(len(node_links))
+            for layer_links in node_links:
+                flat.append(len(layer_links))
+                flat.extend(layer_links)
+        np.savez(stem + '.npz', vectors=self.vectors[:len(self.labels)],
+                 labels=np.array(self.labels, dtype=np.int64),
+                 deleted=np.array(sorted(self.deleted), dtype=np.int64),
+                 levels=np.array(counts, dtype=np.int32), links=np.array(flat, dtype=np.int64),
+                 params=np.array([self.m, self.ef_construction, self.ef_search,
+                                  -1 if self.entry is None else self.entry, self.max_level]))
+
+    @classmethod
+    def load(cls, stem):
+        import numpy as np
+
+        data = np.load(stem + '.npz')
+        m, ef_construction, ef_search, entry, max_level = data['params'].tolist()
+        index = cls(data['vectors'].shape[1], m, ef_construction, ef_search)
+        index.vectors = np.array(data['vectors'], dtype=np.float32)
+        index.labels = data['labels'].tolist()
+        index.deleted = set(data['deleted'].tolist())
+        index.node_of = {label: node for node, label in enumerate(index.labels)
+                         if node not in index.deleted}
+        flat, pos = data['links'].tolist(), 0
+        for count in data['levels'].tolist():
+            node_links = []
+            for _ in range(count):
+                size = flat[pos]
+                node_links.append(flat[pos + 1:pos + 1 + size])
+                pos += 1 + size
+            index.links.append(node_links)
+        index.entry = None if entry < 0 else entry
+        index.max_level = max_level
+        return index
+
+class FaissIndex(ANNIndex):
+    """faiss.IndexHNSWFlat with inner-product metric"""
+
+    kind = 'faiss'
+
+    def __init__(self, dim, m=32, ef_construction=64, ef_search=128, index=None):
+        import faiss
+
+        super().__init__(dim)
+        if index is None:
+            index = faiss.IndexHNSWFlat(dim, m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = ef_construction
+        index.hnsw.efSearch = ef_search
+        self.index = index
+
+    def _insert(self, vector):
+        import numpy as np
+        self.index.add(np.ascontiguousarray(vector, dtype=np.float32).reshape(1, -1))
+
+    def add_many(self, labels, vectors):
+        import numpy as np
+
+        labels = [int(label) for label in labels]
+        for label in labels:
+            self.remove(label)
+        start = len(self.labels)
+        self.labels.extend(labels)
+        self.node_of.update((label, start + i) for i, label in enumerate(labels))
+        self.index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+
+    def _search(self, vector, k):
+        import numpy as np
+
+        self.index.hnsw.efSearch = max(self.index.hnsw.efSearch, k)
+        sims, nodes = self.index.search(np.ascontiguousarray(vector, dtype=np.float32).reshape(1, -1), k)
+        return [(int(node), float(sim)) for node, sim in zip(nodes[0], sims[0]) if node >= 0]
+
+    def save(self, stem):
+        import faiss
+        import numpy as np
+
+        faiss.write_index(self.index, stem + '.faiss')
+        np.savez(stem + '.npz', labels=np.array(self.labels, dtype=np.int64),
+                 deleted=np.array(sorted(self.deleted), dtype=np.int64))
+
+    @classmethod
+    def load(cls, stem):
+        import faiss
+        import numpy as np
+
+        raw = faiss.read_index(stem + '.faiss')
+        data = np.load(stem + '.npz')
+        index = cls(raw.d, index=raw)
+        index.labels = data['labels'].tolist()
+        index.deleted = set(data['deleted'].tolist())
+        index.node_of = {label: node for node, label in enumerate(index.labels)
+                         if node not in index.deleted}
+        return index
+
+def faiss_available():
+    try:
+        import faiss  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+ANN_INDEXES = {'hnsw': HNSWIndex, 'faiss': FaissIndex}
+
+def create_ann(kind, dim, **options):
+    """'faiss', 'hnsw', or 'auto' (FAISS if installed, else the NumPy HNSW)"""
+    if kind == 'auto':
+        kind = 'faiss' if faiss_available() else 'hnsw'
+    return ANN_INDEXES[kind](dim, **options)
+
+def load_ann(path):
+    """The index saved by save_ann(ann, path); None if there is none (or FAISS is missing)"""
+    for kind, cls in ANN_INDEXES.items():
+        stem = f'{path}.{kind}'
+        if os.path.exists(stem + '.npz'):
+            if kind == 'faiss' and not faiss_available():
+                return None
+            return cls.load(stem)
+    return None
+
+def save_ann(ann, path):
+    """Write ann to path.<kind>.*, replacing the previous files atomically"""
+    # Unique per writer: other workers may be saving to the same path
+    stem, tmp = f'{path}.{ann.kind}', f'{path}.{ann.kind}.{os.getpid()}-{uuid.uuid4().hex}.tmp'
+    try:
+        ann.save(tmp)
+        for ext in ('.faiss', '.npz'):
+            if os.path.exists(tmp + ext):
+                os.replace(tmp + ext, stem + ext)
+    finally:
+        for ext in ('.faiss', '.npz'):
+            if os.path.exists(tmp + ext):
+                os.remove(tmp + ext)
+    for kind in ANN_INDEXES:
+        if kind != ann.kind:
+            for ext in ('.faiss', '.npz'):
+                if os.path.exists(f'{path}.{kind}{ext}'):
+                    os.remove(f'{path}.{kind}{ext}')
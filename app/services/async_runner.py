@@ -0,0 +1,83 @@
+"""
+ResearchHub AI - Background asyncio loop
+Lets synchronous Flask / Socket.IO code run many LLM calls concurrently on a
+single event-loop thread instead of one blocked worker thread per call.
+"""
+import asyncio
+import sys
+import threading
+import time
+
+def _green_mode():
+    """'eventlet' / 'gevent' if the process has been monkey-patched"""
+    if 'eventlet' in sys.modules:
+        from eventlet import patcher
+        if patcher.is_monkey_patched('thread'):
+            return 'eventlet'
+    if 'gevent' in sys.modules:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            return 'gevent'
+    return None
+
+def _real_thread_class():
+    """An OS-level Thread class even when threading is monkey-patched"""
+    mode = _green_mode()
+    if mode == 'eventlet':
+        from eventlet import patcher
+        return patcher.original('threading').Thread
+    if mode == 'gevent':
+        from gevent import monkey
+        return monkey.get_original('threading', 'Thread')
+    return threading.Thread
+
+class AsyncLoopThread:
+    """A dedicated OS thread running one asyncio event loop"""
+
+    def __init__(self):
+        self.loop = None
+        self._started = threading.Lock()
+
+    def start(self):
+        with self._started:
+            if self.loop is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            thread = _real_thread_class()(target=self._run, name='llm-event-loop', daemon=True)
+            thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """Schedule a coroutine, returns a concurrent.futures.Future"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None, sleep=None):
+        """
+        Run a coroutine on the loop and wait for its result
+
+        Under eventlet/gevent the wait polls with sleep (socketio.sleep by
+        default) so the calling green thread yields to the hub instead of
+        blocking every other client on the worker.
+        """
+        future = self.submit(coro)
+        if _green_mode() is None and sleep is None:
+            return future.result(timeout)
+
+        if sleep is None:
+            from app import socketio
+            sleep = socketio.sleep
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.005
+        while not future.done():
+            if deadline is not None and time.monotonic() > deadline:
+                future.cancel()
+                raise TimeoutError("LLM call timed out")
+            sleep(delay)
+            delay = min(delay * 2, 0.1)
+        return future.result()
+
+runner = AsyncLoopThread()
@@ -0,0 +1,260 @@
+"""
+ResearchHub AI - Response caching
+Anonymous pages (landing, about, features) are served whole from the cache,
+and template fragments that only depend on one object (a paper's content,
+a researcher card) are cached under that object's version, so an edit is
+simply a new key. Pages answer conditional GETs (ETag / Last-Modified)
+with 304 instead of re-sending them.
+Entries live in an LRU in process memory (per worker) or in Redis (shared
+by all workers), selected by RESPONSE_CACHE_URL.
+"""
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from app.metrics import metrics
+
+class MemoryCache:
+    """At most max_entries values for ttl seconds each, least recently used evicted first"""
+
+    def __init__(self, max_entries=1000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisCache:
+    """Same interface as MemoryCache, shared by every worker through Redis (values as JSON)"""
+
+    def __init__(self, url, ttl=300, prefix='researchhub:cache:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(ttl or self.ttl))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+def create_cache(url, max_entries=1000, ttl=300):
+    """'memory://' (or empty) -> MemoryCache; 'redis://...' / 'rediss://...' -> RedisCache"""
+    if not url or url.startswith('memory://'):
+        return MemoryCache(max_entries, ttl)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisCache(url, ttl)
+    raise ValueError(f"Unsupported RESPONSE_CACHE_URL: {url}")
+
+_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """The current app's cache, built on first use; None if RESPONSE_CACHE_ENABLED is off"""
+    from flask import current_app
+    app = current_app._get_current_object()
+    if not app.config.get('RESPONSE_CACHE_ENABLED', True):
+        return None
+    cache = app.extensions.get('response_cache')
+    if cache is None:
+        with _cache_lock:
+            cache = app.extensions.get('response_cache')
+            if cache is None:
+                cache = app.extensions['response_cache'] = create_cache(
+                    app.config.get('RESPONSE_CACHE_URL', 'memory://'),
+                    app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 2000),
+                    app.config.get('RESPONSE_CACHE_TTL', 600))
+    return cache
+
+def _template_mtimes(app):
+    """Modification times of the app's template files (cheap: no reads)"""
+    loaders = [app.jinja_loader] + [bp.jinja_loader for bp in app.iter_blueprints()]
+    return tuple(os.path.getmtime(os.path.join(root, name))
+                 for loader in loaders if loader is not None
+                 for path in loader.searchpath
+                 for root, _, files in sorted(os.walk(path)) for name in sorted(files))
+
+def template_version():
+    """
+    Short hash of every template's source (and the asset manifest), so a
+    deploy that changes either never serves pages or fragments rendered
+    by the old one
+
+    Computed once per process; when templates auto-reload (debug), it is
+    recomputed if a template file's mtime changed (checked once per request).
+    """
+    from flask import current_app, g, has_request_context
+    if has_request_context() and 'template_version' in g:
+        return g.template_version
+    app = current_app._get_current_object()
+    version, mtimes = app.extensions.get('template_version', (None, None))
+    if version is None or app.jinja_env.auto_reload:
+        current = _template_mtimes(app) if app.jinja_env.auto_reload else None
+        if version is None or current != mtimes:
+            digest = hashlib.sha1()
+            for name in sorted(app.jinja_env.list_templates()):
+                source, _, _ = app.jinja_env.loader.get_source(app.jinja_env, name)
+                digest.update(name.encode() + b'\0' + source.encode())
+            # Pages link to hashed asset names, which change with each build
+            digest.update(json.dumps(app.extensions.get('assets', {}), sort_keys=True).encode())
+            version = digest.hexdigest()[:12]
+            app.extensions['template_version'] = (version, current)
+    if has_request_context():
+        g.template_version = version
+    return version
+
+def cache_key(*parts):
+    return hashlib.sha1('\x1f'.join(map(str, parts)).encode()).hexdigest()
+
+def conditional(response, *version, last_modified=None):
+    """
+    Tag response with an ETag derived from version (and Last-Modified),
+    turning it into a 304 if the client already has it
+    """
+    from flask import request
+
+    if _has_flashes():
+        return response
+    response.set_etag(cache_key(template_version(), *version))
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True  # browsers keep it but revalidate
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
+def not_modified(*version, last_modified=None):
+    """
+    A 304 if the client's copy of the page for version is current, else None
+
+    Lets a view skip rendering entirely; pair it with conditional() on the
+    rendered response.
+    """
+    from flask import make_response, request
+
+    if request.method not in ('GET', 'HEAD') or _has_flashes():
+        return None
+    response = conditional(make_response(''), *version, last_modified=last_modified)
+    return response if response.status_code == 304 else None
+
+def _has_flashes():
+    """Flash messages shown (or about to be) in this request; such pages are one-off"""
+    from flask import get_flashed_messages
+    return bool(get_flashed_messages())
+
+def cache_page(view):
+    """
+    Serve a view's page from the cache to anonymous visitors
+
+    Logged-in users and pending flash messages always render. The entry is
+    keyed by the full URL and the template version and kept for
+    RESPONSE_CACHE_TTL seconds; only 200 HTML responses are stored.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask import make_response, request
+        from flask_login import current_user
+
+        cache = get_response_cache()
+        if (cache is None or request.method not in ('GET', 'HEAD')
+                or current_user.is_authenticated or _has_flashes()):
+            return view(*args, **kwargs)
+
+        key = 'page:' + cache_key(template_version(), request.url)
+        try:
+            entry = cache.get(key)
+        except Exception as e:
+            print(f"⚠️  Response cache unavailable: {e}")
+            return view(*args, **kwargs)
+        if entry is not None:
+            metrics.inc('response_cache_total', kind='page', result='hit')
+            response = make_response(entry['body'])
+            return conditional(response, key, last_modified=datetime.fromtimestamp(
+                entry['rendered_at'], timezone.utc))
+
+        metrics.inc('response_cache_total', kind='page', result='miss')
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.mimetype != 'text/html':
+            return response
+        rendered_at = time.time()
+        try:
+            cache.set(key, {'body': response.get_data(as_text=True), 'rendered_at': rendered_at})
+        except Exception as e:
+            print(f"⚠️  Response cache unavailable: {e}")
+        return conditional(response, key, last_modified=datetime.fromtimestamp(rendered_at, timezone.utc))
+    return wrapper
+
+def cached_fragment(*key_parts, caller):
+    """
+    Jinja helper: render the body of a {% call %} block once per key
+
+        {% call cached_fragment('paper', paper.id, paper.updated_at) %}...{% endcall %}
+
+    The key must cover everything the block shows (an object's id and
+    version); the block must not depend on the viewer.
+    """
+    from markupsafe import Markup
+
+    cache = get_response_cache()
+    if cache is None:
+        return caller()
+    key = 'fragment:' + cache_key(template_version(), *key_parts)
+    try:
+        html = cache.get(key)
+    except Exception as e:
+        print(f"⚠️  Response cache unavailable: {e}")
+        return caller()
+    if html is None:
+        metrics.inc('response_cache_total', kind='fragment', result='miss')
+        html = str(caller())
+        try:
+            cache.set(key, html)
+        except Exception as e:
+            print(f"⚠️  Response cache unavailable: {e}")
+    else:
+        metrics.inc('response_cache_total', kind='fragment', result='hit')
+    return Markup(html)
+
+def init_app(app):
+    """Make cached_fragment available to every template"""
+    app.jinja_env.globals['cached_fragment'] = cached_fragment
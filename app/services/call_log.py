@@ -0,0 +1,139 @@
+"""
+ResearchHub AI - AI call log
+Buffers one row per LLM call in memory and writes them to ai_call_log in
+batches from a background task, so generation never waits on the database.
+"""
+import atexit
+import collections
+import threading
+from datetime import datetime
+from app.metrics import metrics
+
+class CallLogWriter:
+    """Append-only, batched writer for AICallLog rows"""
+
+    def __init__(self, app, batch_size=200, flush_interval=5.0, max_buffer=50000):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # deque appends are atomic, so OS threads (the async LLM loop) and
+        # green threads can both record without a lock
+        self.buffer = collections.deque(maxlen=max_buffer)
+        self._started = False
+        self._lock = threading.Lock()
+        self._flushing = threading.Lock()
+
+    @classmethod
+    def from_config(cls, app):
+        return cls(app, batch_size=app.config.get('AI_CALL_LOG_BATCH_SIZE', 200),
+                   flush_interval=app.config.get('AI_CALL_LOG_FLUSH_SECONDS', 5))
+
+    def record(self, row):
+        """Queue one call (called by LLMRouter for every attempt)"""
+        if len(self.buffer) == self.buffer.maxlen:
+            metrics.inc('ai_call_log_dropped_total')
+        row.setdefault('created_at', datetime.utcnow())
+        self.buffer.append(row)
+        if not self.flush_interval:
+            self.flush()
+        elif not self._started:
+            self._start()
+
+    def _start(self):
+        from app import socketio
+
+        # record() runs in request greenlets and on the async LLM loop's
+        # thread; only the first caller may start the flusher
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        atexit.register(self.flush)
+
+        def run():
+            while True:
+                socketio.sleep(self.flush_interval)
+                self.flush()
+
+        socketio.start_background_task(run)
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written"""
+        from sqlalchemy import insert
+        from app import db
+        from app.models import AICallLog
+
+        written = 0
+        with self._flushing:
+            while self.buffer:
+                rows = []
+                while self.buffer and len(rows) < self.batch_size:
+                    rows.append(self.buffer.popleft())
+                with self.app.app_context():
+                    try:
+                        db.session.execute(insert(AICallLog), rows)
+                        db.session.commit()
+                        written += len(rows)
+                    except Exception as e:
+                        db.session.rollback()
+                        metrics.inc('ai_call_log_dropped_total', len(rows))
+                        print(f"⚠️  Could not write {len(rows)} AI call log rows: {e}")
+                        break
+        return written
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+def usage_report(since, group_by='model'):
+    """
+    Calls, tokens, throughput and latency percentiles per group since a datetime
+
+    group_by is an AICallLog column: model, backend, section, provider or user_id.
+    Latency percentiles cover successful upstream calls (not coalesced ones).
+    """
+    from sqlalchemy import func, case
+    from app import db
+    from app.models import AICallLog
+
+    column = getattr(AICallLog, group_by)
+    upstream = db.and_(AICallLog.status == 'ok', AICallLog.cache_hit.isnot(True))
+    rows = db.session.query(
+        column,
+        func.count(AICallLog.id),
+        func.sum(case((AICallLog.status == 'error', 1), else_=0)),
+        func.sum(case((AICallLog.cache_hit.is_(True), 1), else_=0)),
+        func.sum(case((AICallLog.cold_start.is_(True), 1), else_=0)),
+        func.sum(AICallLog.prompt_tokens),
+        func.sum(AICallLog.completion_tokens),
+        func.sum(case((upstream, AICallLog.latency_ms), else_=0)),
+        func.min(AICallLog.created_at),
+        func.max(AICallLog.created_at)
+    ).filter(AICallLog.created_at >= since).group_by(column).all()
+
+    latencies = collections.defaultdict(list)
+    for key, latency in db.session.query(column, AICallLog.latency_ms).filter(
+            AICallLog.created_at >= since, upstream).order_by(column, AICallLog.latency_ms):
+        latencies[key].append(latency)
+
+    report = []
+    for key, calls, errors, hits, cold, prompt_tokens, completion_tokens, busy_ms, first, last in rows:
+        span_hours = max((last - first).total_seconds() / 3600, 1 / 60)
+        busy_seconds = (busy_ms or 0) / 1000
+        report.append({
+            group_by: key,
+            'calls': calls,
+            'errors': errors or 0,
+            'cache_hits': hits or 0,
+            'cold_starts': cold or 0,
+            'prompt_tokens': prompt_tokens or 0,
+            'completion_tokens': completion_tokens or 0,
+            'calls_per_hour': round(calls / span_hours, 2),
+            'busy_seconds': round(busy_seconds, 1),
+            # Generation speed while busy (not wall-clock throughput)
+            'tokens_per_second': round((completion_tokens or 0) / busy_seconds, 1) if busy_seconds else None,
+            'p50_ms': _percentile(latencies[key], 50),
+            'p95_ms': _percentile(latencies[key], 95),
+        })
+    return sorted(report, key=lambda row: -row['busy_seconds'])
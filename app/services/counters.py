@@ -0,0 +1,233 @@
+"""
+ResearchHub AI - Maintained dashboard counters
+Each user has one user_counter row: unread 1-to-1 messages, pending
+collaboration requests received, and papers due for an AI review. The
+write paths adjust it in the same transaction (a message insert, a read
+watermark moving, a request sent or answered, a paper saved or reviewed),
+so the dashboard reads it by primary key instead of counting.
+
+Papers go stale with time rather than with a write, so the row also keeps
+when the next one does (stale_reviews_due_at); a read past that moment
+recounts that user. `flask counters reconcile` (also run periodically in
+the background, COUNTERS_RECONCILE_SECONDS) recounts everyone and
+corrects any drift, e.g. from bulk loads that bypass these paths.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from app.metrics import metrics
+
+COUNTERS = ('unread_messages', 'pending_requests', 'stale_reviews')
+# Papers not reviewed for this long are flagged on the dashboard
+STALE_REVIEW_AFTER = timedelta(days=7)
+# SQLite caps bound parameters per statement
+_IN_CHUNK = 500
+
+def is_stale(last_reviewed, now=None):
+    return last_reviewed is None or last_reviewed < (now or datetime.utcnow()) - STALE_REVIEW_AFTER
+
+def bump(connection, user_id, **deltas):
+    """
+    Add deltas to a user's counters in the current transaction (never below 0)
+
+    Users without a row are skipped: their counters are computed in full
+    on first read.
+    """
+    from sqlalchemy import case, update
+    from app.models import UserCounter
+
+    values = {}
+    for name, delta in deltas.items():
+        if delta:
+            column = getattr(UserCounter, name)
+            values[name] = case((column + delta < 0, 0), else_=column + delta)
+    if values and user_id is not None:
+        connection.execute(update(UserCounter).where(UserCounter.user_id == user_id).values(**values))
+
+def _reviewed(connection, user_id, reviewed_at):
+    """A paper became fresh: it goes stale again at reviewed_at + STALE_REVIEW_AFTER"""
+    from sqlalchemy import case, update
+    from app.models import UserCounter
+
+    due = reviewed_at + STALE_REVIEW_AFTER
+    column = UserCounter.stale_reviews_due_at
+    connection.execute(update(UserCounter).where(UserCounter.user_id == user_id).values(
+        stale_reviews_due_at=case((column.is_(None) | (column > due), due), else_=column)))
+
+# ---------------------------------------------------------------------------
+# Write paths tracked by session events
+# ---------------------------------------------------------------------------
+
+def _history(state, attr):
+    """(value before this flush, value now) of a loaded attribute"""
+    history = state.attrs[attr].history
+    now = state.attrs[attr].value
+    return (history.deleted[0] if history.deleted else now), now
+
+def _track_counters(session, flush_context):
+    """Adjust counters for messages and papers written in this flush"""
+    from collections import Counter
+    from sqlalchemy import inspect
+    from app.models import Message, Paper
+
+    now = datetime.utcnow()
+    unread, stale, reviewed = Counter(), Counter(), {}
+    for obj in session.new:
+        if isinstance(obj, Message) and obj.recipient_id is not None:
+            unread[obj.recipient_id] += 1
+        elif isinstance(obj, Paper):
+            if is_stale(obj.last_reviewed, now):
+                stale[obj.author_id] += 1
+            else:
+                reviewed[obj.author_id] = obj.last_reviewed
+    for obj in session.dirty:
+        if not isinstance(obj, Paper):
+            continue
+        state = inspect(obj)
+        (old_author, author), (old_reviewed, last_reviewed) = (_history(state, 'author_id'),
+                                                               _history(state, 'last_reviewed'))
+        if old_author == author and old_reviewed == last_reviewed:
+            continue
+        stale[old_author] -= is_stale(old_reviewed, now)
+        stale[author] += is_stale(last_reviewed, now)
+        if not is_stale(last_reviewed, now):
+            reviewed[author] = last_reviewed
+    for obj in session.deleted:
+        if isinstance(obj, Paper):
+            state = inspect(obj)
+            stale[_history(state, 'author_id')[0]] -= is_stale(_history(state, 'last_reviewed')[0], now)
+
+    if not (unread or stale or reviewed):
+        return
+    connection = session.connection()
+    for user_id in set(unread) | set(stale):
+        bump(connection, user_id, unread_messages=unread[user_id], stale_reviews=stale[user_id])
+    for user_id, reviewed_at in reviewed.items():
+        _reviewed(connection, user_id, reviewed_at)
+
+# ---------------------------------------------------------------------------
+# Reads and reconciliation
+# ---------------------------------------------------------------------------
+
+def recount(session, user_ids):
+    """{user_id: {counter: value, 'stale_reviews_due_at': ...}} from the source tables"""
+    from sqlalchemy import case, func, select
+    from app.models import Message, Paper, collaboration_requests
+    from app.services.read_state import watermark_of
+
+    now = datetime.utcnow()
+    stale_before = now - STALE_REVIEW_AFTER
+    counts = {user_id: dict.fromkeys(COUNTERS, 0) for user_id in user_ids}
+    for values in counts.values():
+        values['stale_reviews_due_at'] = None
+
+    for user_id, n in session.execute(select(Message.recipient_id, func.count(Message.id)).where(
+            Message.recipient_id.in_(user_ids),
+            Message.id > watermark_of(Message.recipient_id, Message.sender_id),
+    ).group_by(Message.recipient_id)):
+        counts[user_id]['unread_messages'] = n
+
+    requests = collaboration_requests.c
+    for user_id, n in session.execute(select(requests.receiver_id, func.count()).where(
+            requests.receiver_id.in_(user_ids), requests.status == 'pending',
+    ).group_by(requests.receiver_id)):
+        counts[user_id]['pending_requests'] = n
+
+    is_fresh = Paper.last_reviewed >= stale_before
+    for user_id, n, oldest_fresh in session.execute(select(
+            Paper.author_id,
+            func.sum(case((is_fresh, 0), else_=1)),
+            func.min(case((is_fresh, Paper.last_reviewed), else_=None)),
+    ).where(Paper.author_id.in_(user_ids)).group_by(Paper.author_id)):
+        counts[user_id]['stale_reviews'] = n or 0
+        if oldest_fresh is not None:
+            counts[user_id]['stale_reviews_due_at'] = oldest_fresh + STALE_REVIEW_AFTER
+    return counts
+
+def reconcile(session, user_ids=None, chunk_size=_IN_CHUNK, commit=True):
+    """
+    Recount users' counters (everyone by default), one chunk per
+    transaction; returns (users, rows that had drifted)
+
+    commit=False only flushes, leaving the transaction to the caller.
+    """
+    from app.models import User, UserCounter
+
+    if user_ids is None:
+        user_ids = [user_id for user_id, in session.query(User.id).order_by(User.id)]
+    user_ids = list(user_ids)
+    drifted = 0
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        counts = recount(session, chunk)
+        rows = {row.user_id: row for row in
+                session.query(UserCounter).filter(UserCounter.user_id.in_(chunk))}
+        now = datetime.utcnow()
+        for user_id, values in counts.items():
+            row = rows.get(user_id)
+            if row is None:
+                row = UserCounter(user_id=user_id)
+                session.add(row)
+            elif row.reconciled_at is not None and any(
+                    getattr(row, name) != values[name] for name in COUNTERS):
+                drifted += 1
+            for name, value in values.items():
+                setattr(row, name, value)
+            row.reconciled_at = now
+        if commit:
+            session.commit()
+        else:
+            session.flush()
+    if drifted:
+        metrics.inc('counter_drift_total', drifted)
+    return len(user_ids), drifted
+
+def get_counters(user_id):
+    """A user's counters, by primary key; recounted first if missing or a paper has gone stale"""
+    from app import db
+    from app.models import UserCounter
+
+    row = db.session.get(UserCounter, user_id)
+    if row is None or (row.stale_reviews_due_at is not None
+                       and row.stale_reviews_due_at <= datetime.utcnow()):
+        # Part of the request's transaction: a read must not commit its pending changes
+        reconcile(db.session, [user_id], commit=False)
+        row = db.session.get(UserCounter, user_id)
+    return row
+
+_listening = False
+
+def init_app(app):
+    """
+    Track counter changes on every session, and reconcile everyone every
+    COUNTERS_RECONCILE_SECONDS in a background task (0 = only from the CLI)
+    of the serving process
+    """
+    from app.cli import serving_process
+
+    global _listening
+    if not _listening:
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        event.listen(Session, 'after_flush', _track_counters)
+        _listening = True
+
+    interval = app.config.get('COUNTERS_RECONCILE_SECONDS', 3600)
+    if interval and not os.environ.get('VERCEL') and serving_process(app):
+        from app import socketio
+
+        def task():
+            while True:
+                socketio.sleep(interval)
+                try:
+                    with app.app_context():
+                        from app import db
+                        started = time.perf_counter()
+                        users, drifted = reconcile(db.session)
+                        print(f"🔢 Reconciled counters of {users} users in "
+                              f"{time.perf_counter() - started:.1f}s ({drifted} drifted)")
+                except Exception as e:
+                    print(f"⚠️  Counter reconciliation failed: {e}")
+
+        socketio.start_background_task(task)
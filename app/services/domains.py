@@ -0,0 +1,285 @@
+"""
+ResearchHub AI - Research-domain autocomplete
+Every domain tag in use (User.research_domains, Project.keywords) is kept
+normalized in a sorted array with its usage count, so prefix suggestions
+are a binary search. Each word of a tag is indexed too ("learn" finds
+"Machine Learning"), and known abbreviations find their expansion ("ml").
+Counts follow committed profile and project edits.
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+_SPACES = re.compile(r'\s+')
+# Ranking prefixes that match more entries than this ("m", "comp") is the
+# slow case, so their top tags are cached and adjusted as counts change
+CACHE_MIN_MATCHES = 200
+
+def normalize_tag(tag):
+    """'  machine   Learning ' -> 'machine learning' (the key tags are counted under)"""
+    return _SPACES.sub(' ', tag or '').strip().lower()
+
+def split_tags(text):
+    return [tag.strip() for tag in (text or '').split(',') if tag.strip()]
+
+class DomainIndex:
+    """
+    Sorted (word-prefix key, tag key) pairs plus usage counts
+
+    The displayed spelling of a tag is the one used most often.
+    """
+
+    def __init__(self):
+        self.counts = Counter()  # tag key -> usages
+        self.spellings = defaultdict(Counter)  # tag key -> {spelling: usages}
+        self.entries = []  # sorted (word suffix of the key, key)
+        self._cache = {}  # (prefix, limit) -> (prefixes searched, best tag keys)
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, texts):
+        """Index from comma-separated tag strings"""
+        index = cls()
+        for text in texts:
+            for tag in split_tags(text):
+                index._tally(tag, 1)
+        # Sorted once rather than inserted one by one
+        index.entries = sorted(entry for key in index.counts for entry in _entries(key))
+        return index
+
+    def __len__(self):
+        return len(self.counts)
+
+    def update(self, old_text, new_text):
+        """Apply one edit of a comma-separated tag field (None = no value)"""
+        old, new = Counter(split_tags(old_text)), Counter(split_tags(new_text))
+        if old == new:
+            return
+        with self._lock:
+            for tag, n in (old - new).items():
+                self._count(tag, -n)
+            for tag, n in (new - old).items():
+                self._count(tag, n)
+
+    def _count(self, tag, delta):
+        key, before = self._tally(tag, delta)
+        if not key:
+            return
+        self._adjust_cache(key)
+        after = self.counts.get(key, 0)
+        if before <= 0 < after:
+            for entry in _entries(key):
+                bisect.insort(self.entries, entry)
+        elif after <= 0 < before:
+            for entry in _entries(key):
+                i = bisect.bisect_left(self.entries, entry)
+                if i < len(self.entries) and self.entries[i] == entry:
+                    del self.entries[i]
+
+    def _adjust_cache(self, key):
+        """
+        Re-rank cached results key matches with its new count
+
+        A listed tag whose count drops stays listed until the next rebuild
+        even if an unlisted one now outranks it; a tag that disappears
+        drops the entry (re-ranked on the next lookup).
+        """
+        words = [word for word, _ in _entries(key)]
+        count = self.counts.get(key, 0)
+        for cache_key, (prefixes, best) in list(self._cache.items()):
+            if not any(word.startswith(p) for word in words for p in prefixes):
+                continue
+            if not count:
+                if key in best:
+                    del self._cache[cache_key]
+                continue
+            best = heapq.nlargest(cache_key[1], set(best) | {key}, key=self._rank)
+            self._cache[cache_key] = (prefixes, best)
+
+    def _rank(self, key):
+        return self.counts[key], -len(key)
+
+    def _tally(self, tag, delta):
+        """Adjust the counts only; returns (key, usages before)"""
+        key = normalize_tag(tag)
+        if not key:
+            return None, 0
+        spelling = _SPACES.sub(' ', tag).strip()
+        before = self.counts[key]
+        self.counts[key] += delta
+        self.spellings[key][spelling] += delta
+        if self.spellings[key][spelling] <= 0:
+            del self.spellings[key][spelling]
+        if self.counts[key] <= 0:
+            del self.counts[key], self.spellings[key]
+        return key, before
+
+    def suggest(self, prefix, limit=10):
+        """[(tag, usages)] of tags with a word starting with prefix, most used first"""
+        from app.services.matching import ABBREVIATIONS
+
+        prefix = normalize_tag(prefix)
+        if not prefix or limit <= 0:
+            return []
+        prefixes = [prefix]
+        if prefix in ABBREVIATIONS:
+            prefixes.append(ABBREVIATIONS[prefix])
+        with self._lock:
+            cached = self._cache.get((prefix, limit))
+            if cached is not None:
+                return self._display(cached[1])
+            keys, matches = set(), 0
+            for p in prefixes:
+                # Entries starting with p are one contiguous run
+                start = bisect.bisect_left(self.entries, (p,))
+                end = bisect.bisect_left(self.entries, (p + '\uffff',), start)
+                keys.update(key for _, key in self.entries[start:end])
+                matches += end - start
+            best = heapq.nlargest(limit, keys, key=self._rank)
+            if matches > CACHE_MIN_MATCHES:
+                self._cache[(prefix, limit)] = (prefixes, best)
+            return self._display(best)
+
+    def _display(self, keys):
+        return [(self.spellings[key].most_common(1)[0][0], self.counts[key]) for key in keys]
+
+def _entries(key):
+    """(suffix, key) for each word start in key: 'machine learning' -> 'machine learning', 'learning'"""
+    yield key, key
+    for match in re.finditer(r'[ \-/]', key):
+        rest = key[match.end():]
+        if rest:
+            yield rest, key
+
+# ---------------------------------------------------------------------------
+# Per-app index, kept current by session events
+# ---------------------------------------------------------------------------
+
+_build_lock = threading.Lock()
+
+def load_tag_texts():
+    """Domain fields of active researchers, then project keywords"""
+    from app import db
+    from app.models import Project, User
+
+    yield from (text for text, in db.session.query(User.research_domains).filter(
+        User.is_active == True, User.research_domains.isnot(None)).yield_per(5000))
+    yield from (text for text, in db.session.query(Project.keywords).filter(
+        Project.keywords.isnot(None)).yield_per(5000))
+
+def get_domain_index():
+    """
+    The current app's DomainIndex, built on first use
+
+    Rebuilt in the background every DOMAINS_REFRESH_SECONDS to pick up
+    edits made by other worker processes.
+    """
+    from flask import current_app
+    app = current_app._get_current_object()
+    index = app.extensions.get('domain_index')
+    if index is None:
+        with _build_lock:
+            index = app.extensions.get('domain_index')
+            if index is None:
+                index = app.extensions['domain_index'] = DomainIndex.build(load_tag_texts())
+        return index
+
+    refresh = app.config.get('DOMAINS_REFRESH_SECONDS', 600)
+    if refresh and time.monotonic() - index.built_at > refresh and _build_lock.acquire(blocking=False):
+        index.built_at = time.monotonic()  # one rebuild at a time
+
+        def rebuild():
+            try:
+                with app.app_context():
+                    app.extensions['domain_index'] = DomainIndex.build(load_tag_texts())
+            except Exception as e:
+                print(f"⚠️  Domain index rebuild failed: {e}")
+            finally:
+                _build_lock.release()
+
+        threading.Thread(target=rebuild, name='domain-index', daemon=True).start()
+    return index
+
+def _history(state, attr):
+    """(value before this flush, value now) of a loaded attribute"""
+    history = state.attrs[attr].history
+    now = state.attrs[attr].value
+    if history.deleted:
+        return history.deleted[0], now
+    return (None if history.added else now), now
+
+def _tag_fields(obj, state, is_new, is_deleted):
+    """(old tags, new tags) of a User or Project, None if it is neither"""
+    from app.models import Project, User
+
+    if isinstance(obj, User):
+        (old_domains, domains), (old_active, active) = (_history(state, 'research_domains'),
+                                                        _history(state, 'is_active'))
+        old = None if is_new or not old_active else old_domains
+        new = None if is_deleted or active is False else domains
+    elif isinstance(obj, Project):
+        old_keywords, keywords = _history(state, 'keywords')
+        old = None if is_new else old_keywords
+        new = None if is_deleted else keywords
+    else:
+        return None
+    return old, new
+
+def _collect_tag_changes(session, flush_context):
+    """Remember tag edits in this transaction (applied after commit)"""
+    from sqlalchemy import inspect
+
+    changes = session.info.setdefault('tag_changes', [])
+    for group, is_new, is_deleted in ((session.new, True, False), (session.dirty, False, False),
+                                      (session.deleted, False, True)):
+        for obj in group:
+            fields = _tag_fields(obj, inspect(obj), is_new, is_deleted)
+            if fields and fields[0] != fields[1]:
+                changes.append(fields)
+
+def _apply_tag_changes(session):
+    from flask import current_app, has_app_context
+
+    changes = session.info.pop('tag_changes', None)
+    if not changes or not has_app_context():
+        return
+    index = current_app.extensions.get('domain_index')
+    if index is None:
+        return  # will be built from the database on first use
+    for old, new in changes:
+        index.update(old, new)
+
+def _discard_tag_changes(session, previous_transaction=None):
+    session.info.pop('tag_changes', None)
+
+_listening = False
+
+def init_app(app):
+    """
+    Keep every app's domain index current as profiles and projects change,
+    and build it in the background at startup (DOMAINS_PREBUILD) so the
+    first keystroke doesn't pay for it
+    """
+    global _listening
+    if not _listening:
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        event.listen(Session, 'after_flush', _collect_tag_changes)
+        event.listen(Session, 'after_commit', _apply_tag_changes)
+        event.listen(Session, 'after_soft_rollback', _discard_tag_changes)
+        _listening = True
+
+    if app.config.get('DOMAINS_PREBUILD', True):
+        def prebuild():
+            try:
+                with app.app_context():
+                    get_domain_index()
+            except Exception as e:
+                print(f"⚠️  Domain index build failed: {e}")
+
+        threading.Thread(target=prebuild, name='domain-index', daemon=True).start()
@@ -0,0 +1,206 @@
+"""
+ResearchHub AI - Tolerant JSON parsing for LLM output
+An incremental parser that turns whatever the model produced into the
+closest JSON value: prose and ```json fences around the object, trailing or
+missing commas, unquoted keys, Python literals and output cut off by
+max_tokens (open strings, arrays and objects are closed) are all accepted.
+"""
+import json
+
+_LITERALS = {'true': True, 'false': False, 'null': None,
+             'True': True, 'False': False, 'None': None}
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f'}
+_NUMBER_START = set('-+0123456789.')
+_DELIMITERS = set(' \t\r\n,:{}[]"\'')
+
+class _Frame:
+    """An open object or array; its container is already attached to the parent"""
+
+    __slots__ = ('value', 'key')
+
+    def __init__(self, value):
+        self.value = value
+        self.key = None
+
+class IncrementalJSONParser:
+    """
+    Feed model output chunk by chunk; value() is the best reading so far
+
+    Only the first top-level object or array is parsed; anything after it
+    is ignored.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.complete = False
+        self._stack = []
+        self._quote = None  # open string delimiter
+        self._string = []
+        self._escape = None  # None, '' after a backslash, or hex digits of \\uXXXX
+        self._token = []  # bare number / literal in progress
+
+    def feed(self, chunk):
+        for char in chunk:
+            if self.complete:
+                return self
+            if self._quote:
+                self._string_char(char)
+            elif self._token and char not in _DELIMITERS:
+                self._token.append(char)
+            else:
+                if self._token:
+                    self._end_token()
+                self._char(char)
+        return self
+
+    def value(self):
+        """The parsed value, with any open string, array or object closed"""
+        if self._quote and self._stack and not self._wants_key():
+            # Cut off mid-string: keep the text that arrived
+            return _with_partial(self.root, self._stack, ''.join(self._string))
+        if self._token and self._stack:
+            value = _token_value(''.join(self._token))
+            if value is not _INVALID and not self._wants_key():
+                return _with_partial(self.root, self._stack, value)
+        return _copy(self.root)
+
+    def _wants_key(self):
+        frame = self._stack[-1]
+        return isinstance(frame.value, dict) and frame.key is None
+
+    def _char(self, char):
+        if not self._stack and self.root is None:
+            # Skip prose and code fences before the JSON starts
+            if char in '{[':
+                self._open({} if char == '{' else [])
+            return
+        if char in ' \t\r\n,:':
+            return
+        if char in '{[':
+            self._open({} if char == '{' else [])
+        elif char in '}]':
+            self._close(dict if char == '}' else list)
+        elif char in '"\'':
+            self._quote = char
+            self._string = []
+        else:
+            self._token.append(char)
+
+    def _string_char(self, char):
+        if self._escape is not None:
+            if self._escape == '' and char != 'u':
+                self._string.append(_ESCAPES.get(char, char))
+                self._escape = None
+            elif self._escape == '':
+                self._escape = 'u'
+            else:
+                self._escape += char
+                if len(self._escape) == 5:
+                    try:
+                        self._string.append(chr(int(self._escape[1:], 16)))
+                    except ValueError:
+                        pass
+                    self._escape = None
+        elif char == '\\':
+            self._escape = ''
+        elif char == self._quote:
+            self._quote = None
+            self._add(''.join(self._string), is_string=True)
+        else:
+            # Raw newlines and other control characters are kept as-is
+            self._string.append(char)
+
+    def _end_token(self):
+        text = ''.join(self._token)
+        self._token = []
+        value = _token_value(text)
+        if value is _INVALID:
+            # A bare word: most likely an unquoted key or string
+            value = text
+        self._add(value, is_string=isinstance(value, str))
+
+    def _open(self, container):
+        if self._stack:
+            self._add(container)
+        else:
+            self.root = container
+        self._stack.append(_Frame(container))
+
+    def _close(self, kind):
+        # Tolerate a mismatched bracket by closing up to the nearest match
+        while self._stack:
+            frame = self._stack.pop()
+            if isinstance(frame.value, kind):
+                break
+        if not self._stack:
+            self.complete = True
+
+    def _add(self, value, is_string=False):
+        if not self._stack:
+            return
+        frame = self._stack[-1]
+        if isinstance(frame.value, list):
+            frame.value.append(value)
+        elif frame.key is None:
+            # Object keys must be strings; a stray value without a key is dropped
+            if is_string:
+                frame.key = value
+        else:
+            frame.value[frame.key] = value
+            frame.key = None
+
+_INVALID = object()
+
+def _token_value(text):
+    if text in _LITERALS:
+        return _LITERALS[text]
+    if text[0] in _NUMBER_START:
+        try:
+            return int(text)
+        except ValueError:
+            try:
+                return float(text)
+            except ValueError:
+                pass
+    return _INVALID
+
+def _with_partial(root, stack, value):
+    """root with value added to the innermost open container (the parser's state is not changed)"""
+    frame = stack[-1]
+    if isinstance(frame.value, list):
+        frame.value.append(value)
+        result = _copy(root)
+        frame.value.pop()
+    else:
+        frame.value[frame.key] = value
+        result = _copy(root)
+        del frame.value[frame.key]
+    return result
+
+def _copy(value):
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+def parse_json(text):
+    """
+    Best-effort JSON value from model output
+
+    Returns (value, repaired): repaired is False when text (without any
+    surrounding prose) was already valid JSON. Raises ValueError if no
+    object or array could be found.
+    """
+    parser = IncrementalJSONParser().feed(text or '')
+    value = parser.value()
+    if value is None:
+        raise ValueError("No JSON object in model output")
+    return value, not (parser.complete and _is_strict(text, value))
+
+def _is_strict(text, value):
+    start = min(i for i in (text.find('{'), text.find('[')) if i >= 0)
+    try:
+        return json.JSONDecoder().raw_decode(text[start:])[0] == value
+    except ValueError:
+        return False
@@ -0,0 +1,422 @@
+"""
+ResearchHub AI - LLM Router
+Spreads generations across several backends (e.g. a pool of Ollama nodes
+with OpenAI as fallback): least-outstanding-requests balancing, periodic
+health checks, a circuit breaker per backend, a concurrency cap per backend
+and per-section models.
+"""
+import asyncio
+import threading
+import time
+from app.metrics import COLD_START_SECONDS, metrics, record_llm_call
+from app.services.prompt_budget import estimate_tokens
+from app.services.providers import create_provider
+from app.services.singleflight import SingleFlight
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+# How often a request waiting for a free backend slot looks again
+CAPACITY_POLL_SECONDS = 0.05
+
+class NoBackendAvailable(Exception):
+    """Every backend is unhealthy or has its circuit open"""
+
+class BackendsBusy(NoBackendAvailable):
+    """Every available backend stayed at its concurrency cap for the whole queue timeout"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class Backend:
+    """One provider plus its load and circuit-breaker state"""
+
+    def __init__(self, provider, fallback=False, failure_threshold=3, reset_timeout=30, max_concurrent=0):
+        self.provider = provider
+        self.fallback = fallback
+        self.max_concurrent = max_concurrent  # 0 = unlimited
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.outstanding = 0
+        self.failures = 0
+        self.state = CLOSED
+        self.opened_at = None
+        self.healthy = True
+        self._lock = threading.Lock()
+
+    @property
+    def label(self):
+        return self.provider.label
+
+    def available(self, now=None, ignore_health=False):
+        """Can take a request; an open circuit lets one trial through after reset_timeout"""
+        with self._lock:
+            if not (self.healthy or ignore_health) or self._full():
+                return False
+            if self.state == OPEN:
+                return (now or time.monotonic()) - self.opened_at >= self.reset_timeout
+            if self.state == HALF_OPEN:
+                return self.outstanding == 0
+            return True
+
+    def saturated(self):
+        with self._lock:
+            return self._full()
+
+    def _full(self):
+        return bool(self.max_concurrent) and self.outstanding >= self.max_concurrent
+
+    def acquire(self):
+        """Take a slot; False if another request took the last one first"""
+        with self._lock:
+            if self._full():
+                return False
+            if self.state == OPEN:
+                self.state = HALF_OPEN
+            self.outstanding += 1
+            metrics.set('llm_backend_outstanding', self.outstanding, backend=self.label)
+            return True
+
+    def release(self, ok):
+        with self._lock:
+            self.outstanding -= 1
+            metrics.set('llm_backend_outstanding', self.outstanding, backend=self.label)
+            if ok:
+                self.failures = 0
+                self.state = CLOSED
+                return
+            self.failures += 1
+            metrics.inc('llm_backend_failures_total', backend=self.label)
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"⚠️  Circuit opened for {self.label} after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def set_healthy(self, healthy):
+        with self._lock:
+            self.healthy = healthy
+            if healthy and self.state == OPEN:
+                # Passed a health check: let a trial request through right away
+                self.opened_at -= self.reset_timeout
+        metrics.set('llm_backend_up', 1 if healthy else 0, backend=self.label)
+
+class LLMRouter:
+    """Routes each generation to the least busy available backend, failing over on errors"""
+
+    def __init__(self, backends, section_models=None, health_check_interval=30, coalesce=True,
+                 queue_timeout=30):
+        self.backends = backends
+        self.section_models = section_models or {}
+        self.health_check_interval = health_check_interval
+        # Seconds a request waits for a slot while every backend is at max_concurrent
+        self.queue_timeout = queue_timeout
+        # Identical concurrent prompts share one upstream call; a joiner waits
+        # at most as long as the leader could take trying every backend
+        self.inflight = SingleFlight(
+            on_shared=lambda key: metrics.inc('llm_coalesced_requests_total'),
+            timeout=queue_timeout + sum(b.provider.timeout for b in backends)) if coalesce else None
+        self._last_health_check = time.monotonic()
+        self._checking = threading.Lock()
+        self._turn = 0
+        # Called with one dict per call (see app/services/call_log.py)
+        self.call_log = None
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build from app config
+
+        LLM_PROVIDER selects the primary provider; for Ollama every URL in
+        the comma-separated OLLAMA_BASE_URL becomes its own backend.
+        LLM_FALLBACK_PROVIDER is only used while no primary is available.
+        """
+        options = dict(failure_threshold=config.get('LLM_CIRCUIT_FAILURES', 3),
+                       reset_timeout=config.get('LLM_CIRCUIT_RESET_SECONDS', 30),
+                       max_concurrent=config.get('LLM_BACKEND_MAX_CONCURRENT', 0))
+        primary = config.get('LLM_PROVIDER', 'ollama')
+        urls = [None]
+        if primary == 'ollama':
+            urls = _split(config.get('OLLAMA_BASE_URL', 'http://localhost:11434'))
+
+        backends = [Backend(create_provider(primary, config, url), **options) for url in urls]
+        fallback = config.get('LLM_FALLBACK_PROVIDER')
+        if fallback:
+            try:
+                # LLM_MODEL names a model of the primary provider
+                provider = create_provider(fallback, dict(config, LLM_MODEL=config.get('LLM_FALLBACK_MODEL')))
+                backends.append(Backend(provider, fallback=True, **options))
+            except Exception as e:
+                print(f"⚠️  Warning: LLM fallback '{fallback}' unavailable: {e}")
+
+        return cls(backends, parse_section_models(config.get('LLM_SECTION_MODELS')),
+                   config.get('LLM_HEALTH_CHECK_INTERVAL', 30), config.get('LLM_COALESCE', True),
+                   config.get('LLM_BACKEND_QUEUE_SECONDS', 30))
+
+    def health_check(self):
+        """Ping every backend and take unreachable ones out of rotation"""
+        for backend in self.backends:
+            healthy = backend.provider.ping()
+            if not healthy and backend.healthy:
+                print(f"⚠️  Warning: {backend.label} failed its health check")
+            backend.set_healthy(healthy)
+        self._last_health_check = time.monotonic()
+
+    def _maybe_health_check(self):
+        """Refresh health in the background once the interval has passed"""
+        if not self.health_check_interval:
+            return
+        if time.monotonic() - self._last_health_check < self.health_check_interval:
+            return
+        if not self._checking.acquire(blocking=False):
+            return
+        self._last_health_check = time.monotonic()
+
+        def run():
+            try:
+                self.health_check()
+            finally:
+                self._checking.release()
+
+        # A green thread when threading is monkey-patched
+        threading.Thread(target=run, name='llm-health-check', daemon=True).start()
+
+    def candidates(self):
+        """Available backends in the order to try them: primaries by load, then fallbacks"""
+        self._maybe_health_check()
+        now = time.monotonic()
+        self._turn += 1
+        count = len(self.backends)
+        # Rotate before sorting so idle backends share ties round-robin
+        rotated = [self.backends[(self._turn + i) % count] for i in range(count)]
+        available = [b for b in rotated if b.available(now)]
+        if not available:
+            # Health checks can be stale: rather try any backend whose circuit allows it
+            available = [b for b in rotated if b.available(now, ignore_health=True)]
+        return sorted(available, key=lambda b: (b.fallback, b.outstanding))
+
+    def _saturated(self):
+        return any(b.saturated() for b in self.backends)
+
+    def _wait_for_capacity(self):
+        """Candidates, waiting up to queue_timeout while every backend is at its cap"""
+        deadline = time.monotonic() + self.queue_timeout
+        backends = self.candidates()
+        while not backends and self._saturated() and time.monotonic() < deadline:
+            time.sleep(CAPACITY_POLL_SECONDS)
+            backends = self.candidates()
+        return backends
+
+    async def _await_capacity(self):
+        deadline = time.monotonic() + self.queue_timeout
+        backends = self.candidates()
+        while not backends and self._saturated() and time.monotonic() < deadline:
+            await asyncio.sleep(CAPACITY_POLL_SECONDS)
+            backends = self.candidates()
+        return backends
+
+    def primary_model(self, section=None):
+        """Model a request for section is sent to when a primary backend serves it"""
+        if section in self.section_models:
+            return self.section_models[section]
+        return next((b.provider.model for b in self.backends if not b.fallback),
+                    self.backends[0].provider.model)
+
+    def model_for(self, backend, section):
+        """Section-specific model, which only applies to the primary provider"""
+        if backend.fallback or section not in self.section_models:
+            return backend.provider.model
+        return self.section_models[section]
+
+    def cache_key(self, prompt, max_tokens, section=None, prompt_version=None):
+        """
+        Everything that shapes the output: requested model, prompt template
+        version, rendered prompt and parameters (the backend is chosen per call)
+        """
+        return (self.section_models.get(section), prompt_version, prompt, max_tokens)
+
+    def generate(self, prompt, max_tokens, section=None, prompt_version=None, user_id=None, schema=None):
+        """Blocking generation; concurrent identical requests share one call (schema asks for JSON)"""
+        info = dict(section=section, prompt_version=prompt_version, user_id=user_id, schema=schema)
+        if self.inflight is None:
+            return self._generate(prompt, max_tokens, info)
+        start, led = time.perf_counter(), []
+
+        def lead():
+            led.append(True)
+            return self._generate(prompt, max_tokens, info)
+
+        text = self.inflight.do(self.cache_key(prompt, max_tokens, section, prompt_version), lead)
+        if not led:
+            self._log_shared(start, info)
+        return text
+
+    async def agenerate(self, prompt, max_tokens, section=None, prompt_version=None, user_id=None,
+                        schema=None):
+        """Awaitable version of generate()"""
+        info = dict(section=section, prompt_version=prompt_version, user_id=user_id, schema=schema)
+        if self.inflight is None:
+            return await self._agenerate(prompt, max_tokens, info)
+        start, led = time.perf_counter(), []
+
+        def lead():
+            led.append(True)
+            return self._agenerate(prompt, max_tokens, info)
+
+        text = await self.inflight.ado(self.cache_key(prompt, max_tokens, section, prompt_version), lead)
+        if not led:
+            self._log_shared(start, info)
+        return text
+
+    def _generate(self, prompt, max_tokens, info):
+        """Generation on the best backend, trying the next one on failure"""
+        errors = []
+        for backend in self._wait_for_capacity():
+            model = self.model_for(backend, info['section'])
+            if not backend.acquire():
+                continue
+            start = time.perf_counter()
+            try:
+                text, usage = backend.provider.generate(prompt, max_tokens, model=model,
+                                                        **_output(info))
+            except Exception as e:
+                backend.release(ok=False)
+                self._record_error(backend, model, start, info, e)
+                errors.append(e)
+                continue
+            backend.release(ok=True)
+            self._record(backend, model, start, info, prompt, text, usage)
+            return text
+        raise self._exhausted(errors)
+
+    async def _agenerate(self, prompt, max_tokens, info):
+        errors = []
+        for backend in await self._await_capacity():
+            model = self.model_for(backend, info['section'])
+            if not backend.acquire():
+                continue
+            start = time.perf_counter()
+            try:
+                text, usage = await backend.provider.agenerate(prompt, max_tokens, model=model,
+                                                               **_output(info))
+            except Exception as e:
+                backend.release(ok=False)
+                self._record_error(backend, model, start, info, e)
+                errors.append(e)
+                continue
+            backend.release(ok=True)
+            self._record(backend, model, start, info, prompt, text, usage)
+            return text
+        raise self._exhausted(errors)
+
+    async def astream(self, prompt, max_tokens, section=None, prompt_version=None, user_id=None):
+        """
+        Stream from the best backend
+
+        Fails over only until the first chunk has been sent; after that an
+        error is raised to the caller.
+        """
+        info = dict(section=section, prompt_version=prompt_version, user_id=user_id)
+        errors = []
+        for backend in await self._await_capacity():
+            model = self.model_for(backend, section)
+            if not backend.acquire():
+                continue
+            start = time.perf_counter()
+            chunks = []
+            try:
+                async for chunk in backend.provider.astream(prompt, max_tokens, model=model):
+                    chunks.append(chunk)
+                    yield chunk
+            except Exception as e:
+                backend.release(ok=False)
+                self._record_error(backend, model, start, info, e)
+                if chunks:
+                    raise
+                errors.append(e)
+                continue
+            backend.release(ok=True)
+            self._record(backend, model, start, info, prompt, ''.join(chunks), {})
+            return
+        raise self._exhausted(errors)
+
+    def _record(self, backend, model, start, info, prompt, text, usage):
+        """Metrics and call log for a successful call; local estimates when the backend reports no usage"""
+        elapsed = time.perf_counter() - start
+        prompt_tokens = usage.get('prompt_tokens') or estimate_tokens(prompt, model)
+        completion_tokens = usage.get('completion_tokens') or estimate_tokens(text, model)
+        load_seconds = usage.get('load_seconds')
+        cold = bool(load_seconds and load_seconds >= COLD_START_SECONDS)
+        record_llm_call(backend.provider.name, model, elapsed,
+                        prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                        load_seconds=load_seconds)
+        self._log(info, backend=backend, model=model, elapsed=elapsed, prompt_tokens=prompt_tokens,
+                  completion_tokens=completion_tokens, cold_start=cold)
+        print(f"🔢 {backend.label} {model}: {prompt_tokens} tokens in, "
+              f"{completion_tokens} out, {elapsed:.1f}s"
+              + (f" (cold start, {load_seconds:.1f}s load)" if cold else ''))
+
+    def _record_error(self, backend, model, start, info, error):
+        elapsed = time.perf_counter() - start
+        record_llm_call(backend.provider.name, model, elapsed, status='error')
+        # Providers wrap transport errors; report the underlying class
+        cause = error.__cause__ or error.__context__ or error
+        self._log(info, backend=backend, model=model, elapsed=elapsed, status='error',
+                  error_class=type(cause).__name__)
+
+    def _log_shared(self, start, info):
+        """A caller served by an identical in-flight call"""
+        self._log(info, model=self.primary_model(info['section']),
+                  elapsed=time.perf_counter() - start, cache_hit=True)
+
+    def _log(self, info, backend=None, model=None, elapsed=0.0, **fields):
+        if self.call_log is None:
+            return
+        self.call_log(dict(
+            fields,
+            user_id=info.get('user_id'),
+            section=info.get('section'),
+            prompt_version=info.get('prompt_version'),
+            provider=backend.provider.name if backend else None,
+            backend=backend.label if backend else None,
+            model=model,
+            latency_ms=elapsed * 1000
+        ))
+
+    def _exhausted(self, errors):
+        if len(errors) == 1:
+            return errors[0]
+        if errors:
+            return Exception("All LLM backends failed: " + "; ".join(str(e) for e in errors))
+        if self._saturated():
+            metrics.inc('llm_backend_busy_total')
+            return BackendsBusy("All LLM backends are busy, please retry shortly",
+                                retry_after=self.queue_timeout or 5)
+        return NoBackendAvailable("No LLM backend available (all unhealthy or circuit open)")
+
+    def status(self):
+        """Per-backend state, for the dashboard / debugging"""
+        return [{
+            'backend': b.label,
+            'fallback': b.fallback,
+            'healthy': b.healthy,
+            'circuit': b.state,
+            'outstanding': b.outstanding,
+            'max_concurrent': b.max_concurrent,
+            'failures': b.failures,
+        } for b in self.backends]
+
+def _output(info):
+    """Only pass schema when there is one, so providers without JSON support keep working"""
+    return {'schema': info['schema']} if info.get('schema') else {}
+
+def _split(value):
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+def parse_section_models(value):
+    """'abstract=phi3:mini,literature_review=llama3:70b' -> {section: model}"""
+    models = {}
+    for item in _split(value):
+        section, _, model = item.partition('=')
+        if section.strip() and model.strip():
+            models[section.strip()] = model.strip()
+    return models
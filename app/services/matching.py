@@ -0,0 +1,633 @@
+"""
+ResearchHub AI - Researcher matching
+Profiles (research domains, current interests, bio) are turned into
+hashed TF-IDF vectors kept in one contiguous NumPy matrix, so the best
+matches for a user are a single matrix-vector product instead of a Python
+loop over every researcher. Domain tags also contribute their acronym and
+known expansions, so "ML" matches "Machine Learning". Profile edits update
+the matrix in place when their transaction commits.
+
+For large directories an approximate nearest-neighbour index (HNSW, see
+app/services/ann.py) answers top-k instead of the exact scan. The index is
+saved under the instance path and brought up to date incrementally on
+startup, so workers don't rebuild the graph from scratch.
+
+NumPy is imported on first use to keep it off the cold-start path.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from app.services.ann import create_ann, load_ann, save_ann
+
+DEFAULT_DIM = 256
+# Similarity below this is noise from hash collisions
+DEFAULT_MIN_SCORE = 0.05
+# Rebuild the ANN graph once this share of its nodes are tombstones
+ANN_MAX_DELETED = 0.25
+
+# How much a term counts depending on where in the profile it appears
+FIELD_WEIGHTS = {'domains': 3.0, 'interests': 2.0, 'bio': 1.0}
+
+STOPWORDS = frozenset('''
+a about an and are as at be by for from has have i in into is it its my of on or our
+that the their this to using we with work working research researcher currently
+'''.split())
+
+# Common abbreviations in research domains, matched both ways
+ABBREVIATIONS = {
+    'ai': 'artificial intelligence',
+    'ml': 'machine learning',
+    'dl': 'deep learning',
+    'rl': 'reinforcement learning',
+    'nlp': 'natural language processing',
+    'cv': 'computer vision',
+    'hci': 'human computer interaction',
+    'iot': 'internet of things',
+    'llm': 'large language models',
+    'gnn': 'graph neural networks',
+    'hpc': 'high performance computing',
+    'nlu': 'natural language understanding',
+    'bci': 'brain computer interface',
+    'qc': 'quantum computing',
+}
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#]*")
+_PHRASES = re.compile(r"[,;\n]+")
+
+def _stem(word):
+    """Plural -> singular, enough to match 'networks' with 'network'"""
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'is', 'us')):
+        return word[:-1]
+    return word
+
+def _words(text):
+    return [_stem(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+def _add_phrase(features, phrase, weight):
+    """Words, bigrams and the acronym of a tag-like phrase"""
+    words = _words(phrase)
+    if len(words) == 1 and words[0] in ABBREVIATIONS:
+        expanded = _words(ABBREVIATIONS[words[0]])
+        _add_words(features, expanded, weight)
+        words = words + expanded
+    else:
+        _add_words(features, words, weight)
+    if 2 <= len(words) <= 5:
+        features['a:' + ''.join(w[0] for w in words)] += weight
+    elif len(words) == 1 and len(words[0]) <= 5 and words[0].isalpha():
+        # Might itself be an acronym ("ML", "HCI")
+        features['a:' + words[0]] += weight
+
+def _add_words(features, words, weight):
+    for word in words:
+        features['w:' + word] += weight
+    for first, second in zip(words, words[1:]):
+        features[f'b:{first} {second}'] += weight
+
+def profile_features(domains, interests, bio):
+    """{feature: weight} for a profile; domain tags weigh most, bio least"""
+    features = Counter()
+    for field, text in (('domains', domains), ('interests', interests)):
+        for phrase in _PHRASES.split(text or ''):
+            if phrase.strip():
+                _add_phrase(features, phrase, FIELD_WEIGHTS[field])
+    _add_words(features, _words(bio or ''), FIELD_WEIGHTS['bio'])
+    return features
+
+def _fingerprint(domains, interests, bio):
+    """Detects profiles that changed since the index was saved"""
+    return zlib.crc32('\x1f'.join((domains or '', interests or '', bio or '')).encode('utf-8'))
+
+def _bucket(feature, dim):
+    """Hashed column and sign (signed hashing keeps collisions unbiased)"""
+    h = zlib.crc32(feature.encode('utf-8'))
+    return h % dim, (1.0 if h & 0x80000000 else -1.0)
+
+class ProfileIndex:
+    """
+    Unit-length profile vectors for every active researcher
+
+    Rows are kept contiguous: removing a profile moves the last row into
+    its place. IDF weights are fixed when the index is built; profiles added
+    afterwards use them (unseen terms get the highest weight). When an ANN
+    index is attached, top_k() is answered by it and every change is
+    applied to both.
+    """
+
+    def __init__(self, dim=DEFAULT_DIM, idf=None, default_idf=1.0, min_score=DEFAULT_MIN_SCORE,
+                 idf_profiles=0):
+        import numpy as np
+
+        self.dim = dim
+        self.idf = idf or {}
+        self.default_idf = default_idf
+        self.min_score = min_score
+        # Number of profiles the IDF weights were computed from
+        self.idf_profiles = idf_profiles
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.fingerprints = np.zeros(0, dtype=np.uint32)
+        self.rows = {}  # user_id -> row
+        self.size = 0
+        self.ann = None
+        self._ann_changes = None  # edits made while an ANN index is being built
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, profiles, dim=DEFAULT_DIM, min_score=DEFAULT_MIN_SCORE):
+        """Index from (user_id, domains, interests, bio) rows"""
+        profiles = [(user_id, profile_features(*texts), _fingerprint(*texts)) for user_id, *texts in profiles]
+        df = Counter()
+        for _, features, _ in profiles:
+            df.update(features.keys())
+        count = len(profiles)
+        idf = {feature: math.log((1 + count) / (1 + n)) + 1 for feature, n in df.items()}
+        index = cls(dim, idf, math.log(1 + count) + 1, min_score, idf_profiles=count)
+        index._reserve(count)
+        for user_id, features, fingerprint in profiles:
+            vector = index._vector(features)
+            if vector is not None:
+                index._put(user_id, vector, fingerprint)
+        return index
+
+    def __len__(self):
+        return self.size
+
+    def vector(self, domains, interests, bio):
+        """Query vector for a profile, None if it has no usable terms"""
+        return self._vector(profile_features(domains, interests, bio))
+
+    def _vector(self, features):
+        import numpy as np
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in features.items():
+            column, sign = _bucket(feature, self.dim)
+            vector[column] += sign * weight * self.idf.get(feature, self.default_idf)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def upsert(self, user_id, domains, interests, bio):
+        """Add or replace a profile (removes it if it has no usable terms)"""
+        vector = self.vector(domains, interests, bio)
+        with self._lock:
+            if vector is None:
+                self._remove(user_id)
+            else:
+                self._put(user_id, vector, _fingerprint(domains, interests, bio))
+
+    def remove(self, user_id):
+        with self._lock:
+            self._remove(user_id)
+
+    def sync(self, profiles):
+        """
+        Bring the index up to date with (user_id, domains, interests, bio)
+        rows, re-embedding only changed profiles; returns how many changed
+        """
+        seen, changed = set(), 0
+        for user_id, *texts in profiles:
+            seen.add(user_id)
+            row = self.rows.get(user_id)
+            if row is not None and self.fingerprints[row] == _fingerprint(*texts):
+                continue
+            self.upsert(user_id, *texts)
+            changed += 1
+        for user_id in set(self.rows) - seen:
+            self.remove(user_id)
+            changed += 1
+        return changed
+
+    def build_ann(self, kind='auto', **options):
+        """
+        Build an ANN index over the current profiles and switch top_k() to it
+
+        Slow for the pure-Python HNSW, so run it off the request path; edits
+        made meanwhile are replayed before the index is attached.
+        """
+        with self._lock:
+            ids = self.ids[:self.size].copy()
+            matrix = self.matrix[:self.size].copy()
+            self._ann_changes = {}
+        started = time.perf_counter()
+        ann = create_ann(kind, self.dim, **options)
+        ann.add_many(ids, matrix)
+        with self._lock:
+            for user_id, vector in self._ann_changes.items():
+                if vector is None:
+                    ann.remove(user_id)
+                else:
+                    ann.add(user_id, vector)
+            self._ann_changes = None
+            self.ann = ann
+        print(f"🧭 Built {ann.kind} index over {len(ann)} profiles in {time.perf_counter() - started:.1f}s")
+        return ann
+
+    def save(self, directory):
+        """Write the vectors, IDF weights and any ANN index to directory"""
+        import numpy as np
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, 'profiles')
+        # Unique per writer: other workers may be saving to the same directory
+        tmp = f'{path}.{os.getpid()}-{uuid.uuid4().hex}.tmp.npz'
+        with self._lock:
+            try:
+                np.savez(tmp, matrix=self.matrix[:self.size], ids=self.ids[:self.size],
+                         fingerprints=self.fingerprints[:self.size],
+                         idf=np.array(json.dumps(self.idf)),
+                         params=np.array([self.dim, self.default_idf, self.min_score, self.idf_profiles]))
+                os.replace(tmp, path + '.npz')
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            if self.ann is not None:
+                save_ann(self.ann, os.path.join(directory, 'ann'))
+
+    @classmethod
+    def load(cls, directory):
+        """The index saved by save(), or None if there is none"""
+        import numpy as np
+
+        path = os.path.join(directory, 'profiles.npz')
+        if not os.path.exists(path):
+            return None
+        data = np.load(path)
+        dim, default_idf, min_score, idf_profiles = data['params'].tolist()
+        index = cls(int(dim), json.loads(str(data['idf'])), default_idf, min_score, int(idf_profiles))
+        index.size = len(data['ids'])
+        index.matrix = np.array(data['matrix'], dtype=np.float32)
+        index.ids = np.array(data['ids'], dtype=np.int64)
+        index.fingerprints = np.array(data['fingerprints'], dtype=np.uint32)
+        index.rows = {user_id: row for row, user_id in enumerate(index.ids.tolist())}
+        ann = load_ann(os.path.join(directory, 'ann'))
+        if ann is not None and ann.dim == index.dim and set(ann.node_of) == set(index.rows):
+            index.ann = ann
+        return index
+
+    def _reserve(self, capacity):
+        import numpy as np
+
+        if capacity <= len(self.matrix):
+            return
+        capacity = max(capacity, 2 * len(self.matrix), 64)
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:self.size] = self.matrix[:self.size]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self.size] = self.ids[:self.size]
+        fingerprints = np.zeros(capacity, dtype=np.uint32)
+        fingerprints[:self.size] = self.fingerprints[:self.size]
+        self.matrix, self.ids, self.fingerprints = matrix, ids, fingerprints
+
+    def _put(self, user_id, vector, fingerprint=0):
+        row = self.rows.get(user_id)
+        if row is None:
+            self._reserve(self.size + 1)
+            row = self.rows[user_id] = self.size
+            self.ids[row] = user_id
+            self.size += 1
+        self.matrix[row] = vector
+        self.fingerprints[row] = fingerprint
+        self._ann_update(user_id, vector)
+
+    def _remove(self, user_id):
+        row = self.rows.pop(user_id, None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.ids[row] = self.ids[last]
+            self.fingerprints[row] = self.fingerprints[last]
+            self.rows[int(self.ids[row])] = row
+        self.size = last
+        self._ann_update(user_id, None)
+
+    def _ann_update(self, user_id, vector):
+        if self._ann_changes is not None:
+            self._ann_changes[user_id] = vector
+        if self.ann is None:
+            return
+        if vector is None:
+            self.ann.remove(user_id)
+        else:
+            self.ann.add(user_id, vector)
+
+    def top_k(self, vector, k, exclude=()):
+        """[(user_id, score)] of the k most similar profiles, best first"""
+        if vector is None or not self.size or k <= 0:
+            return []
+        if self.ann is None:
+            return self.exact_top_k(vector, k, exclude)
+        with self._lock:
+            found = self.ann.search(vector, k, exclude)
+        return [(user_id, score) for user_id, score in found if score >= self.min_score]
+
+    def exact_top_k(self, vector, k, exclude=()):
+        """top_k() by scanning every profile, ignoring any ANN index"""
+        import numpy as np
+
+        if vector is None or not self.size or k <= 0:
+            return []
+        with self._lock:
+            scores = self.matrix[:self.size] @ vector
+            for user_id in exclude:
+                row = self.rows.get(user_id)
+                if row is not None:
+                    scores[row] = -np.inf
+            ids = self.ids[:self.size].copy()
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(int(ids[i]), float(scores[i])) for i in best if scores[i] >= self.min_score]
+
+    def top_k_many(self, user_ids, k):
+        """
+        {user_id: [(user_id, score)]} for every indexed user in user_ids,
+        from a single matrix product (exact, users never match themselves)
+        """
+        import numpy as np
+
+        with self._lock:
+            users = [user_id for user_id in user_ids if user_id in self.rows]
+            rows = np.array([self.rows[user_id] for user_id in users], dtype=np.int64)
+            if not users:
+                return {}
+            scores = self.matrix[rows] @ self.matrix[:self.size].T
+            ids = self.ids[:self.size].copy()
+        scores[np.arange(len(rows)), rows] = -np.inf
+        k = min(k, scores.shape[1] - 1)
+        if k <= 0:
+            return {user_id: [] for user_id in users}
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-top, axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1).tolist()
+        top = np.take_along_axis(top, order, axis=1).tolist()
+        return {user_id: [(int(ids[col]), score) for col, score in zip(best[i], top[i])
+                          if score >= self.min_score]
+                for i, user_id in enumerate(users)}
+
+    def similarities(self, vectors):
+        """(user ids, best similarity of each profile to any of vectors)"""
+        import numpy as np
+
+        with self._lock:
+            scores = self.matrix[:self.size] @ np.asarray(vectors, dtype=np.float32).T
+            ids = self.ids[:self.size].copy()
+        return ids, scores.max(axis=1) if scores.size else np.zeros(len(ids), dtype=np.float32)
+
+    def scores(self, vector, user_ids):
+        """{user_id: score} for the given researchers (0 for unknown ones)"""
+        if vector is None:
+            return {user_id: 0.0 for user_id in user_ids}
+        with self._lock:
+            rows = [self.rows.get(user_id) for user_id in user_ids]
+            known = [row for row in rows if row is not None]
+            values = iter((self.matrix[known] @ vector).tolist()) if known else iter(())
+        return {user_id: (next(values) if row is not None else 0.0)
+                for user_id, row in zip(user_ids, rows)}
+
+def measure_recall(index, queries, k=10):
+    """
+    Recall@k of the index's ANN search against the exact scan, with the
+    latency of both, over a list of query vectors
+    """
+    def timed(search):
+        results, latencies = [], []
+        for vector in queries:
+            started = time.perf_counter()
+            results.append({user_id for user_id, _ in search(vector, k)})
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        return results, latencies
+
+    exact, exact_ms = timed(index.exact_top_k)
+    approx, ann_ms = timed(index.top_k)
+    hits = sum(len(a & e) for a, e in zip(approx, exact))
+    return {
+        'queries': len(queries),
+        'k': k,
+        'recall': round(hits / max(sum(len(e) for e in exact), 1), 4),
+        'ann_p50_ms': round(_percentile(ann_ms, 50), 3),
+        'ann_p95_ms': round(_percentile(ann_ms, 95), 3),
+        'exact_p50_ms': round(_percentile(exact_ms, 50), 3),
+        'exact_p95_ms': round(_percentile(exact_ms, 95), 3),
+    }
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))] if ordered else 0.0
+
+# ---------------------------------------------------------------------------
+# Per-app index, kept current by session events
+# ---------------------------------------------------------------------------
+
+_build_lock = threading.Lock()
+_PROFILE_FIELDS = ('research_domains', 'current_interests', 'bio', 'is_active')
+
+def load_profiles():
+    """(id, domains, interests, bio) of every active researcher"""
+    from app import db
+    from app.models import User
+
+    return db.session.query(User.id, User.research_domains, User.current_interests, User.bio).filter(
+        User.is_active == True).yield_per(5000)
+
+def build_index(config):
+    return ProfileIndex.build(load_profiles(), dim=config.get('MATCHING_DIM', DEFAULT_DIM),
+                              min_score=config.get('MATCHING_MIN_SCORE', DEFAULT_MIN_SCORE))
+
+def index_dir(app):
+    """Where the index is persisted, None if MATCHING_PERSIST is off"""
+    if not app.config.get('MATCHING_PERSIST', True):
+        return None
+    return app.config.get('MATCHING_INDEX_DIR') or os.path.join(app.instance_path, 'matching')
+
+def open_index(app):
+    """
+    The saved index brought up to date with the database, or a fresh build
+
+    Falls back to a full build when there is nothing saved, the settings
+    changed, or the directory grew or shrank too much for the saved IDF
+    weights to still be representative.
+    """
+    directory = index_dir(app)
+    try:
+        index = ProfileIndex.load(directory) if directory else None
+    except Exception as e:
+        print(f"⚠️  Could not load the saved profile index: {e}")
+        index = None
+    if index is None or index.dim != app.config.get('MATCHING_DIM', DEFAULT_DIM):
+        return build_index(app.config)
+    index.min_score = app.config.get('MATCHING_MIN_SCORE', DEFAULT_MIN_SCORE)
+    index.sync(load_profiles())
+    if not _idf_current(index):
+        return build_index(app.config)
+    return index
+
+def _idf_current(index):
+    return 0.8 * index.idf_profiles <= len(index) <= 1.25 * max(index.idf_profiles, 1)
+
+def _wants_ann(app, index):
+    return (app.config.get('MATCHING_ANN', 'auto') != 'off'
+            and len(index) >= app.config.get('MATCHING_ANN_MIN_PROFILES', 100000))
+
+def maintain_index(app, index):
+    """
+    Attach, rebuild or drop the ANN index as the directory size calls for,
+    then persist everything (slow with the pure-Python HNSW: run in the background)
+    """
+    if _wants_ann(app, index):
+        if index.ann is None or index.ann.deleted_ratio > ANN_MAX_DELETED:
+            index.build_ann(app.config.get('MATCHING_ANN', 'auto'))
+    else:
+        index.ann = None
+    directory = index_dir(app)
+    if directory:
+        index.save(directory)
+
+def _in_background(app, work, name):
+    """Run work(app) on a thread, holding _build_lock (which the caller acquired)"""
+    def run():
+        try:
+            with app.app_context():
+                work(app)
+        except Exception as e:
+            print(f"⚠️  Profile index {name} failed: {e}")
+        finally:
+            _build_lock.release()
+
+    threading.Thread(target=run, name=f'profile-index-{name}', daemon=True).start()
+
+def _maintain(app):
+    maintain_index(app, app.extensions['profile_index'])
+
+def _refresh(app):
+    index = app.extensions['profile_index']
+    index.sync(load_profiles())
+    if not _idf_current(index):
+        index = build_index(app.config)
+    maintain_index(app, index)
+    index.built_at = time.monotonic()
+    app.extensions['profile_index'] = index
+
+def get_profile_index():
+    """
+    The current app's ProfileIndex, loaded or built on first use
+
+    Synced with the database in the background every
+    MATCHING_REFRESH_SECONDS to pick up edits made by other worker processes
+    (a full rebuild refreshes IDF weights once the directory has changed size
+    by a quarter). The ANN index is built and the result saved in the
+    background too.
+    """
+    from flask import current_app
+    app = current_app._get_current_object()
+    index = app.extensions.get('profile_index')
+    if index is None:
+        with _build_lock:
+            index = app.extensions.get('profile_index')
+            if index is None:
+                started = time.perf_counter()
+                index = app.extensions['profile_index'] = open_index(app)
+                print(f"🧭 Indexed {len(index)} researcher profiles in {time.perf_counter() - started:.2f}s")
+        if (index_dir(app) or _wants_ann(app, index)) and _build_lock.acquire(blocking=False):
+            _in_background(app, _maintain, 'maintenance')
+        return index
+
+    refresh = app.config.get('MATCHING_REFRESH_SECONDS', 600)
+    if refresh and time.monotonic() - index.built_at > refresh and _build_lock.acquire(blocking=False):
+        index.built_at = time.monotonic()  # one refresh at a time
+        _in_background(app, _refresh, 'refresh')
+    return index
+
+def _collect_profile_changes(session, flush_context):
+    """Remember profile edits in this transaction (applied after commit)"""
+    from sqlalchemy import inspect
+    from app.models import User
+
+    changes = session.info.setdefault('profile_changes', {})
+    for user in session.new | session.dirty:
+        if not isinstance(user, User):
+            continue
+        state = inspect(user)
+        if user in session.dirty and not any(state.attrs[f].history.has_changes() for f in _PROFILE_FIELDS):
+            continue
+        changes[user.id] = (user.research_domains, user.current_interests, user.bio) if user.is_active else None
+    for user in session.deleted:
+        if isinstance(user, User):
+            changes[user.id] = None
+
+def _apply_profile_changes(session):
+    from flask import current_app, has_app_context
+
+    changes = session.info.pop('profile_changes', None)
+    if not changes or not has_app_context():
+        return
+    index = current_app.extensions.get('profile_index')
+    if index is not None:  # otherwise built from the database on first use
+        for user_id, profile in changes.items():
+            if profile is None:
+                index.remove(user_id)
+            else:
+                index.upsert(user_id, *profile)
+    if current_app.config.get('SUGGESTIONS_PRECOMPUTED', True):
+        from app.services.suggestions import get_refresher
+        get_refresher(current_app._get_current_object()).record(changes)
+
+def _discard_profile_changes(session, previous_transaction=None):
+    session.info.pop('profile_changes', None)
+
+_listening = False
+
+def init_app(app):
+    """Keep every app's index current as profiles are created, edited and deleted"""
+    global _listening
+    if _listening:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    event.listen(Session, 'after_flush', _collect_profile_changes)
+    event.listen(Session, 'after_commit', _apply_profile_changes)
+    event.listen(Session, 'after_soft_rollback', _discard_profile_changes)
+    _listening = True
+
+# ---------------------------------------------------------------------------
+# Queries used by the dashboard and discovery pages
+# ---------------------------------------------------------------------------
+
+def common_tags(user, other):
+    mine = {tag.lower() for tag in user.get_domains_list()}
+    return [tag for tag in other.get_domains_list() if tag.lower() in mine]
+
+def suggest_researchers(user, limit=10):
+    """[{'user', 'common_tags', 'score'}] for the researchers closest to user, best first"""
+    from app.models import User
+
+    index = get_profile_index()
+    vector = index.vector(user.research_domains, user.current_interests, user.bio)
+    best = index.top_k(vector, limit, exclude=(user.id,))
+    if not best:
+        return []
+    users = {u.id: u for u in User.query.filter(User.id.in_([user_id for user_id, _ in best]),
+                                                  User.is_active == True)}
+    return [{'user': users[user_id], 'common_tags': common_tags(user, users[user_id]), 'score': score}
+            for user_id, score in best if user_id in users]
+
+def rank_researchers(user, researchers):
+    """[{'user', 'common_tags', 'match_score'}] for researchers, most similar to user first"""
+    index = get_profile_index()
+    vector = index.vector(user.research_domains, user.current_interests, user.bio)
+    scores = index.scores(vector, [r.id for r in researchers])
+    ranked = [{'user': r, 'common_tags': common_tags(user, r), 'match_score': scores[r.id]}
+              for r in researchers]
+    ranked.sort(key=lambda item: item['match_score'], reverse=True)
+    return ranked
@@ -0,0 +1,95 @@
+"""
+ResearchHub AI - Model warm-up
+Loads the configured Ollama models in the background when the app starts
+and pings them during business hours so they stay resident (keep_alive),
+instead of the first user of the day paying a multi-second model load.
+"""
+import time
+from datetime import datetime
+from app.metrics import metrics
+
+# Defaults for ModelWarmer and unset config alike (same as config.py)
+KEEPWARM_HOURS = (8, 19)  # local hours, end exclusive
+KEEPWARM_DAYS = (0, 4)  # Monday=0
+KEEPWARM_INTERVAL = 600  # seconds
+
+def _parse_range(value, default):
+    """'8-19' -> (8, 19); empty -> default; tuples are taken as they are"""
+    if not value:
+        return default
+    if isinstance(value, (tuple, list)):
+        return tuple(value)
+    start, _, end = str(value).partition('-')
+    return int(start), int(end or start)
+
+class ModelWarmer:
+    """Warms every (backend, model) pair the router can send requests to"""
+
+    def __init__(self, router, interval=KEEPWARM_INTERVAL, hours=KEEPWARM_HOURS, days=KEEPWARM_DAYS):
+        self.router = router
+        self.interval = interval
+        self.hours = hours
+        self.days = days
+
+    @classmethod
+    def from_config(cls, router, config):
+        return cls(router,
+                   interval=config.get('LLM_KEEPWARM_INTERVAL', KEEPWARM_INTERVAL),
+                   # Set but empty: no keep-warm pings / every day
+                   hours=_parse_range(config.get('LLM_KEEPWARM_HOURS', KEEPWARM_HOURS), None),
+                   days=_parse_range(config.get('LLM_KEEPWARM_DAYS', KEEPWARM_DAYS), (0, 6)))
+
+    def targets(self):
+        """(backend, model) for every primary backend and model it may serve"""
+        models = {None} | set(self.router.section_models.values())
+        return [(backend, model) for backend in self.router.backends if not backend.fallback
+                for model in sorted(models, key=lambda m: m or '')]
+
+    def in_business_hours(self, now=None):
+        if not self.hours:
+            return False
+        now = now or datetime.now()
+        first_day, last_day = self.days
+        start, end = self.hours
+        return first_day <= now.weekday() <= last_day and start <= now.hour < end
+
+    def warm_all(self):
+        """Load every target model; failures are logged, never raised"""
+        for backend, model in self.targets():
+            name = model or backend.provider.model
+            try:
+                elapsed = backend.provider.warm(model)
+            except Exception as e:
+                print(f"⚠️  Warm-up of {name} on {backend.label} failed: {e}")
+                continue
+            if elapsed is None:
+                continue
+            metrics.inc('llm_warmups_total', provider=backend.provider.name, model=name)
+            metrics.observe('llm_model_load_seconds', elapsed, provider=backend.provider.name, model=name)
+            print(f"🔥 Warmed {name} on {backend.label} in {elapsed:.1f}s")
+
+    def run(self, sleep=time.sleep):
+        """Warm once now, then keep warm during business hours (never returns)"""
+        self.warm_all()
+        if not self.hours or not self.interval:
+            return
+        while True:
+            sleep(self.interval)
+            if self.in_business_hours():
+                self.warm_all()
+
+def start_model_warmup(app):
+    """Start the warm-up loop as a Socket.IO background task (thread or green thread)"""
+    from app import socketio
+    from app.services import get_ai_service
+
+    def task():
+        with app.app_context():
+            ai_service = get_ai_service()
+            if ai_service is None:
+                return
+            ai_service._initialize()
+            warmer = ModelWarmer.from_config(ai_service.router, app.config)
+        warmer.run(sleep=socketio.sleep)
+
+    socketio.start_background_task(task)
@@ -0,0 +1,147 @@
+"""
+ResearchHub AI - Prompt token budgeting
+Local token estimates per model, so prompts are trimmed to fit the context
+window and max_tokens is sized before the request is sent rather than
+failing (or being silently truncated) after a full round trip.
+"""
+import re
+
+# Context window (tokens) by model name prefix; the longest matching prefix wins
+CONTEXT_WINDOWS = {
+    'gpt-4o': 128000,
+    'gpt-4-turbo': 128000,
+    'gpt-4': 8192,
+    'gpt-3.5-turbo': 16385,
+    'mistral': 8192,
+    'mixtral': 32768,
+    'llama2': 4096,
+    'llama3': 8192,
+    'codellama': 16384,
+    'phi3': 4096,
+    'phi': 2048,
+    'gemma': 8192,
+    'qwen2': 32768,
+}
+DEFAULT_CONTEXT_WINDOW = 4096
+
+# Tokens kept free for chat templates / system prompt and estimate error
+SAFETY_MARGIN = 64
+MIN_OUTPUT_TOKENS = 256
+
+class PromptTooLong(ValueError):
+    """The untrimmable part of a prompt does not fit the model's context window"""
+
+_WORD = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_encodings = {}
+
+def context_window(model, override=None):
+    """Context window for model (override, e.g. LLM_CONTEXT_WINDOW, wins)"""
+    if override:
+        return int(override)
+    name = (model or '').split('/')[-1].lower()
+    matches = [prefix for prefix in CONTEXT_WINDOWS if name.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_WINDOW
+    return CONTEXT_WINDOWS[max(matches, key=len)]
+
+def _tiktoken_encoding(model):
+    """tiktoken encoding for OpenAI models if the package is installed"""
+    if model not in _encodings:
+        try:
+            import tiktoken
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except Exception:
+            _encodings[model] = None
+    return _encodings[model]
+
+def estimate_tokens(text, model=None):
+    """
+    Token count for text
+
+    Exact for OpenAI models when tiktoken is installed; otherwise a
+    word/punctuation estimate that errs on the high side for the
+    SentencePiece/BPE vocabularies of local models.
+    """
+    if not text:
+        return 0
+    if model and model.startswith('gpt-'):
+        encoding = _tiktoken_encoding(model)
+        if encoding is not None:
+            return len(encoding.encode(text))
+    pieces = _WORD.findall(text)
+    long_words = sum(1 for piece in pieces if len(piece) > 6)
+    return max(len(text) // 4, len(pieces) + long_words // 2)
+
+def trim_to_tokens(text, budget, model=None):
+    """Shorten text to about budget tokens, keeping its beginning and end"""
+    if estimate_tokens(text, model) <= budget:
+        return text
+    if budget <= 0:
+        return ''
+    words = text.split(' ')
+    # Scale by the observed tokens-per-word ratio, then keep head and tail
+    ratio = estimate_tokens(text, model) / max(1, len(words))
+    keep = max(1, int(budget / ratio) - 8)
+    head = words[:keep - keep // 3]
+    tail = words[len(words) - keep // 3:] if keep // 3 else []
+    omitted = len(words) - len(head) - len(tail)
+    return ' '.join(head) + f"\n[... {omitted} words omitted ...]\n" + ' '.join(tail)
+
+class PromptBudget:
+    """Token budget for one call against one model's context window"""
+
+    def __init__(self, model, context_window_override=None):
+        self.model = model
+        self.window = context_window(model, context_window_override)
+
+    def tokens(self, text):
+        return estimate_tokens(text, self.model)
+
+    def max_output(self, prompt, wanted, min_output=MIN_OUTPUT_TOKENS):
+        """
+        max_tokens for prompt: wanted, capped by what is left of the window
+
+        Raises PromptTooLong if less than min_output (or wanted, if smaller)
+        would be left.
+        """
+        available = self.window - self.tokens(prompt) - SAFETY_MARGIN
+        if available < min(min_output, wanted):
+            raise PromptTooLong(
+                f"Input is about {self.tokens(prompt)} tokens, too long for {self.model} "
+                f"({self.window}-token context window). Shorten it and try again.")
+        return min(wanted, available)
+
+    def fit(self, template, parts, wanted_output, min_output=MIN_OUTPUT_TOKENS, keep=()):
+        """
+        Render template.format(**parts), trimming parts until the prompt
+        leaves room for at least min_output tokens (wanted_output if possible)
+
+        Returns (prompt, max_tokens). The largest parts are trimmed first so
+        short fields such as the title survive intact; parts named in keep
+        are never trimmed, and PromptTooLong is raised if they cannot fit.
+        """
+        parts = dict(parts)
+        prompt = template.format(**parts)
+        reserve = min(wanted_output, max(min_output, self.window // 4))
+        over = self.tokens(prompt) + reserve + SAFETY_MARGIN - self.window
+        if over > 0:
+            sizes = {name: self.tokens(str(value)) for name, value in parts.items()
+                     if name not in keep}
+            # Water-filling: cap every part at the same size, so the largest
+            # parts are cut and parts under the cap are left alone
+            remaining = sum(sizes.values()) - over
+            cap = max(sizes.values(), default=0)
+            ordered = sorted(sizes.values())
+            for i, size in enumerate(ordered):
+                share = remaining // (len(ordered) - i)
+                if size > share:
+                    cap = share
+                    break
+                remaining -= size
+            for name, size in sizes.items():
+                if size > cap:
+                    # Leave room for the "[... omitted ...]" marker
+                    parts[name] = trim_to_tokens(str(parts[name]), cap - 12, self.model)
+            prompt = template.format(**parts)
+
+        return prompt, self.max_output(prompt, wanted_output, min_output)
@@ -0,0 +1,72 @@
+"""
+ResearchHub AI - Prompt templates
+Versioned string.Template prompts loaded once from app/prompts/*.txt.
+Section prompts keep their fixed instructions first and the paper details
+last, so the prefix stays identical across papers and providers can reuse
+their prompt cache.
+"""
+import os
+import string
+import threading
+
+PROMPT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'prompts')
+
+# Template name -> version. Bump the version whenever a prompt's wording
+# changes so cached generations keyed on it are not reused.
+VERSIONS = {
+    'context': 1,
+    'improve': 1,
+    'review': 1,
+    'sections/abstract': 1,
+    'sections/introduction': 1,
+    'sections/problem_statement': 1,
+    'sections/literature_review': 1,
+    'sections/methodology': 1,
+    'sections/results': 1,
+    'sections/conclusion': 1,
+    'sections/future_work': 1,
+    'sections/references': 1,
+}
+
+class PromptTemplate:
+    """A compiled prompt template"""
+
+    def __init__(self, name, version, text):
+        self.name = name
+        self.version = version
+        self.template = string.Template(text)
+
+    @property
+    def key(self):
+        """Identifies this exact prompt wording, e.g. 'sections/abstract@v1'"""
+        return f"{self.name}@v{self.version}"
+
+    def render(self, **fields):
+        return self.template.substitute(fields)
+
+    # PromptBudget.fit() renders templates with .format(**parts)
+    format = render
+
+_templates = None
+_lock = threading.Lock()
+
+def _load():
+    templates = {}
+    for name, version in VERSIONS.items():
+        with open(os.path.join(PROMPT_DIR, name + '.txt'), encoding='utf-8') as f:
+            templates[name] = PromptTemplate(name, version, f.read())
+    return templates
+
+def get_prompt(name):
+    """The template registered under name (all templates are read on first use)"""
+    global _templates
+    if _templates is None:
+        with _lock:
+            if _templates is None:
+                _templates = _load()
+    return _templates[name]
+
+def section_prompt(section):
+    """Template for a paper section, or None if the section has no prompt"""
+    name = f'sections/{section}'
+    return get_prompt(name) if name in VERSIONS else None
@@ -0,0 +1,372 @@
+"""
+ResearchHub AI - LLM Providers
+Blocking (requests / OpenAI) and asyncio (httpx / AsyncOpenAI) clients for
+each backend. Providers hold no Flask state, so the async methods can run
+on any event loop.
+"""
+import asyncio
+import json
+import weakref
+from app.services.prompt_budget import context_window
+
+SYSTEM_PROMPT = "You are an expert research paper writing assistant."
+
+# Provider name -> class, see register_provider()
+PROVIDERS = {}
+
+def register_provider(name):
+    """Class decorator adding a provider to the registry under name"""
+    def decorator(cls):
+        cls.name = name
+        PROVIDERS[name] = cls
+        return cls
+    return decorator
+
+def create_provider(name, config, base_url=None):
+    """Build a registered provider from app config (base_url overrides the configured URL)"""
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {name}")
+    return PROVIDERS[name].from_config(config, base_url)
+
+class LLMProvider:
+    """Base class: one backend (URL + model)"""
+
+    name = None
+
+    def __init__(self, model, timeout=120, json_mode='schema'):
+        self.model = model
+        self.timeout = timeout
+        # How a schema passed to generate() is enforced: 'schema' (constrained
+        # to the schema where supported), 'json' (any JSON) or 'off'
+        self.json_mode = json_mode
+        # Async clients are bound to the event loop that created them
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _async_client(self):
+        """The async client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = self._new_async_client()
+        return client
+
+    def _new_async_client(self):
+        raise NotImplementedError
+
+    @classmethod
+    def from_config(cls, config, base_url=None):
+        raise NotImplementedError
+
+    @property
+    def label(self):
+        """Identifies this backend in logs and metrics"""
+        return self.name
+
+    def ping(self):
+        """True if the backend answers a cheap request (never raises)"""
+        return True
+
+    def warm(self, model=None):
+        """Load model into memory ahead of the first request; returns seconds taken or None"""
+        return None
+
+    def check(self):
+        """Warn if the backend is unreachable (never raises)"""
+        if not self.ping():
+            print(f"⚠️  Warning: {self.label} is not responding")
+
+    def generate(self, prompt, max_tokens, temperature=0.7, model=None, schema=None):
+        """Blocking generation, returns (text, usage); schema asks for JSON output"""
+        raise NotImplementedError
+
+    async def agenerate(self, prompt, max_tokens, temperature=0.7, model=None, schema=None):
+        """Awaitable generation, returns (text, usage)"""
+        raise NotImplementedError
+
+    async def astream(self, prompt, max_tokens, temperature=0.7, model=None):
+        """Async iterator of text chunks"""
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    async def aclose(self):
+        """Release the running loop's pooled async connections"""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            close = getattr(client, 'aclose', None) or client.close
+            await close()
+
+def _keep_alive(value):
+    """Ollama accepts durations ('30m') or seconds as a number (-1 = never unload)"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+@register_provider('ollama')
+class OllamaProvider(LLMProvider):
+    """Ollama HTTP API (/api/generate)"""
+
+    def __init__(self, base_url, model='mistral', timeout=120, context_window=None, keep_alive=None,
+                 json_mode='schema'):
+        super().__init__(model or 'mistral', timeout, json_mode)
+        self.base_url = base_url.rstrip('/')
+        self.context_window = context_window
+        # How long Ollama keeps the model loaded after a request ('30m', '-1' = forever)
+        self.keep_alive = keep_alive
+
+    @classmethod
+    def from_config(cls, config, base_url=None):
+        return cls(base_url or config.get('OLLAMA_BASE_URL', 'http://localhost:11434'),
+                   model=config.get('LLM_MODEL', 'mistral'),
+                   context_window=config.get('LLM_CONTEXT_WINDOW'),
+                   keep_alive=config.get('OLLAMA_KEEP_ALIVE'),
+                   json_mode=config.get('LLM_JSON_MODE', 'schema'))
+
+    @property
+    def label(self):
+        return f"ollama@{self.base_url}"
+
+    def _payload(self, prompt, max_tokens, temperature, stream, model, schema=None):
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "num_predict": max_tokens,
+                "temperature": temperature,
+                # Ollama defaults to a 2048-token window and silently drops
+                # the start of longer prompts; use the window we budget for
+                "num_ctx": context_window(model or self.model, self.context_window)
+            }
+        }
+        if self.keep_alive:
+            payload["keep_alive"] = _keep_alive(self.keep_alive)
+        if schema and self.json_mode == 'schema':
+            # Grammar-constrained decoding to the schema (Ollama 0.5+)
+            payload["format"] = schema
+        elif schema and self.json_mode == 'json':
+            payload["format"] = "json"
+        return payload
+
+    def _schema_rejected(self, status_code, schema):
+        """
+        True if Ollama refused a JSON schema as 'format' (versions before 0.5
+        answer 400): the provider switches to plain JSON mode for good, and
+        the caller retries once
+        """
+        if status_code == 400 and schema and self.json_mode == 'schema':
+            print(f"⚠️  {self.label} does not support JSON schemas (Ollama < 0.5?), using format=json")
+            self.json_mode = 'json'
+            return True
+        return False
+
+    @staticmethod
+    def _usage(result):
+        return {
+            'prompt_tokens': result.get('prompt_eval_count'),
+            'completion_tokens': result.get('eval_count'),
+            # Nanoseconds spent loading the model; large when it was cold
+            'load_seconds': (result.get('load_duration') or 0) / 1e9
+        }
+
+    def ping(self):
+        import requests
+        try:
+            return requests.get(f"{self.base_url}/api/tags", timeout=5).status_code == 200
+        except Exception:
+            return False
+
+    def warm(self, model=None):
+        """A prompt-less /api/generate loads the model and resets its keep_alive timer"""
+        import requests
+        import time
+
+        payload = {"model": model or self.model,
+                   "options": {"num_ctx": context_window(model or self.model, self.context_window)}}
+        if self.keep_alive:
+            payload["keep_alive"] = _keep_alive(self.keep_alive)
+        start = time.perf_counter()
+        response = requests.post(f"{self.base_url}/api/generate", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    def check(self):
+        import requests
+        try:
+            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            if response.status_code != 200:
+                print(f"⚠️  Warning: Ollama not responding at {self.base_url}")
+        except Exception as e:
+            print(f"⚠️  Warning: Cannot connect to Ollama: {e}")
+
+    def generate(self, prompt, max_tokens, temperature=0.7, model=None, schema=None):
+        import requests
+
+        try:
+            response = requests.post(
+                f"{self.base_url}/api/generate",
+                json=self._payload(prompt, max_tokens, temperature, False, model, schema),
+                timeout=self.timeout
+            )
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Ollama generation failed: {str(e)}")
+
+        if self._schema_rejected(response.status_code, schema):
+            return self.generate(prompt, max_tokens, temperature, model, schema)
+        if response.status_code != 200:
+            print(f"❌ Ollama error - Status: {response.status_code}, Response: {response.text}")
+            raise Exception(f"Ollama returned status {response.status_code}: {response.text}")
+
+        result = response.json()
+        return result.get('response', '').strip(), self._usage(result)
+
+    def _new_async_client(self):
+        import httpx
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(self.timeout, connect=10),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=50)
+        )
+
+    async def agenerate(self, prompt, max_tokens, temperature=0.7, model=None, schema=None):
+        import httpx
+
+        try:
+            response = await self._async_client().post(
+                "/api/generate",
+                json=self._payload(prompt, max_tokens, temperature, False, model, schema)
+            )
+        except httpx.HTTPError as e:
+            raise Exception(f"Ollama generation failed: {str(e)}")
+
+        if self._schema_rejected(response.status_code, schema):
+            return await self.agenerate(prompt, max_tokens, temperature, model, schema)
+        if response.status_code != 200:
+            raise Exception(f"Ollama returned status {response.status_code}: {response.text}")
+
+        result = response.json()
+        return result.get('response', '').strip(), self._usage(result)
+
+    async def astream(self, prompt, max_tokens, temperature=0.7, model=None):
+        import httpx
+
+        try:
+            async with self._async_client().stream(
+                "POST", "/api/generate",
+                json=self._payload(prompt, max_tokens, temperature, True, model)
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise Exception(f"Ollama returned status {response.status_code}: {body.decode()}")
+                # Newline-delimited JSON, one object per token batch
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('response'):
+                        yield chunk['response']
+                    if chunk.get('done'):
+                        break
+        except httpx.HTTPError as e:
+            raise Exception(f"Ollama generation failed: {str(e)}")
+
+@register_provider('openai')
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions"""
+
+    def __init__(self, api_key, model='gpt-3.5-turbo', timeout=120, base_url=None, json_mode='schema'):
+        super().__init__(model or 'gpt-3.5-turbo', timeout, json_mode)
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not configured")
+        try:
+            from openai import OpenAI
+        except ImportError:
+            raise ImportError("OpenAI package not installed. Run: pip install openai")
+        self.api_key = api_key
+        self.base_url = base_url
+        self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout)
+
+    @classmethod
+    def from_config(cls, config, base_url=None):
+        return cls(api_key=config.get('OPENAI_API_KEY'),
+                   model=config.get('LLM_MODEL', 'gpt-3.5-turbo'),
+                   base_url=base_url or config.get('OPENAI_BASE_URL'),
+                   json_mode=config.get('LLM_JSON_MODE', 'schema'))
+
+    @property
+    def label(self):
+        return f"openai@{self.base_url}" if self.base_url else 'openai'
+
+    def ping(self):
+        try:
+            self.client.with_options(timeout=5, max_retries=0).models.list()
+            return True
+        except Exception:
+            return False
+
+    def _messages(self, prompt):
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _format(self, schema):
+        """JSON mode: the model must return one JSON object (the prompt describes its schema)"""
+        if schema and self.json_mode in ('schema', 'json'):
+            return {"response_format": {"type": "json_object"}}
+        return {}
+
+    @staticmethod
+    def _usage(response):
+        if not response.usage:
+            return {}
+        return {
+            'prompt_tokens': response.usage.prompt_tokens,
+            'completion_tokens': response.usage.completion_tokens
+        }
+
+    def generate(self, prompt, max_tokens, temperature=0.7, model=None, schema=None):
+        try:
+            response = self.client.chat.completions.create(
+                model=model or self.model,
+                messages=self._messages(prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **self._format(schema)
+            )
+        except Exception as e:
+            raise Exception(f"OpenAI generation failed: {str(e)}")
+        return response.choices[0].message.content.strip(), self._usage(response)
+
+    def _new_async_client(self):
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout)
+
+    async def agenerate(self, prompt, max_tokens, temperature=0.7, model=None, schema=None):
+        try:
+            response = await self._async_client().chat.completions.create(
+                model=model or self.model,
+                messages=self._messages(prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **self._format(schema)
+            )
+        except Exception as e:
+            raise Exception(f"OpenAI generation failed: {str(e)}")
+        return response.choices[0].message.content.strip(), self._usage(response)
+
+    async def astream(self, prompt, max_tokens, temperature=0.7, model=None):
+        try:
+            stream = await self._async_client().chat.completions.create(
+                model=model or self.model,
+                messages=self._messages(prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise Exception(f"OpenAI generation failed: {str(e)}")
+
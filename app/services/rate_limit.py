@@ -0,0 +1,223 @@
+"""
+ResearchHub AI - Admission control for AI endpoints
+Token-bucket rate limits per user and for the whole site, plus caps on
+concurrent generations, so a burst is answered with a fast 429 and
+Retry-After instead of queueing behind multi-minute generations.
+State lives in process memory (single worker) or in Redis (shared by all
+workers), selected by RATELIMIT_STORAGE_URL.
+"""
+import contextlib
+import math
+import threading
+import time
+from app.metrics import metrics
+
+class RateLimited(Exception):
+    """A request was not admitted; retry_after is in whole seconds"""
+
+    def __init__(self, message, retry_after, scope=None, reason=None):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.scope = scope
+        self.reason = reason
+
+class MemoryStore:
+    """Token buckets and slot counters for one process (threads and green threads)"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> (tokens, updated, full_at)
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1):
+        """
+        Take cost tokens (rate per second); 0 if admitted, else seconds until
+        they are available. A negative cost gives tokens back.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0
+            if tokens >= cost:
+                tokens = min(burst, tokens - cost)
+            else:
+                wait = (cost - tokens) / rate
+            if key not in self._buckets and len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return wait
+
+    def _prune(self, now):
+        """Forget buckets that have refilled completely (they restart full anyway)"""
+        for key in [k for k, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+
+    def acquire(self, key, limit, ttl=None):
+        """Take one of limit concurrency slots; False if all are in use"""
+        with self._lock:
+            used = self._slots.get(key, 0)
+            if used >= limit:
+                return False
+            self._slots[key] = used + 1
+            return True
+
+    def release(self, key):
+        with self._lock:
+            used = self._slots.get(key, 0) - 1
+            if used > 0:
+                self._slots[key] = used
+            else:
+                self._slots.pop(key, None)
+
+# Runs atomically in Redis; uses the server clock so workers on different
+# hosts agree. Returns the wait as a string (Lua numbers become integers).
+_TAKE_SCRIPT = """
+local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = math.min(burst, tokens - cost)
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return tostring(wait)
+"""
+
+_ACQUIRE_SCRIPT = """
+local used = redis.call('INCR', KEYS[1])
+if used > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    return 0
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('DECR', KEYS[1]) <= 0 then
+    redis.call('DEL', KEYS[1])
+end
+return 1
+"""
+
+class RedisStore:
+    """
+    Same interface as MemoryStore, shared by every worker through Redis
+
+    Slot counters expire after ttl seconds so a worker that dies mid-request
+    cannot hold its slots forever.
+    """
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self._take = self.client.register_script(_TAKE_SCRIPT)
+        self._acquire = self.client.register_script(_ACQUIRE_SCRIPT)
+        self._release = self.client.register_script(_RELEASE_SCRIPT)
+
+    def take(self, key, rate, burst, cost=1):
+        return float(self._take(keys=[key], args=[rate, burst, cost]))
+
+    def acquire(self, key, limit, ttl=900):
+        return bool(self._acquire(keys=[key], args=[limit, int(ttl)]))
+
+    def release(self, key):
+        self._release(keys=[key])
+
+def create_store(url):
+    """'memory://' (or empty) -> MemoryStore; 'redis://...' / 'rediss://...' -> RedisStore"""
+    if not url or url.startswith('memory://'):
+        return MemoryStore()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisStore(url)
+    raise ValueError(f"Unsupported RATELIMIT_STORAGE_URL: {url}")
+
+class AdmissionController:
+    """
+    Decides whether an AI request may start now
+
+    Checks, cheapest to give back first: concurrent requests of this user,
+    concurrent requests site-wide, then the user's and the global token
+    buckets. Rates are per minute; cost is the number of LLM calls the
+    request will make (e.g. one per generated section).
+    """
+
+    def __init__(self, store, user_rate=5, user_burst=20, global_rate=60, global_burst=200,
+                 user_concurrency=2, global_concurrency=16, busy_retry_after=10,
+                 slot_ttl=900, enabled=True, prefix='ratelimit:'):
+        self.store = store
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.user_concurrency = user_concurrency
+        self.global_concurrency = global_concurrency
+        self.busy_retry_after = busy_retry_after
+        self.slot_ttl = slot_ttl
+        self.enabled = enabled
+        self.prefix = prefix
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(create_store(config.get('RATELIMIT_STORAGE_URL')),
+                   user_rate=config.get('AI_USER_RATE_PER_MINUTE', 5),
+                   user_burst=config.get('AI_USER_BURST', 20),
+                   global_rate=config.get('AI_GLOBAL_RATE_PER_MINUTE', 60),
+                   global_burst=config.get('AI_GLOBAL_BURST', 200),
+                   user_concurrency=config.get('AI_USER_MAX_CONCURRENT', 2),
+                   global_concurrency=config.get('AI_MAX_CONCURRENT', 16),
+                   busy_retry_after=config.get('AI_BUSY_RETRY_AFTER', 10),
+                   enabled=config.get('RATELIMIT_ENABLED', True))
+
+    @contextlib.contextmanager
+    def admit(self, user_id, cost=1):
+        """Hold a slot for the duration of the block; raises RateLimited if not admitted"""
+        if not self.enabled:
+            yield
+            return
+        held = []
+        try:
+            for scope, key, limit in (('user', f'{self.prefix}active:user:{user_id}', self.user_concurrency),
+                                      ('global', f'{self.prefix}active:all', self.global_concurrency)):
+                if not limit:
+                    continue
+                if not self.store.acquire(key, limit, self.slot_ttl):
+                    self._reject(scope, 'concurrency', self.busy_retry_after,
+                                 "You already have AI requests running, please wait for them to finish"
+                                 if scope == 'user' else "The AI service is busy, please retry shortly")
+                held.append(key)
+            taken = []
+            for scope, key, rate, burst in (('user', f'{self.prefix}bucket:user:{user_id}',
+                                             self.user_rate, self.user_burst),
+                                            ('global', f'{self.prefix}bucket:all',
+                                             self.global_rate, self.global_burst)):
+                if not rate:
+                    continue
+                # A request bigger than the burst would never fit; charge it a full bucket
+                charge = min(cost, burst)
+                wait = self.store.take(key, rate / 60, burst, charge)
+                if wait:
+                    # Not admitted: give back what the user's bucket was charged
+                    for taken_key, taken_rate, taken_burst, taken_charge in taken:
+                        self.store.take(taken_key, taken_rate, taken_burst, -taken_charge)
+                    self._reject(scope, 'rate', wait,
+                                 "AI request limit reached, please retry later" if scope == 'user'
+                                 else "The AI service is at capacity, please retry later")
+                taken.append((key, rate / 60, burst, charge))
+            yield
+        finally:
+            for key in held:
+                self.store.release(key)
+
+    def _reject(self, scope, reason, retry_after, message):
+        metrics.inc('ai_requests_rejected_total', scope=scope, reason=reason)
+        raise RateLimited(message, retry_after, scope, reason)
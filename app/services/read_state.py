@@ -0,0 +1,113 @@
+"""
+ResearchHub AI - Chat read state
+Each user has one watermark per conversation (1-to-1 partner or project
+chat): the id of the last message they have read. Opening a conversation
+moves it forward with a single upsert, however many messages it covers,
+and unread counts are the messages past it, an id range on the
+(recipient, sender, id) index.
+"""
+from datetime import datetime
+
+KINDS = ('user', 'project')
+
+def mark_read(session, user_id, kind, conversation_id, message_id):
+    """Move user's watermark in a conversation up to message_id (never back)"""
+    from sqlalchemy import func, update
+    from app.models import Message, ReadWatermark
+    from app.services.counters import bump
+
+    if kind not in KINDS or not message_id:
+        return
+    key = {'user_id': user_id, 'kind': kind, 'conversation_id': conversation_id}
+    previous = session.query(ReadWatermark.last_read_message_id).filter_by(**key).scalar()
+    while previous is None or previous < message_id:
+        # Insert-if-absent or compare-and-set, so of concurrent calls only the
+        # one that actually moved the watermark counts the messages it covers
+        if previous is None:
+            moved = _insert_watermark(session, key, message_id)
+        else:
+            moved = session.execute(update(ReadWatermark).filter_by(**key).where(
+                ReadWatermark.last_read_message_id == previous,
+            ).values(last_read_message_id=message_id, updated_at=datetime.utcnow()),
+                execution_options={'synchronize_session': False}).rowcount
+        if moved:
+            if kind == 'user':
+                # The dashboard's unread counter drops by the messages this covers
+                newly_read = session.query(func.count(Message.id)).filter(
+                    Message.recipient_id == user_id, Message.sender_id == conversation_id,
+                    Message.id > (previous or 0), Message.id <= message_id).scalar()
+                bump(session.connection(), user_id, unread_messages=-newly_read)
+            return
+        previous = session.query(ReadWatermark.last_read_message_id).filter_by(**key).scalar()
+
+def _insert_watermark(session, key, message_id):
+    """Create the watermark at message_id; False if another request just did"""
+    from app.models import ReadWatermark
+
+    values = dict(key, last_read_message_id=message_id, updated_at=datetime.utcnow())
+    dialect = session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        return session.execute(insert(ReadWatermark).values(**values).on_conflict_do_nothing(
+            index_elements=['user_id', 'kind', 'conversation_id'])).rowcount > 0
+    if session.get(ReadWatermark, (key['user_id'], key['kind'], key['conversation_id'])) is not None:
+        return False
+    session.add(ReadWatermark(**values))
+    session.flush()
+    return True
+
+def is_project_member(user_id, project_id):
+    from app import db
+    from app.models import project_members
+
+    return project_id is not None and db.session.query(project_members).filter_by(
+        user_id=user_id, project_id=project_id).first() is not None
+
+def watermark_of(user_id, partner_id):
+    """Correlated scalar: user's watermark in the 1-to-1 chat with partner_id (0 if none)"""
+    from sqlalchemy import func, select
+    from app.models import ReadWatermark
+
+    return func.coalesce(select(ReadWatermark.last_read_message_id).where(
+        ReadWatermark.user_id == user_id, ReadWatermark.kind == 'user',
+        ReadWatermark.conversation_id == partner_id,
+    ).scalar_subquery(), 0)
+
+def unread_total(user_id):
+    """Unread 1-to-1 messages across all of user's conversations"""
+    from sqlalchemy import func
+    from app import db
+    from app.models import Message
+
+    return db.session.query(func.count(Message.id)).filter(
+        Message.recipient_id == user_id,
+        Message.id > watermark_of(user_id, Message.sender_id)
+    ).scalar()
+
+def watermarks_from_flags(connection):
+    """
+    Initial watermarks from the old per-message is_read flags: everything
+    before the first unread message of a 1-to-1 conversation counts as
+    read, and project chats (never tracked) are read up to their latest
+    message. The backfill of migration 0007, for conversations that have
+    no watermark yet (seeded benchmark data).
+    """
+    from sqlalchemy import text
+
+    connection.execute(text(
+        "INSERT INTO read_watermark (user_id, kind, conversation_id, last_read_message_id, updated_at) "
+        "SELECT recipient_id, 'user', sender_id, "
+        "COALESCE(MIN(CASE WHEN is_read THEN NULL ELSE id END) - 1, MAX(id)), CURRENT_TIMESTAMP "
+        "FROM message m WHERE recipient_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM read_watermark w "
+        "WHERE w.user_id = m.recipient_id AND w.kind = 'user' AND w.conversation_id = m.sender_id) "
+        "GROUP BY recipient_id, sender_id"))
+    connection.execute(text(
+        "INSERT INTO read_watermark (user_id, kind, conversation_id, last_read_message_id, updated_at) "
+        "SELECT pm.user_id, 'project', pm.project_id, MAX(m.id), CURRENT_TIMESTAMP "
+        "FROM project_members pm JOIN message m ON m.project_id = pm.project_id "
+        "WHERE NOT EXISTS (SELECT 1 FROM read_watermark w WHERE w.user_id = pm.user_id "
+        "AND w.kind = 'project' AND w.conversation_id = pm.project_id) "
+        "GROUP BY pm.user_id, pm.project_id"))
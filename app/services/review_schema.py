@@ -0,0 +1,110 @@
+"""
+ResearchHub AI - Review output schema
+The JSON structure paper reviews must follow: sent to providers that can
+constrain their output to it, and used to validate (and coerce) whatever
+the model returned.
+"""
+import re
+
+FINDING_TYPES = ('structure', 'clarity', 'logic', 'completeness')
+SEVERITIES = ('low', 'medium', 'high', 'critical')
+
+REVIEW_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'overall_score': {'type': 'integer', 'minimum': 1, 'maximum': 10},
+        'findings': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'type': {'type': 'string', 'enum': list(FINDING_TYPES)},
+                    'severity': {'type': 'string', 'enum': list(SEVERITIES)},
+                    'section': {'type': 'string'},
+                    'issue': {'type': 'string'},
+                    'suggestion': {'type': 'string'}
+                },
+                'required': ['type', 'severity', 'section', 'issue', 'suggestion']
+            }
+        },
+        'strengths': {'type': 'array', 'items': {'type': 'string'}},
+        'improvements': {'type': 'array', 'items': {'type': 'string'}}
+    },
+    'required': ['overall_score', 'findings', 'strengths', 'improvements']
+}
+
+class InvalidReview(ValueError):
+    """Model output that holds neither a score nor any finding"""
+
+def _score(value):
+    """7, 7.5, '7', '7/10' -> 1..10; None if there is no number"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        match = re.search(r'\d+(\.\d+)?', value)
+        value = float(match.group()) if match else None
+    if not isinstance(value, (int, float)):
+        return None
+    return min(10, max(1, round(value)))
+
+def _text(value):
+    if value is None or isinstance(value, (dict, list)):
+        return ''
+    return str(value).strip()
+
+def _choice(value, choices, default):
+    value = _text(value).lower()
+    return value if value in choices else default
+
+def _strings(value):
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    return [text for text in map(_text, value) if text]
+
+def validate_review(data):
+    """
+    Coerce parsed model output to REVIEW_SCHEMA
+
+    Returns (review, problems), problems being what had to be fixed. Raises
+    InvalidReview when there is nothing worth keeping.
+    """
+    if not isinstance(data, dict):
+        raise InvalidReview("Review is not a JSON object")
+    problems = []
+
+    score = _score(data.get('overall_score'))
+    if score is None:
+        problems.append('overall_score missing')
+
+    findings = []
+    raw_findings = data.get('findings')
+    if not isinstance(raw_findings, list):
+        raw_findings = []
+        problems.append('findings missing')
+    for raw in raw_findings:
+        if not isinstance(raw, dict) or not _text(raw.get('issue')):
+            problems.append('finding without issue dropped')
+            continue
+        finding = {
+            'type': _choice(raw.get('type'), FINDING_TYPES, 'completeness'),
+            'severity': _choice(raw.get('severity'), SEVERITIES, 'medium'),
+            'section': _text(raw.get('section')) or 'general',
+            'issue': _text(raw.get('issue')),
+            'suggestion': _text(raw.get('suggestion'))
+        }
+        if finding['type'] != _text(raw.get('type')).lower() or finding['severity'] != _text(raw.get('severity')).lower():
+            problems.append('finding type/severity defaulted')
+        findings.append(finding)
+
+    if score is None and not findings:
+        raise InvalidReview("Review has neither a score nor findings")
+
+    return {
+        # A review without a score still carries usable findings
+        'overall_score': score if score is not None else 5,
+        'findings': findings,
+        'strengths': _strings(data.get('strengths')),
+        'improvements': _strings(data.get('improvements'))
+    }, problems
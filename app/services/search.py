@@ -0,0 +1,424 @@
+"""
+ResearchHub AI - Full-text search over papers and projects
+Each paper and project has one search_document row (title, keywords and
+all section text), written in the same flush that saves it. The database
+indexes it: an external-content FTS5 table kept in sync by triggers on
+SQLite, a weighted tsvector column with a GIN index on PostgreSQL. Other
+databases fall back to LIKE with snippets cut in Python.
+
+Results are limited to what the user may open: their own papers and
+projects, and everything in projects they are a member of.
+
+Chat messages are indexed the same way, straight from the message table
+(FTS5 triggers on SQLite, a GIN expression index on PostgreSQL), so a
+message is searchable as soon as the transaction that sends it commits,
+whichever path sent it.
+"""
+import re
+from markupsafe import Markup, escape
+
+# Highlight markers inside snippets; replaced with <mark> after escaping
+_OPEN, _CLOSE = '\x02', '\x03'
+_TERMS = re.compile(r'\w+', re.UNICODE)
+DEFAULT_PER_PAGE = 20
+
+PAPER_FIELDS = ('objective', 'abstract', 'introduction', 'problem_statement', 'literature_review',
+                'methodology', 'results', 'conclusion', 'future_work', 'references')
+_TRACKED = {
+    'paper': ('title', 'keywords', 'domain', 'author_id', 'project_id') + PAPER_FIELDS,
+    'project': ('title', 'keywords', 'abstract', 'owner_id'),
+}
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_document_fts USING fts5("
+    "title, keywords, body, content='search_document', content_rowid='id', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS search_document_ai AFTER INSERT ON search_document BEGIN "
+    "INSERT INTO search_document_fts(rowid, title, keywords, body) "
+    "VALUES (new.id, new.title, new.keywords, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_document_ad AFTER DELETE ON search_document BEGIN "
+    "INSERT INTO search_document_fts(search_document_fts, rowid, title, keywords, body) "
+    "VALUES ('delete', old.id, old.title, old.keywords, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_document_au AFTER UPDATE ON search_document BEGIN "
+    "INSERT INTO search_document_fts(search_document_fts, rowid, title, keywords, body) "
+    "VALUES ('delete', old.id, old.title, old.keywords, old.body); "
+    "INSERT INTO search_document_fts(rowid, title, keywords, body) "
+    "VALUES (new.id, new.title, new.keywords, new.body); END",
+]
+POSTGRES_DDL = [
+    "ALTER TABLE search_document ADD COLUMN IF NOT EXISTS tsv tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(keywords, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(body, '')), 'C')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_search_document_tsv ON search_document USING GIN (tsv)",
+]
+
+# Only edits to the text touch the index (not is_read flips)
+MESSAGE_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS message_fts USING fts5("
+    "content, content='message', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS message_fts_ai AFTER INSERT ON message BEGIN "
+    "INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS message_fts_ad AFTER DELETE ON message BEGIN "
+    "INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS message_fts_au AFTER UPDATE OF content ON message BEGIN "
+    "INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content); END",
+]
+MESSAGE_POSTGRES_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_message_content_tsv ON message "
+    "USING GIN (to_tsvector('english', content))",
+]
+
+def _install(table, sqlite_ddl, postgres_ddl, fts_table):
+    from sqlalchemy import DDL, event
+
+    for statement in sqlite_ddl:
+        event.listen(table, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+    for statement in postgres_ddl:
+        event.listen(table, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+    event.listen(table, 'before_drop',
+                 DDL(f'DROP TABLE IF EXISTS {fts_table}').execute_if(dialect='sqlite'))
+
+def install_search_index(table):
+    """Create the dialect's full-text index whenever the table is created (create_all)"""
+    _install(table, SQLITE_DDL, POSTGRES_DDL, 'search_document_fts')
+
+def install_message_index(table):
+    """Same for the message table"""
+    _install(table, MESSAGE_SQLITE_DDL, MESSAGE_POSTGRES_DDL, 'message_fts')
+
+# table -> (SQLite DDL, PostgreSQL DDL, object whose presence means it has run)
+_INDEXES = {
+    'search_document': (SQLITE_DDL, POSTGRES_DDL, {'sqlite': 'search_document_fts',
+                                                   'postgresql': 'ix_search_document_tsv'}),
+    'message': (MESSAGE_SQLITE_DDL, MESSAGE_POSTGRES_DDL, {'sqlite': 'message_fts',
+                                                           'postgresql': 'ix_message_content_tsv'}),
+}
+
+def _exists(connection, name):
+    from sqlalchemy import text
+
+    if connection.dialect.name == 'sqlite':
+        return connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+                                  {'name': name}).first() is not None
+    return connection.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar() is not None
+
+def ensure_indexes(session):
+    """
+    Bring a database kept by create_all() (no migrations) up to what
+    migrations 0005 and 0006 do: create_all() only adds a full-text index
+    together with the table, so tables that already existed get it here,
+    and papers and projects saved before search existed are indexed
+    """
+    from app.models import Paper, Project, SearchDocument
+
+    connection = session.connection()
+    dialect = connection.dialect.name
+    for table, (sqlite_ddl, postgres_ddl, marker) in _INDEXES.items():
+        ddl = {'sqlite': sqlite_ddl, 'postgresql': postgres_ddl}.get(dialect)
+        if not ddl or _exists(connection, marker[dialect]):
+            continue
+        print(f"🔎 Creating the full-text index for {table}")
+        for statement in ddl:
+            connection.exec_driver_sql(statement)
+        if dialect == 'sqlite':
+            # Index the rows already in the table (triggers keep it current from here on)
+            connection.exec_driver_sql(f"INSERT INTO {marker[dialect]}({marker[dialect]}) VALUES ('rebuild')")
+    session.commit()
+
+    if (session.query(SearchDocument.id).first() is None
+            and (session.query(Paper.id).first() or session.query(Project.id).first())):
+        print(f"🔎 Indexed {reindex(session)} existing papers and projects for search")
+
+# ---------------------------------------------------------------------------
+# Keeping documents in sync
+# ---------------------------------------------------------------------------
+
+def document_for(obj):
+    """search_document values for a Paper or Project, None for anything else"""
+    from app.models import Paper, Project
+
+    if isinstance(obj, Paper):
+        return {
+            'kind': 'paper', 'object_id': obj.id, 'author_id': obj.author_id,
+            'project_id': obj.project_id, 'title': obj.title,
+            'keywords': ', '.join(filter(None, (obj.keywords, obj.domain))),
+            'body': '\n\n'.join(filter(None, (getattr(obj, field) for field in PAPER_FIELDS))),
+        }
+    if isinstance(obj, Project):
+        return {
+            'kind': 'project', 'object_id': obj.id, 'author_id': obj.owner_id,
+            'project_id': obj.id, 'title': obj.title, 'keywords': obj.keywords,
+            'body': obj.abstract or '',
+        }
+    return None
+
+def _changed(obj, kind):
+    from sqlalchemy import inspect
+
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in _TRACKED[kind])
+
+def _sync_documents(session, flush_context):
+    """Write search documents for papers and projects saved in this flush"""
+    from datetime import datetime
+    from sqlalchemy import delete, insert, select, update
+    from app.models import SearchDocument
+
+    table = SearchDocument.__table__
+    connection = None
+    for obj in list(session.new) + list(session.dirty):
+        doc = document_for(obj)
+        if doc is None or (obj not in session.new and not _changed(obj, doc['kind'])):
+            continue
+        connection = connection or session.connection()
+        doc['updated_at'] = datetime.utcnow()
+        existing = connection.execute(select(table.c.id).where(
+            table.c.kind == doc['kind'], table.c.object_id == doc['object_id'])).scalar()
+        if existing is None:
+            connection.execute(insert(table).values(**doc))
+        else:
+            connection.execute(update(table).where(table.c.id == existing).values(**doc))
+    for obj in session.deleted:
+        doc = document_for(obj)
+        if doc is not None:
+            connection = connection or session.connection()
+            connection.execute(delete(table).where(
+                table.c.kind == doc['kind'], table.c.object_id == doc['object_id']))
+
+_listening = False
+
+def init_app(app):
+    """Keep search documents in sync with paper and project saves"""
+    global _listening
+    if _listening:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    event.listen(Session, 'after_flush', _sync_documents)
+    _listening = True
+
+def reindex(session):
+    """Rebuild every search document (after bulk loads that bypass the ORM); returns the count"""
+    from sqlalchemy import delete, insert
+    from app.models import Paper, Project, SearchDocument
+
+    session.execute(delete(SearchDocument))
+    count = 0
+    for model in (Paper, Project):
+        batch = []
+        for obj in session.query(model).yield_per(1000):
+            batch.append(document_for(obj))
+            if len(batch) == 1000:
+                session.execute(insert(SearchDocument), batch)
+                count, batch = count + len(batch), []
+        if batch:
+            session.execute(insert(SearchDocument), batch)
+            count += len(batch)
+    session.commit()
+    return count
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def _highlight(snippet):
+    """Escape a snippet, then turn the match markers into <mark> tags"""
+    return Markup(str(escape(snippet or '')).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>'))
+
+def _fts5_query(terms):
+    """Every term must appear; the last one may be a prefix (search as you type)"""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+def _python_snippet(text, terms, width=160):
+    """Fallback snippet: text around the first match, matches marked"""
+    lowered = (text or '').lower()
+    starts = [i for i in (lowered.find(term) for term in terms) if i >= 0]
+    start = max(0, min(starts) - width // 3) if starts else 0
+    snippet = (text or '')[start:start + width]
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    snippet = pattern.sub(lambda m: f'{_OPEN}{m.group(0)}{_CLOSE}', snippet)
+    return ('…' if start else '') + snippet + ('…' if start + width < len(text or '') else '')
+
+def search(user, q, page=1, per_page=DEFAULT_PER_PAGE, project_id=None, kind=None):
+    """
+    One page of matches visible to user, best first
+
+    Returns (results, has_next); each result is a dict with kind, id,
+    title and snippet (HTML-safe, matches wrapped in <mark>).
+    """
+    from sqlalchemy import text
+    from app import db
+
+    terms = [term.lower() for term in _TERMS.findall(q or '')][:20]
+    if not terms:
+        return [], False
+    page = max(page, 1)
+    params = {'uid': user.id, 'limit': per_page + 1, 'offset': (page - 1) * per_page}
+    where = ["(d.author_id = :uid OR d.project_id IN "
+             "(SELECT project_id FROM project_members WHERE user_id = :uid))"]
+    if project_id is not None:
+        where.append('d.project_id = :project_id')
+        params['project_id'] = project_id
+    if kind is not None:
+        where.append('d.kind = :kind')
+        params['kind'] = kind
+
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        params.update(match=_fts5_query(terms), open=_OPEN, close=_CLOSE)
+        sql = ("SELECT d.kind, d.object_id, d.title, "
+               "snippet(search_document_fts, -1, :open, :close, '…', 24) "
+               "FROM search_document_fts JOIN search_document d ON d.id = search_document_fts.rowid "
+               f"WHERE search_document_fts MATCH :match AND {' AND '.join(where)} "
+               # bm25: title matches count most, then keywords, then body
+               "ORDER BY bm25(search_document_fts, 10.0, 5.0, 1.0) LIMIT :limit OFFSET :offset")
+    elif dialect == 'postgresql':
+        params.update(q=' '.join(terms), options=f'StartSel={_OPEN}, StopSel={_CLOSE}, '
+                                                   'MaxWords=30, MinWords=12, MaxFragments=2')
+        sql = ("SELECT d.kind, d.object_id, d.title, "
+               "ts_headline('english', coalesce(d.body, d.title, ''), query, :options) "
+               "FROM search_document d, websearch_to_tsquery('english', :q) query "
+               f"WHERE d.tsv @@ query AND {' AND '.join(where)} "
+               "ORDER BY ts_rank_cd(d.tsv, query) DESC LIMIT :limit OFFSET :offset")
+    else:
+        for i, term in enumerate(terms):
+            params[f't{i}'] = f'%{term}%'
+            where.append(f"(lower(d.title) LIKE :t{i} OR lower(d.keywords) LIKE :t{i} "
+                         f"OR lower(d.body) LIKE :t{i})")
+        sql = ("SELECT d.kind, d.object_id, d.title, d.body FROM search_document d "
+               f"WHERE {' AND '.join(where)} ORDER BY d.updated_at DESC LIMIT :limit OFFSET :offset")
+
+    rows = db.session.execute(text(sql), params).all()
+    results = [{
+        'kind': kind_, 'id': object_id, 'title': title,
+        'snippet': _highlight(snippet if dialect in ('sqlite', 'postgresql')
+                              else _python_snippet(snippet, terms)),
+    } for kind_, object_id, title, snippet in rows[:per_page]]
+    return results, len(rows) > per_page
+
+# ---------------------------------------------------------------------------
+# Chat messages
+# ---------------------------------------------------------------------------
+
+def _message_access(where, params, user, partner_id, project_id):
+    """Messages user sent or received 1-to-1, plus those of projects they are a member of"""
+    params['uid'] = user.id
+    where.append("((m.recipient_id IS NOT NULL AND (m.sender_id = :uid OR m.recipient_id = :uid)) "
+                 "OR m.project_id IN (SELECT project_id FROM project_members WHERE user_id = :uid))")
+    if partner_id is not None:
+        where.append("((m.sender_id = :uid AND m.recipient_id = :partner_id) "
+                     "OR (m.sender_id = :partner_id AND m.recipient_id = :uid))")
+        params['partner_id'] = partner_id
+    if project_id is not None:
+        where.append('m.project_id = :project_id')
+        params['project_id'] = project_id
+
+def conversation_of(message, user_id):
+    """('user', partner id) or ('project', project id) of a message as user_id sees it"""
+    if message.project_id is not None:
+        return 'project', message.project_id
+    return 'user', (message.recipient_id if message.sender_id == user_id else message.sender_id)
+
+def search_messages(user, q, before=None, per_page=DEFAULT_PER_PAGE, partner_id=None, project_id=None):
+    """
+    Messages matching q that user can read, newest first
+
+    Returns (results, next_cursor). Pass next_cursor back as before for
+    the next page (None when there is none); each result's id is the
+    cursor for message_context().
+    """
+    from sqlalchemy import DateTime, text
+    from app import db
+
+    terms = [term.lower() for term in _TERMS.findall(q or '')][:20]
+    if not terms:
+        return [], None
+    params = {'limit': per_page + 1}
+    where = []
+    _message_access(where, params, user, partner_id, project_id)
+    if before is not None:
+        where.append('m.id < :before')
+        params['before'] = before
+
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        # rowid order lets FTS5 stop after one page instead of ranking every match
+        params.update(match=_fts5_query(terms), open=_OPEN, close=_CLOSE)
+        sql = ("SELECT m.id, m.sender_id, m.recipient_id, m.project_id, m.created_at, u.name, "
+               "snippet(message_fts, 0, :open, :close, '…', 24) AS snippet "
+               "FROM message_fts JOIN message m ON m.id = message_fts.rowid "
+               "JOIN \"user\" u ON u.id = m.sender_id "
+               f"WHERE message_fts MATCH :match AND {' AND '.join(where)} "
+               "ORDER BY message_fts.rowid DESC LIMIT :limit")
+    elif dialect == 'postgresql':
+        params.update(q=' '.join(terms), options=f'StartSel={_OPEN}, StopSel={_CLOSE}, '
+                                                   'MaxWords=30, MinWords=12')
+        sql = ("SELECT m.id, m.sender_id, m.recipient_id, m.project_id, m.created_at, u.name, "
+               "ts_headline('english', m.content, query, :options) AS snippet "
+               "FROM message m JOIN \"user\" u ON u.id = m.sender_id, "
+               "websearch_to_tsquery('english', :q) query "
+               f"WHERE to_tsvector('english', m.content) @@ query AND {' AND '.join(where)} "
+               "ORDER BY m.id DESC LIMIT :limit")
+    else:
+        for i, term in enumerate(terms):
+            params[f't{i}'] = f'%{term}%'
+            where.append(f'lower(m.content) LIKE :t{i}')
+        sql = ("SELECT m.id, m.sender_id, m.recipient_id, m.project_id, m.created_at, u.name, "
+               "m.content AS snippet "
+               "FROM message m JOIN \"user\" u ON u.id = m.sender_id "
+               f"WHERE {' AND '.join(where)} ORDER BY m.id DESC LIMIT :limit")
+
+    rows = db.session.execute(text(sql).columns(created_at=DateTime), params).all()
+    results = [{
+        'id': row.id, 'sender_id': row.sender_id, 'sender_name': row.name,
+        'created_at': row.created_at, 'conversation': conversation_of(row, user.id),
+        'snippet': _highlight(row.snippet if dialect in ('sqlite', 'postgresql')
+                              else _python_snippet(row.snippet, terms)),
+    } for row in rows[:per_page]]
+    next_cursor = results[-1]['id'] if results and len(rows) > per_page else None
+    return results, next_cursor
+
+def message_context(user, message_id, before=10, after=10):
+    """
+    The messages around message_id in its conversation, or None if user can't read it
+
+    Returns a dict with the conversation, the messages (oldest first, the
+    target included) and earlier/later cursors: the first/last message id,
+    to call this again with after=0 / before=0 to keep scrolling (that
+    message comes back as the edge of the new page); None at either end.
+    """
+    from sqlalchemy import and_, or_
+    from app.models import Message
+    from app.services.read_state import is_project_member
+    from app import db
+
+    message = db.session.get(Message, message_id)
+    if message is None:
+        return None
+    kind, other_id = conversation_of(message, user.id)
+    if kind == 'project':
+        allowed = is_project_member(user.id, other_id)
+        same = Message.project_id == other_id
+    else:
+        allowed = user.id in (message.sender_id, message.recipient_id)
+        same = or_(and_(Message.sender_id == user.id, Message.recipient_id == other_id),
+                   and_(Message.sender_id == other_id, Message.recipient_id == user.id))
+    if not allowed:
+        return None
+
+    earlier = Message.query.filter(same, Message.id < message_id).order_by(
+        Message.id.desc()).limit(before + 1).all() if before > 0 else []
+    later = Message.query.filter(same, Message.id > message_id).order_by(
+        Message.id.asc()).limit(after + 1).all() if after > 0 else []
+    messages = earlier[:before][::-1] + [message] + later[:after]
+    return {
+        'conversation': (kind, other_id),
+        'messages': messages,
+        'earlier': messages[0].id if len(earlier) > before else None,
+        'later': messages[-1].id if len(later) > after else None,
+    }
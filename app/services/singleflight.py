@@ -0,0 +1,101 @@
+"""
+ResearchHub AI - Single-flight call coalescing
+Concurrent callers asking for the same key share one execution and all
+receive its result (or its exception).
+"""
+import asyncio
+import threading
+
+class _Call:
+    def __init__(self, task=None, loop=None):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        # Set when an asyncio task leads; waiters on its loop await it directly
+        self.task = task
+        self.loop = loop
+
+    def outcome(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+class SingleFlight:
+    """
+    Deduplicates identical in-flight calls, for threads and asyncio tasks
+
+    Both kinds share one map, so a blocking do() joins a call an ado() is
+    running and vice versa. Waiters give up with TimeoutError after timeout
+    seconds (None waits for as long as the leader takes).
+    """
+
+    def __init__(self, on_shared=None, timeout=None):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.timeout = timeout
+        # Called with the key whenever a caller joins an in-flight call
+        self.on_shared = on_shared
+
+    def do(self, key, fn):
+        """Run fn() unless a call for key is already running, then wait for that one"""
+        call, leader = self._join(key)
+        if not leader:
+            if not call.done.wait(self.timeout):
+                raise TimeoutError(f"in-flight call still running after {self.timeout}s")
+            return call.outcome()
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+        return call.result
+
+    async def ado(self, key, coro_fn):
+        """Awaitable do(): coro_fn() runs once per key"""
+        loop = asyncio.get_running_loop()
+        call, leader = self._join(key, lambda: _Call(asyncio.ensure_future(coro_fn()), loop))
+        if leader:
+            call.task.add_done_callback(lambda task: self._settle(key, call, task))
+            # One waiter being cancelled must not cancel the shared call
+            return await asyncio.shield(call.task)
+
+        if call.loop is loop:
+            try:
+                return await asyncio.wait_for(asyncio.shield(call.task), self.timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"in-flight call still running after {self.timeout}s") from None
+        # Led by a thread or another event loop: wait off this loop
+        if not await loop.run_in_executor(None, call.done.wait, self.timeout):
+            raise TimeoutError(f"in-flight call still running after {self.timeout}s")
+        return call.outcome()
+
+    def _join(self, key, new_call=_Call):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = new_call()
+            else:
+                call.waiters += 1
+        if not leader and self.on_shared:
+            self.on_shared(key)
+        return call, leader
+
+    def _settle(self, key, call, task):
+        if task.cancelled():
+            call.error = asyncio.CancelledError()
+        elif task.exception() is not None:
+            call.error = task.exception()
+        else:
+            call.result = task.result()
+        self._finish(key, call)
+
+    def _finish(self, key, call):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.done.set()
@@ -0,0 +1,184 @@
+"""
+ResearchHub AI - Precomputed collaborator suggestions
+The top-k matches of every researcher are stored in user_suggestion, so
+the dashboard and suggestions page read them with one indexed query instead
+of scoring profiles on every view.
+
+`flask matching suggestions` (run nightly from cron or any scheduler)
+recomputes everyone in chunks, one matrix product per chunk. In between,
+profile edits refresh only the users they can affect: the edited users
+themselves, users who currently list them, and users they now outscore.
+"""
+import threading
+from datetime import datetime
+from app.metrics import metrics
+
+DEFAULT_K = 20
+DEFAULT_CHUNK = 256
+# SQLite caps bound parameters per statement
+_IN_CHUNK = 500
+
+def _session():
+    """A session of its own: refreshes run after commit and in background tasks"""
+    from sqlalchemy.orm import Session
+    from app import db
+    return Session(db.engine)
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def store_suggestions(session, index, user_ids, k=DEFAULT_K, computed_at=None):
+    """Recompute and replace the stored suggestions of user_ids; returns rows written"""
+    from sqlalchemy import delete, insert
+    from app.models import UserSuggestion
+
+    user_ids = list(user_ids)
+    computed_at = computed_at or datetime.utcnow()
+    best = index.top_k_many(user_ids, k)
+    rows = [{'user_id': user_id, 'rank': rank, 'suggested_id': suggested_id, 'score': score,
+             'computed_at': computed_at}
+            for user_id, matches in best.items()
+            for rank, (suggested_id, score) in enumerate(matches)]
+    session.execute(delete(UserSuggestion).where(UserSuggestion.user_id.in_(user_ids)))
+    if rows:
+        session.execute(insert(UserSuggestion), rows)
+    return len(rows)
+
+def refresh_all(index, k=DEFAULT_K, chunk_size=DEFAULT_CHUNK):
+    """
+    Recompute every researcher's suggestions, one chunk per transaction
+    (readers see old or new rows, never none), then drop rows of
+    researchers who left the index. Returns (users, rows written).
+    """
+    from sqlalchemy import delete
+    from app.models import UserSuggestion
+
+    started = datetime.utcnow()
+    with index._lock:
+        user_ids = index.ids[:index.size].tolist()
+    written = 0
+    with _session() as session:
+        for chunk in _chunks(user_ids, chunk_size):
+            written += store_suggestions(session, index, chunk, k, started)
+            session.commit()
+        session.execute(delete(UserSuggestion).where(UserSuggestion.computed_at < started))
+        session.commit()
+    return len(user_ids), written
+
+def affected_users(session, index, changed_ids, k=DEFAULT_K):
+    """
+    Users whose top-k can change after the profiles in changed_ids were
+    edited, added or removed
+    """
+    from sqlalchemy import select
+    from app.models import UserSuggestion
+
+    changed_ids = set(changed_ids)
+    affected = set(changed_ids)
+    for chunk in _chunks(changed_ids, _IN_CHUNK):
+        affected.update(session.scalars(select(UserSuggestion.user_id).where(
+            UserSuggestion.suggested_id.in_(chunk))))
+
+    with index._lock:
+        vectors = [index.matrix[index.rows[user_id]] for user_id in changed_ids if user_id in index.rows]
+    if not vectors:
+        return affected
+    ids, similarity = index.similarities(vectors)
+    candidates = {int(user_id): float(score) for user_id, score in zip(ids.tolist(), similarity.tolist())
+                  if score >= index.min_score and user_id not in affected}
+    for chunk in _chunks(candidates, _IN_CHUNK):
+        # Score of each candidate's current k-th suggestion; fewer than k means any match gets in
+        kth = dict(session.execute(select(UserSuggestion.user_id, UserSuggestion.score).where(
+            UserSuggestion.user_id.in_(chunk), UserSuggestion.rank == k - 1)).all())
+        affected.update(user_id for user_id in chunk if candidates[user_id] > kth.get(user_id, -1.0))
+    return affected
+
+def refresh_users(index, changed_ids, k=DEFAULT_K, chunk_size=DEFAULT_CHUNK):
+    """Incremental refresh after profile edits; returns the number of users recomputed"""
+    with _session() as session:
+        affected = affected_users(session, index, changed_ids, k)
+        for chunk in _chunks(affected, chunk_size):
+            store_suggestions(session, index, chunk, k)
+            session.commit()
+    metrics.inc('suggestion_refresh_users_total', len(affected))
+    return len(affected)
+
+class SuggestionRefresher:
+    """Collects edited profile ids and refreshes suggestions in batches in the background"""
+
+    def __init__(self, app, k=DEFAULT_K, chunk_size=DEFAULT_CHUNK, delay=5.0):
+        self.app = app
+        self.k = k
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.pending = set()
+        self._lock = threading.Lock()
+        self._scheduled = False
+
+    @classmethod
+    def from_config(cls, app):
+        return cls(app, k=app.config.get('SUGGESTIONS_K', DEFAULT_K),
+                   chunk_size=app.config.get('SUGGESTIONS_CHUNK', DEFAULT_CHUNK),
+                   delay=app.config.get('SUGGESTIONS_REFRESH_DELAY', 5))
+
+    def record(self, user_ids):
+        """Queue a refresh for profiles that changed (called after commit)"""
+        with self._lock:
+            self.pending.update(user_ids)
+            if self._scheduled or not self.delay:
+                schedule = False
+            else:
+                schedule = self._scheduled = True
+        if not self.delay:
+            self.flush()
+        elif schedule:
+            from app import socketio
+
+            def run():
+                socketio.sleep(self.delay)
+                self.flush()
+
+            socketio.start_background_task(run)
+
+    def flush(self):
+        """Refresh everything queued so far; returns the number of users recomputed"""
+        from app.services.matching import get_profile_index
+
+        with self._lock:
+            changed, self.pending, self._scheduled = self.pending, set(), False
+        if not changed:
+            return 0
+        with self.app.app_context():
+            try:
+                return refresh_users(get_profile_index(), changed, self.k, self.chunk_size)
+            except Exception as e:
+                print(f"⚠️  Could not refresh suggestions for {len(changed)} profiles: {e}")
+                return 0
+
+def get_refresher(app):
+    refresher = app.extensions.get('suggestion_refresher')
+    if refresher is None:
+        refresher = app.extensions.setdefault('suggestion_refresher', SuggestionRefresher.from_config(app))
+    return refresher
+
+def get_suggestions(user, limit=10):
+    """
+    [{'user', 'common_tags', 'score'}] from the precomputed table, best
+    first; computed live for users the batch job has not reached yet
+    """
+    from app import db
+    from app.models import User, UserSuggestion
+    from app.services.matching import common_tags, suggest_researchers
+
+    rows = db.session.query(UserSuggestion.score, User).join(
+        User, User.id == UserSuggestion.suggested_id).filter(
+        UserSuggestion.user_id == user.id, User.is_active == True).order_by(
+        UserSuggestion.rank).limit(limit).all()
+    if not rows:
+        metrics.inc('suggestion_reads_total', source='live')
+        return suggest_researchers(user, limit)
+    metrics.inc('suggestion_reads_total', source='table')
+    return [{'user': other, 'common_tags': common_tags(user, other), 'score': score}
+            for score, other in rows]
@@ -6,6 +6,9 @@ from flask_socketio import emit, join_room, leave_room
 from flask_login import current_user
 from app import db
 from app.models import Message
+from app.metrics import timed_socket_event
+from app.services.read_state import is_project_member, mark_read
+from app.services.search import conversation_of
 from datetime import datetime
 
 def register_handlers(socketio):
@@ -25,6 +28,7 @@ def register_handlers(socketio):
             print(f"❌ User {current_user.id} disconnected")
     
     @socketio.on('join_chat')
+    @timed_socket_event('join_chat')
     def handle_join_chat(data):
         """Join chat room (user or project)"""
         if not current_user.is_authenticated:
@@ -40,6 +44,7 @@ def register_handlers(socketio):
         emit('joined_chat', {'room': room_name}, room=room_name)
     
     @socketio.on('leave_chat')
+    @timed_socket_event('leave_chat')
     def handle_leave_chat(data):
         """Leave chat room"""
         if not current_user.is_authenticated:
@@ -54,6 +59,7 @@ def register_handlers(socketio):
         print(f"👋 User {current_user.id} left {room_name}")
     
     @socketio.on('send_message')
+    @timed_socket_event('send_message')
     def handle_send_message(data):
         """Send message in real-time"""
         if not current_user.is_authenticated:
@@ -113,6 +119,7 @@ def register_handlers(socketio):
             emit('error', {'message': 'Failed to send message'})
     
     @socketio.on('typing')
+    @timed_socket_event('typing')
     def handle_typing(data):
         """Handle typing indicator"""
         if not current_user.is_authenticated:
@@ -131,21 +138,33 @@ def register_handlers(socketio):
         }, room=room_name, include_self=False)
     
     @socketio.on('mark_read')
+    @timed_socket_event('mark_read')
     def handle_mark_read(data):
-        """Mark messages as read"""
+        """Mark a conversation read up to a message (moves the read watermark)"""
         if not current_user.is_authenticated:
             return
         
-        message_ids = data.get('message_ids', [])
+        # Older clients send every id they displayed; only the newest matters
+        message_ids = data.get('message_ids') or []
+        try:
+            last_read_id = int(data.get('last_read_id') or max(map(int, message_ids), default=0))
+        except (TypeError, ValueError):
+            emit('error', {'message': 'Invalid message id'})
+            return
         
         try:
-            Message.query.filter(
-                Message.id.in_(message_ids),
-                Message.recipient_id == current_user.id
-            ).update({'is_read': True}, synchronize_session=False)
+            message = db.session.get(Message, last_read_id) if last_read_id else None
+            if message is None or current_user.id not in (message.sender_id, message.recipient_id) \
+                    and not is_project_member(current_user.id, message.project_id):
+                return
             
+            kind, conversation_id = conversation_of(message, current_user.id)
+            mark_read(db.session, current_user.id, kind, conversation_id, message.id)
             db.session.commit()
-            emit('messages_marked_read', {'message_ids': message_ids})
+            emit('messages_marked_read', {
+                'conversation': {'type': kind, 'id': conversation_id},
+                'last_read_id': message.id
+            })
             
         except Exception as e:
             db.session.rollback()
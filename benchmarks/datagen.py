@@ -0,0 +1,210 @@
+"""
+ResearchHub AI - Synthetic data generator for benchmarks
+
+Seeds realistic volumes of users, research domains, projects, memberships,
+collaboration requests, messages and papers using bulk inserts.
+
+    python -m benchmarks.datagen --scale medium --database sqlite:///bench.db
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+
+SCALES = {
+    # users, projects per user, messages per user, papers per user
+    'tiny': (30, 0.3, 5, 0.5),
+    'small': (300, 0.3, 20, 0.5),
+    'medium': (3000, 0.3, 30, 0.5),
+    'large': (30000, 0.3, 40, 0.5),
+}
+
+DOMAINS = [
+    'Machine Learning', 'Deep Learning', 'Natural Language Processing', 'Computer Vision',
+    'Reinforcement Learning', 'Robotics', 'Data Mining', 'Information Retrieval',
+    'Distributed Systems', 'Computer Networks', 'Cybersecurity', 'Cryptography',
+    'Databases', 'Software Engineering', 'Human-Computer Interaction', 'Bioinformatics',
+    'Computational Biology', 'Quantum Computing', 'Edge Computing', 'Internet of Things',
+    'Blockchain', 'Graph Neural Networks', 'Federated Learning', 'Explainable AI',
+    'Speech Recognition', 'Signal Processing', 'Climate Modeling', 'Computational Physics',
+    'Operations Research', 'Optimization', 'Statistics', 'Econometrics',
+]
+
+INSTITUTIONS = [
+    'MIT', 'Stanford University', 'IIT Bombay', 'IIT Delhi', 'ETH Zurich', 'University of Tokyo',
+    'Tsinghua University', 'University of Oxford', 'University of Toronto', 'EPFL',
+    'National University of Singapore', 'TU Munich', 'University of Cape Town', 'KAIST',
+]
+
+FIRST_NAMES = ['Aarav', 'Priya', 'Wei', 'Maria', 'James', 'Fatima', 'Kenji', 'Olga', 'Lucas',
+               'Amara', 'Noah', 'Sofia', 'Ravi', 'Chen', 'Elena', 'Omar', 'Ana', 'Yuki']
+LAST_NAMES = ['Sharma', 'Zhang', 'Garcia', 'Smith', 'Khan', 'Tanaka', 'Ivanova', 'Silva',
+              'Okafor', 'Müller', 'Rossi', 'Patel', 'Kim', 'Nguyen', 'Haddad', 'Costa']
+
+WORDS = ('model data system approach results method analysis network training evaluation '
+         'performance baseline dataset experiment framework learning accuracy latency '
+         'robust scalable efficient novel proposed significant improvement').split()
+
+SECTIONS = ['abstract', 'introduction', 'problem_statement', 'literature_review',
+            'methodology', 'results', 'conclusion', 'future_work', 'references']
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+def generate(db, scale='small', seed=42, batch_size=5000):
+    """
+    Seed the database bound to db (inside an app context)
+
+    Returns a summary dict with row counts and the id of a "benchmark user"
+    who owns projects, papers and conversations.
+    """
+    from app.models import (User, Project, Paper, Message, project_members,
+                            collaboration_requests)
+    from app.services.read_state import watermarks_from_flags
+    from werkzeug.security import generate_password_hash
+
+    n_users, projects_per_user, messages_per_user, papers_per_user = SCALES[scale]
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    password_hash = generate_password_hash('benchmark')
+
+    def bulk(target, rows):
+        for i in range(0, len(rows), batch_size):
+            db.session.execute(insert(target), rows[i:i + batch_size])
+
+    first_user_id = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+    user_ids = list(range(first_user_id, first_user_id + n_users))
+    bulk(User, [{
+        'id': uid,
+        'email': f'researcher{uid}@bench.example.org',
+        'password_hash': password_hash,
+        'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+        'institution': rng.choice(INSTITUTIONS),
+        'bio': _text(rng, 30),
+        'research_domains': ', '.join(rng.sample(DOMAINS, rng.randint(1, 4))),
+        'current_interests': _text(rng, 8),
+        'availability': rng.choice(['Solo', 'Team']),
+        'role': 'User',
+        'is_active': True,
+        'created_at': now - timedelta(days=rng.randint(0, 700)),
+        'last_seen': now - timedelta(hours=rng.randint(0, 2000)),
+    } for uid in user_ids])
+
+    bench_user_id = user_ids[0]
+
+    n_projects = int(n_users * projects_per_user)
+    first_project_id = (db.session.query(db.func.max(Project.id)).scalar() or 0) + 1
+    project_ids = list(range(first_project_id, first_project_id + n_projects))
+    project_owner = {pid: (bench_user_id if i < 10 else rng.choice(user_ids))
+                     for i, pid in enumerate(project_ids)}
+    bulk(Project, [{
+        'id': pid,
+        'title': f'Project {pid}: {_text(rng, 5)}',
+        'abstract': _text(rng, 60),
+        'keywords': ', '.join(rng.sample(DOMAINS, 3)),
+        'project_type': 'Team',
+        'status': rng.choice(['Draft', 'Active', 'Active', 'Completed']),
+        'owner_id': owner,
+        'created_at': now - timedelta(days=rng.randint(0, 500)),
+        'updated_at': now - timedelta(days=rng.randint(0, 30)),
+    } for pid, owner in project_owner.items()])
+
+    memberships = set()
+    for pid, owner in project_owner.items():
+        memberships.add((owner, pid, 'Lead'))
+        for uid in rng.sample(user_ids, min(len(user_ids), rng.randint(1, 8))):
+            if uid != owner:
+                memberships.add((uid, pid, 'Contributor'))
+    bulk(project_members, [{'user_id': u, 'project_id': p, 'role': r, 'joined_at': now}
+                           for u, p, r in memberships])
+    members_by_project = {}
+    for uid, pid, _ in memberships:
+        members_by_project.setdefault(pid, []).append(uid)
+
+    requests = set()
+    for uid in rng.sample(user_ids, min(len(user_ids), n_users // 3 + 1)):
+        other = rng.choice(user_ids)
+        if other != uid:
+            requests.add((uid, other))
+    for other in rng.sample(user_ids[1:], min(len(user_ids) - 1, 15)):
+        requests.add((other, bench_user_id))
+    bulk(collaboration_requests, [{
+        'sender_id': s, 'receiver_id': r, 'status': rng.choice(['pending', 'accepted']),
+        'message': _text(rng, 12), 'created_at': now - timedelta(days=rng.randint(0, 60))
+    } for s, r in requests])
+
+    messages = []
+    bench_partners = rng.sample(user_ids[1:], min(len(user_ids) - 1, 40))
+    for partner in bench_partners:
+        for i in range(rng.randint(5, 60)):
+            sender, recipient = (partner, bench_user_id) if i % 2 else (bench_user_id, partner)
+            messages.append((sender, recipient, None))
+    for _ in range(n_users * messages_per_user):
+        if rng.random() < 0.7:
+            sender, recipient = rng.sample(user_ids, 2)
+            messages.append((sender, recipient, None))
+        else:
+            pid = rng.choice(project_ids)
+            messages.append((rng.choice(members_by_project[pid]), None, pid))
+    start = now - timedelta(days=90)
+    step = timedelta(days=90) / max(len(messages), 1)
+    bulk(Message, [{
+        'content': _text(rng, rng.randint(3, 40)),
+        'sender_id': s, 'recipient_id': r, 'project_id': p,
+        'message_type': 'text', 'is_read': i < len(messages) * 0.8,  # all but the latest
+        'created_at': start + step * i,
+    } for i, (s, r, p) in enumerate(messages)])
+    watermarks_from_flags(db.session.connection())
+
+    paper_rows = []
+    for i in range(int(n_users * papers_per_user)):
+        author = bench_user_id if i < 12 else rng.choice(user_ids)
+        row = {
+            'title': f'{_text(rng, 8)[:-1]}',
+            'domain': rng.choice(DOMAINS),
+            'keywords': ', '.join(rng.sample(DOMAINS, 3)),
+            'objective': _text(rng, 25),
+            'method_type': rng.choice(['Experimental', 'Theoretical', 'Survey', 'Case Study']),
+            'status': rng.choice(['Draft', 'Review', 'Final']),
+            'ai_generated': rng.random() < 0.6,
+            'author_id': author,
+            'project_id': rng.choice(project_ids) if project_ids and rng.random() < 0.5 else None,
+            'created_at': now - timedelta(days=rng.randint(0, 300)),
+            'updated_at': now - timedelta(days=rng.randint(0, 30)),
+            'last_reviewed': now - timedelta(days=rng.randint(0, 30)) if rng.random() < 0.5 else None,
+        }
+        for section in SECTIONS:
+            row[section] = '\n\n'.join(_text(rng, 120) for _ in range(rng.randint(1, 5)))
+        paper_rows.append(row)
+    bulk(Paper, paper_rows)
+
+    db.session.commit()
+    return {
+        'scale': scale,
+        'users': n_users,
+        'projects': n_projects,
+        'memberships': len(memberships),
+        'collaboration_requests': len(requests),
+        'messages': len(messages),
+        'papers': len(paper_rows),
+        'bench_user_id': bench_user_id,
+        'bench_partner_id': bench_partners[0] if bench_partners else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a ResearchHub database with synthetic data')
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database', help='SQLAlchemy URL (default: DATABASE_URL / config)')
+    args = parser.parse_args()
+
+    if args.database:
+        os.environ['DATABASE_URL'] = args.database
+    from app import create_app, db
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    with app.app_context():
+        print(generate(db, scale=args.scale, seed=args.seed))
+
+if __name__ == '__main__':
+    main()
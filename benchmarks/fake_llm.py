@@ -0,0 +1,204 @@
+"""
+ResearchHub AI - Fake LLM server for offline benchmarks
+
+Speaks enough of the Ollama (/api/tags, /api/generate) and OpenAI
+(/v1/chat/completions) HTTP APIs for AIService, with configurable
+time-to-first-token and token rate so generation cost is realistic but
+deterministic.
+
+    python -m benchmarks.fake_llm --port 11434 --latency 0.3 --tokens-per-second 40
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REVIEW_JSON = {
+    "overall_score": 7,
+    "findings": [
+        {"type": "clarity", "severity": "medium", "section": "introduction",
+         "issue": "Contribution statement is vague", "suggestion": "List contributions explicitly"},
+        {"type": "completeness", "severity": "low", "section": "methodology",
+         "issue": "Hyperparameters missing", "suggestion": "Add a hyperparameter table"},
+    ],
+    "strengths": ["Clear motivation", "Relevant related work"],
+    "improvements": ["Quantify results", "Tighten the abstract"],
+}
+
+FILLER = ('The proposed framework demonstrates consistent improvements over strong baselines '
+          'across all evaluated settings. ').split()
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 1024  # accept bursts of concurrent clients
+
+class FakeLLMServer:
+    """Threaded fake LLM endpoint; use as a context manager or start()/stop()"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.05, tokens_per_second=200.0,
+                 max_output_tokens=None, load_time=0.0, json_schema=True):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.max_output_tokens = max_output_tokens
+        self.load_time = load_time
+        # False: answer 400 to a JSON schema in 'format', like Ollama before 0.5
+        self.json_schema = json_schema
+        self.loaded = set()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.httpd = _Server((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def load(self, model):
+        """Simulate Ollama loading a model on its first use; returns seconds spent"""
+        with self._lock:
+            cold = model not in self.loaded
+            self.loaded.add(model)
+        if cold and self.load_time:
+            time.sleep(self.load_time)
+            return self.load_time
+        return 0.0
+
+    def completion(self, prompt, max_tokens):
+        """Simulate generation: sleep for latency + tokens / rate"""
+        with self._lock:
+            self.requests += 1
+
+        if 'JSON' in prompt:
+            text = json.dumps(REVIEW_JSON)
+            tokens = len(text) // 4
+        else:
+            tokens = max_tokens or 256
+            if self.max_output_tokens:
+                tokens = min(tokens, self.max_output_tokens)
+            text = ' '.join(FILLER[i % len(FILLER)] for i in range(tokens))
+
+        time.sleep(self.latency + tokens / self.tokens_per_second)
+        return text, max(1, len(prompt) // 4), tokens
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _json(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _ndjson(self, chunks):
+                body = b''.join(json.dumps(chunk).encode() + b'\n' for chunk in chunks)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self):
+                length = int(self.headers.get('Content-Length', 0))
+                return json.loads(self.rfile.read(length) or b'{}')
+
+            def do_GET(self):
+                if self.path == '/api/tags':
+                    self._json({'models': [{'name': 'mistral:latest'}]})
+                elif self.path == '/v1/models':
+                    self._json({'object': 'list', 'data': [{'id': 'gpt-3.5-turbo', 'object': 'model'}]})
+                else:
+                    self._json({'error': 'not found'}, 404)
+
+            def do_POST(self):
+                data = self._body()
+                if self.path == '/api/generate':
+                    if isinstance(data.get('format'), dict) and not server.json_schema:
+                        self._json({'error': 'invalid format: expected "json" or a valid JSON schema'}, 400)
+                        return
+                    options = data.get('options', {})
+                    started = time.perf_counter()
+                    load = server.load(data.get('model'))
+                    if 'prompt' not in data:
+                        # Prompt-less request: load the model only (warm-up)
+                        self._json({'model': data.get('model'), 'response': '', 'done': True,
+                                    'load_duration': int(load * 1e9)})
+                        return
+                    text, prompt_tokens, tokens = server.completion(
+                        data.get('prompt', ''), options.get('num_predict'))
+                    if data.get('stream'):
+                        self._ndjson([{'model': data.get('model'), 'response': word + ' ', 'done': False}
+                                      for word in text.split()] +
+                                     [{'model': data.get('model'), 'response': '', 'done': True,
+                                       'prompt_eval_count': prompt_tokens, 'eval_count': tokens}])
+                        return
+                    self._json({
+                        'model': data.get('model'),
+                        'response': text,
+                        'done': True,
+                        'prompt_eval_count': prompt_tokens,
+                        'eval_count': tokens,
+                        'total_duration': int((time.perf_counter() - started) * 1e9),
+                        'load_duration': int(load * 1e9),
+                    })
+                elif self.path == '/v1/chat/completions':
+                    prompt = '\n'.join(m.get('content', '') for m in data.get('messages', []))
+                    text, prompt_tokens, tokens = server.completion(prompt, data.get('max_tokens'))
+                    self._json({
+                        'id': 'chatcmpl-bench',
+                        'object': 'chat.completion',
+                        'created': int(time.time()),
+                        'model': data.get('model'),
+                        'choices': [{'index': 0, 'finish_reason': 'stop',
+                                     'message': {'role': 'assistant', 'content': text}}],
+                        'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': tokens,
+                                  'total_tokens': prompt_tokens + tokens},
+                    })
+                else:
+                    self._json({'error': 'not found'}, 404)
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Ollama/OpenAI server for benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--latency', type=float, default=0.3, help='seconds before the first token')
+    parser.add_argument('--tokens-per-second', type=float, default=40.0)
+    parser.add_argument('--max-output-tokens', type=int, help='cap on generated tokens')
+    parser.add_argument('--load-time', type=float, default=0.0,
+                        help='seconds to "load" each model on its first request')
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.host, args.port, args.latency, args.tokens_per_second,
+                           args.max_output_tokens, args.load_time)
+    print(f'Fake LLM listening on {server.url}')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
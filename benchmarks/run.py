@@ -0,0 +1,180 @@
+"""
+ResearchHub AI - Benchmark runner
+
+Seeds a synthetic dataset, starts a fake LLM server and times the main
+user-facing routes through the Flask test client. Runs fully offline and
+prints (or writes) a JSON report for tracking regressions across commits.
+
+    python -m benchmarks.run --scale small --iterations 20 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Default to a private in-memory database; must be set before config is imported
+os.environ.setdefault('TEST_DATABASE_URL', 'sqlite://')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def scenarios(summary, paper_id):
+    """(name, method, url, form data, iterations scale) for each benchmark"""
+    partner = summary['bench_partner_id']
+    return [
+        ('dashboard', 'GET', '/dashboard/', None, 1),
+        ('discover', 'GET', '/research/discover', None, 1),
+        ('discover_search', 'GET', '/research/discover?q=Learning', None, 1),
+        ('inbox', 'GET', '/chat/', None, 1),
+        ('chat_page', 'GET', f'/chat/user/{partner}', None, 1),
+        ('chat_history', 'GET', f'/chat/history/{partner}', None, 1),
+        ('chat_search', 'GET', '/chat/search?q=results', None, 1),
+        ('paper_list', 'GET', '/paper/', None, 1),
+        ('paper_view', 'GET', f'/paper/{paper_id}', None, 1),
+        ('paper_search', 'GET', '/paper/search?q=model+evaluation', None, 1),
+        ('paper_generate', 'POST', f'/paper/{paper_id}/generate',
+         {'sections': ['abstract', 'introduction', 'conclusion']}, 0.25),
+        ('paper_review', 'GET', f'/paper/{paper_id}/review', None, 0.25),
+        ('paper_export', 'GET', f'/paper/{paper_id}/export?format=ieee', None, 0.5),
+    ]
+
+def run_benchmarks(scale='small', iterations=20, warmup=2, llm_latency=0.05,
+                   tokens_per_second=400.0, max_output_tokens=64, only=None):
+    """Run all benchmarks and return the JSON-serialisable report"""
+    from app import create_app, db
+    from app.metrics import metrics
+    from benchmarks.datagen import generate
+    from benchmarks.fake_llm import FakeLLMServer
+
+    app = create_app('testing')
+    app.config['SQLALCHEMY_ECHO'] = False
+
+    with FakeLLMServer(latency=llm_latency, tokens_per_second=tokens_per_second,
+                       max_output_tokens=max_output_tokens) as llm, app.app_context():
+        # Benchmarks repeat AI requests back to back; admission control would
+        # turn them away with 429 once the user's token bucket is empty
+        app.config.update(LLM_PROVIDER='ollama', OLLAMA_BASE_URL=llm.url, RATELIMIT_ENABLED=False)
+        db.create_all()
+
+        started = time.perf_counter()
+        summary = generate(db, scale=scale)
+        seed_seconds = time.perf_counter() - started
+
+        # What the nightly `flask matching suggestions` job leaves behind
+        from app.services.matching import get_profile_index
+        from app.services.suggestions import refresh_all
+        started = time.perf_counter()
+        refresh_all(get_profile_index(), app.config['SUGGESTIONS_K'], app.config['SUGGESTIONS_CHUNK'])
+        suggestions_seconds = time.perf_counter() - started
+
+        # Bulk inserts bypass the ORM, so index them as `flask search reindex` would
+        from app.services.search import reindex
+        reindex(db.session)
+
+        from app.models import Paper
+        paper_id = db.session.query(Paper.id).filter_by(
+            author_id=summary['bench_user_id']).order_by(Paper.id).first()[0]
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(summary['bench_user_id'])
+            session['_fresh'] = True
+
+        results = {}
+        for name, method, url, data, weight in scenarios(summary, paper_id):
+            if only and name not in only:
+                continue
+            runs = max(1, int(iterations * weight))
+            timings, queries, llm_calls = [], [], []
+            for i in range(warmup + runs):
+                queries_before = metrics.get('db_queries_total') or 0
+                llm_before = llm.requests
+                # Fresh app context per request: own session and flask.g,
+                # as in production
+                with app.app_context():
+                    t0 = time.perf_counter()
+                    response = client.open(url, method=method, data=data)
+                    elapsed = time.perf_counter() - t0
+                if response.status_code >= 400:
+                    raise RuntimeError(f'{name}: {method} {url} returned {response.status_code}')
+                if i >= warmup:
+                    timings.append(elapsed * 1000)
+                    queries.append((metrics.get('db_queries_total') or 0) - queries_before)
+                    llm_calls.append(llm.requests - llm_before)
+
+            results[name] = {
+                'method': method,
+                'url': url,
+                'iterations': runs,
+                'mean_ms': round(statistics.fmean(timings), 3),
+                'p50_ms': round(_percentile(timings, 50), 3),
+                'p95_ms': round(_percentile(timings, 95), 3),
+                'max_ms': round(max(timings), 3),
+                'queries': max(queries),
+                'llm_calls': max(llm_calls),
+            }
+
+        db.session.remove()
+        db.drop_all()
+
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'scale': scale,
+            'iterations': iterations,
+            'warmup': warmup,
+            'llm_latency_s': llm_latency,
+            'llm_tokens_per_second': tokens_per_second,
+            'llm_max_output_tokens': max_output_tokens,
+            'database': app.config['SQLALCHEMY_DATABASE_URI'],
+        },
+        'dataset': dict(summary, seed_seconds=round(seed_seconds, 3),
+                        suggestions_seconds=round(suggestions_seconds, 3)),
+        'results': results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Run ResearchHub benchmarks')
+    parser.add_argument('--scale', default='small', help='tiny, small, medium or large')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--llm-latency', type=float, default=0.05)
+    parser.add_argument('--tokens-per-second', type=float, default=400.0)
+    parser.add_argument('--max-output-tokens', type=int, default=64)
+    parser.add_argument('--only', nargs='*', help='run only these benchmarks')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.scale, args.iterations, args.warmup, args.llm_latency,
+                            args.tokens_per_second, args.max_output_tokens, args.only)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        for name, result in report['results'].items():
+            print(f"{name:<18} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+                  f"{result['queries']:>4} queries", file=sys.stderr)
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+"""
+ResearchHub AI - Socket.IO load test for chat rooms
+
+Starts the real app (app/sockets/chat_events.py) once per async mode in a
+subprocess, opens many authenticated python-socketio client connections,
+joins user_ and project_ rooms, sends messages and typing events at a
+controlled rate and reports delivery latency, throughput and server memory.
+
+    python -m benchmarks.socket_load --clients 1000 --rate 200 --duration 30 \\
+        --modes threading eventlet gevent --output socket_load.json
+
+Clients authenticate with a Flask session cookie signed with the server's
+SECRET_KEY, so no password hashing is needed per connection. Raise the
+open-files limit (ulimit -n) before running thousands of clients.
+"""
+import sys
+
+# The server child (--serve MODE) must monkey-patch before socket,
+# threading and friends are imported below, or they keep blocking versions
+if __name__ == '__main__' and '--serve' in sys.argv[:-1]:
+    _mode = sys.argv[sys.argv.index('--serve') + 1]
+    if _mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif _mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+
+SECRET_KEY = 'socket-load-test'
+MARKER = 'loadtest'
+
+# ---------------------------------------------------------------- server side
+
+def seed(db, users, projects):
+    """Bulk-insert users 1..users and projects with round-robin membership"""
+    from sqlalchemy import insert
+    from app.models import User, Project, project_members
+
+    db.session.execute(insert(User), [{
+        'id': uid, 'email': f'load{uid}@bench.example.org', 'password_hash': 'x',
+        'name': f'Load User {uid}', 'is_active': True,
+    } for uid in range(1, users + 1)])
+    db.session.execute(insert(Project), [{
+        'id': pid, 'title': f'Load Project {pid}', 'owner_id': pid, 'status': 'Active',
+    } for pid in range(1, projects + 1)])
+    db.session.execute(insert(project_members), [{
+        'user_id': uid, 'project_id': project_for(uid, projects), 'role': 'Contributor',
+    } for uid in range(1, users + 1)])
+    db.session.commit()
+
+def project_for(user_id, projects):
+    return (user_id - 1) % projects + 1
+
+def serve(async_mode, port, users, projects):
+    """
+    Run the app with the given async mode (called in the child process,
+    already monkey-patched at import)
+    """
+    os.environ['SOCKETIO_ASYNC_MODE'] = async_mode
+    os.environ['SECRET_KEY'] = SECRET_KEY
+    os.environ['FLASK_DEBUG'] = 'False'
+    os.environ['METRICS_ENABLED'] = 'False'
+    os.environ['LLM_WARMUP'] = 'False'
+    from app import create_app, db, socketio
+
+    app = create_app('development')
+    app.config['SQLALCHEMY_ECHO'] = False
+    with app.app_context():
+        seed(db, users, projects)
+
+    socketio.run(app, host='127.0.0.1', port=port, debug=False, log_output=False,
+                 allow_unsafe_werkzeug=True)
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _rss_bytes(pid):
+    """Resident set size of a process (Linux /proc, psutil if installed)"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except Exception:
+        return None
+
+class ServerProcess:
+    """The app under test, running in a subprocess with its own database"""
+
+    def __init__(self, async_mode, users, projects):
+        self.async_mode = async_mode
+        self.port = _free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.rss_samples = []
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(self.tmpdir.name, 'load.db')}",
+                   FLASK_INSTANCE_PATH=self.tmpdir.name)
+        # A file, not a pipe: nobody reads the server's output while it runs,
+        # and a full pipe buffer would block it mid-measurement
+        self.log = open(os.path.join(self.tmpdir.name, 'server.log'), 'w+b')
+        self.proc = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.socket_load', '--serve', async_mode,
+             '--port', str(self.port), '--clients', str(users), '--projects', str(projects)],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env=env,
+            stdout=subprocess.DEVNULL, stderr=self.log
+        )
+        self._stop_sampling = threading.Event()
+
+    def wait_ready(self, timeout=60):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f'{self.async_mode} server exited: {self.log_tail()}')
+            try:
+                urllib.request.urlopen(f'{self.url}/auth/login', timeout=2)
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError(f'{self.async_mode} server did not start in {timeout}s')
+
+    def log_tail(self, size=2000):
+        self.log.flush()
+        self.log.seek(0, os.SEEK_END)
+        self.log.seek(max(0, self.log.tell() - size))
+        return self.log.read().decode(errors='replace')
+
+    def start_sampling(self, interval=0.5):
+        def sample():
+            while not self._stop_sampling.wait(interval):
+                rss = _rss_bytes(self.proc.pid)
+                if rss:
+                    self.rss_samples.append(rss)
+        threading.Thread(target=sample, daemon=True).start()
+
+    def stop(self):
+        self._stop_sampling.set()
+        self.proc.terminate()
+        try:
+            self.proc.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self.log.close()
+        self.tmpdir.cleanup()
+
+# ---------------------------------------------------------------- client side
+
+def session_cookie(user_id):
+    """Flask-Login session cookie for user_id, signed like the server does"""
+    from flask import Flask
+    from flask.sessions import SecureCookieSessionInterface
+
+    app = Flask('socket_load')
+    app.secret_key = SECRET_KEY
+    serializer = SecureCookieSessionInterface().get_signing_serializer(app)
+    return serializer.dumps({'_user_id': str(user_id), '_fresh': True})
+
+class LoadStats:
+    def __init__(self):
+        self.connected = 0
+        self.connect_errors = 0
+        self.sent = 0
+        self.typing_sent = 0
+        self.delivered = 0
+        self.server_errors = 0
+        self.latencies_ms = []
+
+async def run_clients(url, clients, projects, rate, typing_rate, duration, dm_ratio,
+                      connect_concurrency, stats):
+    import socketio
+
+    users = list(range(1, clients + 1))
+    connections = {}
+    gate = asyncio.Semaphore(connect_concurrency)
+
+    async def connect(user_id):
+        sio = socketio.AsyncClient(reconnection=False)
+
+        @sio.on('new_message')
+        async def on_message(data):
+            content = data.get('content', '')
+            if content.startswith(MARKER):
+                stats.delivered += 1
+                stats.latencies_ms.append((time.time() - float(content.split(':')[1])) * 1000)
+
+        @sio.on('error')
+        async def on_error(data):
+            stats.server_errors += 1
+
+        async with gate:
+            try:
+                await sio.connect(url, headers={'Cookie': f'session={session_cookie(user_id)}'},
+                                  transports=['websocket'], wait_timeout=30)
+                await sio.emit('join_chat', {'type': 'user', 'id': user_id})
+                await sio.emit('join_chat', {'type': 'project', 'id': project_for(user_id, projects)})
+                connections[user_id] = sio
+                stats.connected += 1
+            except Exception:
+                stats.connect_errors += 1
+
+    await asyncio.gather(*(connect(uid) for uid in users))
+    await asyncio.sleep(1)  # let room joins settle
+    connected = list(connections)
+    if not connected:
+        return
+
+    async def send_loop():
+        deadline = time.monotonic() + duration
+        interval = 1.0 / rate if rate else None
+        while interval and time.monotonic() < deadline:
+            user_id = random.choice(connected)
+            payload = {'content': f'{MARKER}:{time.time()}:{user_id}'}
+            if random.random() < dm_ratio:
+                payload['recipient_id'] = random.choice(users)
+            else:
+                payload['project_id'] = project_for(user_id, projects)
+            await connections[user_id].emit('send_message', payload)
+            stats.sent += 1
+            await asyncio.sleep(random.expovariate(1 / interval))
+
+    async def typing_loop():
+        deadline = time.monotonic() + duration
+        interval = 1.0 / typing_rate if typing_rate else None
+        while interval and time.monotonic() < deadline:
+            user_id = random.choice(connected)
+            await connections[user_id].emit('typing', {
+                'type': 'project', 'id': project_for(user_id, projects), 'is_typing': True})
+            stats.typing_sent += 1
+            await asyncio.sleep(random.expovariate(1 / interval))
+
+    await asyncio.gather(send_loop(), typing_loop())
+    await asyncio.sleep(2)  # drain in-flight deliveries
+    await asyncio.gather(*(sio.disconnect() for sio in connections.values()),
+                         return_exceptions=True)
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+def run_mode(async_mode, args):
+    """Load-test one async mode and return its result dict"""
+    server = ServerProcess(async_mode, args.clients, args.projects)
+    try:
+        server.wait_ready()
+        rss_idle = _rss_bytes(server.proc.pid)
+        server.start_sampling()
+
+        stats = LoadStats()
+        started = time.monotonic()
+        asyncio.run(run_clients(server.url, args.clients, args.projects, args.rate,
+                                args.typing_rate, args.duration, args.dm_ratio,
+                                args.connect_concurrency, stats))
+        elapsed = time.monotonic() - started
+    finally:
+        server.stop()
+
+    latencies = stats.latencies_ms
+    return {
+        'async_mode': async_mode,
+        'clients': args.clients,
+        'connected': stats.connected,
+        'connect_errors': stats.connect_errors,
+        'messages_sent': stats.sent,
+        'typing_events_sent': stats.typing_sent,
+        'deliveries': stats.delivered,
+        'server_errors': stats.server_errors,
+        'deliveries_per_second': round(stats.delivered / args.duration, 2),
+        'messages_per_second': round(stats.sent / args.duration, 2),
+        'latency_p50_ms': round(_percentile(latencies, 50), 2) if latencies else None,
+        'latency_p99_ms': round(_percentile(latencies, 99), 2) if latencies else None,
+        'latency_mean_ms': round(statistics.fmean(latencies), 2) if latencies else None,
+        'server_rss_idle_mb': round(rss_idle / 2**20, 1) if rss_idle else None,
+        'server_rss_peak_mb': round(max(server.rss_samples) / 2**20, 1) if server.rss_samples else None,
+        'wall_seconds': round(elapsed, 2),
+    }
+
+def available(async_mode):
+    return async_mode == 'threading' or importlib.util.find_spec(async_mode) is not None
+
+def main():
+    parser = argparse.ArgumentParser(description='Socket.IO chat load test')
+    parser.add_argument('--modes', nargs='*', default=['threading', 'eventlet', 'gevent'])
+    parser.add_argument('--clients', type=int, default=200, help='concurrent authenticated clients')
+    parser.add_argument('--projects', type=int, default=20, help='project rooms to spread clients over')
+    parser.add_argument('--rate', type=float, default=50, help='messages per second (all clients)')
+    parser.add_argument('--typing-rate', type=float, default=100, help='typing events per second')
+    parser.add_argument('--duration', type=float, default=20, help='seconds of sending')
+    parser.add_argument('--dm-ratio', type=float, default=0.5, help='share of direct messages')
+    parser.add_argument('--connect-concurrency', type=int, default=100)
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    parser.add_argument('--serve', metavar='ASYNC_MODE', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.clients, args.projects)
+        return
+
+    results = []
+    for mode in args.modes:
+        if not available(mode):
+            results.append({'async_mode': mode, 'skipped': f'{mode} is not installed'})
+            continue
+        print(f'⏱️  {mode}: {args.clients} clients, {args.rate} msg/s for {args.duration}s',
+              file=sys.stderr)
+        try:
+            results.append(run_mode(mode, args))
+        except RuntimeError as e:
+            results.append({'async_mode': mode, 'error': str(e)})
+
+    text = json.dumps({'config': {k: v for k, v in vars(args).items()
+                                  if k not in ('serve', 'port', 'output')},
+                       'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+if __name__ == '__main__':
+    main()
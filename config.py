@@ -19,6 +19,8 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///researchhub.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = DEBUG
+    # Manage the schema with Alembic (`flask db upgrade`) instead of db.create_all()
+    DATABASE_MIGRATIONS = os.environ.get('DATABASE_MIGRATIONS', 'False').lower() == 'true'
     
     # Session
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
@@ -35,17 +37,114 @@ class Config:
     LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'ollama')  # 'openai' or 'ollama'
     LLM_MODEL = os.environ.get('LLM_MODEL', 'mistral')
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
-    OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
+    OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')  # comma-separated for several nodes
+    OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL')  # OpenAI-compatible servers
+    # Used only while every primary backend is down: 'openai', 'ollama' or empty
+    LLM_FALLBACK_PROVIDER = os.environ.get('LLM_FALLBACK_PROVIDER')
+    LLM_FALLBACK_MODEL = os.environ.get('LLM_FALLBACK_MODEL')
+    # Per-section models, e.g. 'abstract=phi3:mini,literature_review=llama3:70b,review=mistral'
+    LLM_SECTION_MODELS = os.environ.get('LLM_SECTION_MODELS', '')
+    LLM_HEALTH_CHECK_INTERVAL = int(os.environ.get('LLM_HEALTH_CHECK_INTERVAL', 30))  # seconds, 0 = off
+    LLM_CIRCUIT_FAILURES = int(os.environ.get('LLM_CIRCUIT_FAILURES', 3))  # consecutive failures to open
+    LLM_CIRCUIT_RESET_SECONDS = int(os.environ.get('LLM_CIRCUIT_RESET_SECONDS', 30))
+    # Context window in tokens for prompt budgeting; 0 = look up per model
+    LLM_CONTEXT_WINDOW = int(os.environ.get('LLM_CONTEXT_WINDOW', 0))
+    # Share one upstream call between concurrent identical prompts
+    LLM_COALESCE = os.environ.get('LLM_COALESCE', 'True').lower() == 'true'
+    # Model lifecycle (Ollama): keep the model loaded between requests, load it
+    # in the background at startup and ping it during business hours.
+    # LLM_WARMUP only applies to the serving process (`python run.py`,
+    # `flask run`, a WSGI worker); other `flask` commands and the debug
+    # reloader's watcher process never warm up
+    OLLAMA_KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE', '30m')
+    LLM_WARMUP = os.environ.get('LLM_WARMUP', 'True').lower() == 'true'
+    LLM_KEEPWARM_HOURS = os.environ.get('LLM_KEEPWARM_HOURS', '8-19')  # local hours, empty = off
+    LLM_KEEPWARM_DAYS = os.environ.get('LLM_KEEPWARM_DAYS', '0-4')  # Monday=0, empty = every day
+    LLM_KEEPWARM_INTERVAL = int(os.environ.get('LLM_KEEPWARM_INTERVAL', 600))  # seconds, below keep_alive
+    # Per-call usage log (ai_call_log table), written in batches in the background
+    AI_CALL_LOG = os.environ.get('AI_CALL_LOG', 'True').lower() == 'true'
+    AI_CALL_LOG_FLUSH_SECONDS = float(os.environ.get('AI_CALL_LOG_FLUSH_SECONDS', 5))  # 0 = write immediately
+    AI_CALL_LOG_BATCH_SIZE = int(os.environ.get('AI_CALL_LOG_BATCH_SIZE', 200))
+    # Structured output (paper reviews): 'schema' constrains Ollama to the JSON
+    # schema (Ollama 0.5+; older servers reject it and are switched to 'json'
+    # automatically), 'json' asks for any JSON (OpenAI JSON mode), 'off'
+    LLM_JSON_MODE = os.environ.get('LLM_JSON_MODE', 'schema')
+    # Admission control for AI endpoints: token buckets (calls per minute,
+    # refilled continuously up to the burst), concurrent request caps, and a
+    # per-backend cap on in-flight generations. 429 + Retry-After when exceeded.
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'True').lower() == 'true'
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL', 'memory://')  # redis://... for several workers
+    AI_USER_RATE_PER_MINUTE = float(os.environ.get('AI_USER_RATE_PER_MINUTE', 5))
+    AI_USER_BURST = int(os.environ.get('AI_USER_BURST', 20))
+    AI_GLOBAL_RATE_PER_MINUTE = float(os.environ.get('AI_GLOBAL_RATE_PER_MINUTE', 60))
+    AI_GLOBAL_BURST = int(os.environ.get('AI_GLOBAL_BURST', 200))
+    AI_USER_MAX_CONCURRENT = int(os.environ.get('AI_USER_MAX_CONCURRENT', 2))
+    AI_MAX_CONCURRENT = int(os.environ.get('AI_MAX_CONCURRENT', 16))  # 0 = unlimited
+    AI_BUSY_RETRY_AFTER = int(os.environ.get('AI_BUSY_RETRY_AFTER', 10))  # seconds
+    LLM_BACKEND_MAX_CONCURRENT = int(os.environ.get('LLM_BACKEND_MAX_CONCURRENT', 4))  # 0 = unlimited
+    LLM_BACKEND_QUEUE_SECONDS = int(os.environ.get('LLM_BACKEND_QUEUE_SECONDS', 30))
+    # Run LLM calls on a shared asyncio loop (httpx) instead of one blocking
+    # request per worker thread; paper sections are then generated concurrently
+    LLM_ASYNC = os.environ.get('LLM_ASYNC', 'False').lower() == 'true'
     
     # SocketIO
     SOCKETIO_MESSAGE_QUEUE = None
-    SOCKETIO_ASYNC_MODE = 'threading'
+    SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE', 'threading')  # threading, eventlet, gevent
+    
+    # Instrumentation (Prometheus-style /metrics and slow-request log)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    # /metrics answers only these client addresses, or requests carrying
+    # `Authorization: Bearer <METRICS_TOKEN>` (404 for everyone else)
+    METRICS_ENDPOINT = os.environ.get('METRICS_ENDPOINT', 'True').lower() == 'true'
+    METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', 1000))
     
     # Pagination
     ITEMS_PER_PAGE = 20
     
     # Research Matching
     MIN_COMMON_TAGS = 1  # Minimum common tags for collaboration suggestion
+    # Profile vectors (hashed TF-IDF): columns, minimum cosine similarity to
+    # suggest someone, and how often each worker rebuilds its index
+    MATCHING_DIM = int(os.environ.get('MATCHING_DIM', 256))
+    MATCHING_MIN_SCORE = float(os.environ.get('MATCHING_MIN_SCORE', 0.05))
+    MATCHING_REFRESH_SECONDS = int(os.environ.get('MATCHING_REFRESH_SECONDS', 600))  # 0 = never
+    MATCHING_DISCOVER_LIMIT = int(os.environ.get('MATCHING_DISCOVER_LIMIT', 60))  # researchers per Discover page
+    # Approximate nearest-neighbour index for large directories: 'auto'
+    # (FAISS if installed, else the built-in HNSW), 'faiss', 'hnsw' or 'off'
+    MATCHING_ANN = os.environ.get('MATCHING_ANN', 'auto')
+    MATCHING_ANN_MIN_PROFILES = int(os.environ.get('MATCHING_ANN_MIN_PROFILES', 100000))
+    # Save the index so restarts only re-embed changed profiles
+    # (default directory: <instance path>/matching)
+    MATCHING_PERSIST = os.environ.get('MATCHING_PERSIST', 'true').lower() == 'true'
+    MATCHING_INDEX_DIR = os.environ.get('MATCHING_INDEX_DIR')
+    # Research-domain autocomplete: built in the background at startup,
+    # rebuilt every DOMAINS_REFRESH_SECONDS to pick up other workers' edits
+    DOMAINS_PREBUILD = os.environ.get('DOMAINS_PREBUILD', 'True').lower() == 'true'
+    DOMAINS_REFRESH_SECONDS = int(os.environ.get('DOMAINS_REFRESH_SECONDS', 600))  # 0 = never
+    # Precomputed top-k suggestions (user_suggestion table): filled by
+    # `flask matching suggestions` (schedule it nightly); profile edits
+    # refresh affected users after SUGGESTIONS_REFRESH_DELAY seconds
+    SUGGESTIONS_PRECOMPUTED = os.environ.get('SUGGESTIONS_PRECOMPUTED', 'True').lower() == 'true'
+    SUGGESTIONS_K = int(os.environ.get('SUGGESTIONS_K', 20))
+    SUGGESTIONS_CHUNK = int(os.environ.get('SUGGESTIONS_CHUNK', 256))
+    SUGGESTIONS_REFRESH_DELAY = float(os.environ.get('SUGGESTIONS_REFRESH_DELAY', 5))
+    # Dashboard counters (user_counter table) are kept current on writes and
+    # recounted in the background this often to correct drift (0 = only via
+    # `flask counters reconcile`)
+    COUNTERS_RECONCILE_SECONDS = int(os.environ.get('COUNTERS_RECONCILE_SECONDS', 3600))
+    
+    # Response cache: whole pages for anonymous visitors (landing, about,
+    # features) and per-object template fragments (papers, researcher cards)
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+    RESPONSE_CACHE_URL = os.environ.get('RESPONSE_CACHE_URL', 'memory://')  # redis://... for several workers
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 2000))  # per worker (memory://)
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 600))  # seconds
+    
+    # Link static files to the hashed copies from `flask assets build`
+    # (served precompressed with immutable caching) when a build exists
+    ASSETS_FINGERPRINT = os.environ.get('ASSETS_FINGERPRINT', 'True').lower() == 'true'
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -69,8 +168,17 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///test_researchhub.db'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'sqlite://')
+    SQLALCHEMY_ECHO = False
     WTF_CSRF_ENABLED = False
+    LLM_WARMUP = False
+    AI_CALL_LOG_FLUSH_SECONDS = 0
+    RATELIMIT_STORAGE_URL = 'memory://'
+    MATCHING_PERSIST = False
+    SUGGESTIONS_REFRESH_DELAY = 0
+    DOMAINS_PREBUILD = False
+    COUNTERS_RECONCILE_SECONDS = 0
+    RESPONSE_CACHE_URL = 'memory://'
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,65 @@
+"""
+ResearchHub AI - Alembic environment
+Binds migrations to the Flask app's SQLAlchemy engine and metadata
+"""
+import os
+from logging.config import fileConfig
+from alembic import context
+from flask import current_app
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+
+def get_app():
+    """Use the running app (flask db ...) or build one (plain alembic)"""
+    try:
+        return current_app._get_current_object()
+    except RuntimeError:
+        # Never let create_app() create tables behind Alembic's back
+        os.environ['DATABASE_MIGRATIONS'] = 'true'
+        from app import create_app
+        return create_app(os.environ.get('FLASK_ENV', 'development'))
+
+
+app = get_app()
+
+with app.app_context():
+    from app import db
+    import app.models  # noqa: F401 - register models on the metadata
+    target_metadata = db.metadata
+    engine = db.engine
+
+
+def run_migrations_offline():
+    """Emit SQL to stdout instead of executing it"""
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Run migrations against the configured database"""
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite cannot ALTER most things; batch mode recreates tables
+            render_as_batch=connection.dialect.name == 'sqlite',
+            compare_type=True
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
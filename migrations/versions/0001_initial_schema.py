@@ -0,0 +1,150 @@
+"""Initial schema (matches the tables previously created by db.create_all)
+
+Existing databases created by db.create_all() should be stamped with this
+revision (`flask db stamp 0001`) and then upgraded.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=256), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('institution', sa.String(length=200), nullable=True),
+        sa.Column('bio', sa.Text(), nullable=True),
+        sa.Column('research_domains', sa.Text(), nullable=True),
+        sa.Column('current_interests', sa.Text(), nullable=True),
+        sa.Column('availability', sa.String(length=20), nullable=True),
+        sa.Column('role', sa.String(length=20), nullable=True),
+        sa.Column('avatar_url', sa.String(length=500), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_seen', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_user_email', 'user', ['email'], unique=True)
+
+    op.create_table(
+        'project',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('abstract', sa.Text(), nullable=True),
+        sa.Column('keywords', sa.String(length=500), nullable=True),
+        sa.Column('project_type', sa.String(length=20), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table(
+        'collaboration_requests',
+        sa.Column('sender_id', sa.Integer(), nullable=False),
+        sa.Column('receiver_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['receiver_id'], ['user.id']),
+        sa.ForeignKeyConstraint(['sender_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('sender_id', 'receiver_id')
+    )
+
+    op.create_table(
+        'project_members',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=True),
+        sa.Column('joined_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['project.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('user_id', 'project_id')
+    )
+
+    op.create_table(
+        'paper',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=300), nullable=False),
+        sa.Column('domain', sa.String(length=100), nullable=True),
+        sa.Column('keywords', sa.String(length=500), nullable=True),
+        sa.Column('objective', sa.Text(), nullable=True),
+        sa.Column('method_type', sa.String(length=100), nullable=True),
+        sa.Column('abstract', sa.Text(), nullable=True),
+        sa.Column('introduction', sa.Text(), nullable=True),
+        sa.Column('problem_statement', sa.Text(), nullable=True),
+        sa.Column('literature_review', sa.Text(), nullable=True),
+        sa.Column('methodology', sa.Text(), nullable=True),
+        sa.Column('results', sa.Text(), nullable=True),
+        sa.Column('conclusion', sa.Text(), nullable=True),
+        sa.Column('future_work', sa.Text(), nullable=True),
+        sa.Column('references', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('ai_generated', sa.Boolean(), nullable=True),
+        sa.Column('author_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('review_feedback', sa.Text(), nullable=True),
+        sa.Column('last_reviewed', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['author_id'], ['user.id']),
+        sa.ForeignKeyConstraint(['project_id'], ['project.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table(
+        'message',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('sender_id', sa.Integer(), nullable=False),
+        sa.Column('recipient_id', sa.Integer(), nullable=True),
+        sa.Column('project_id', sa.Integer(), nullable=True),
+        sa.Column('message_type', sa.String(length=20), nullable=True),
+        sa.Column('is_read', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['project.id']),
+        sa.ForeignKeyConstraint(['recipient_id'], ['user.id']),
+        sa.ForeignKeyConstraint(['sender_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_message_created_at', 'message', ['created_at'])
+
+    op.create_table(
+        'ai_review',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('paper_id', sa.Integer(), nullable=False),
+        sa.Column('review_type', sa.String(length=50), nullable=True),
+        sa.Column('findings', sa.Text(), nullable=True),
+        sa.Column('severity', sa.String(length=20), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['paper_id'], ['paper.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('ai_review')
+    op.drop_index('ix_message_created_at', table_name='message')
+    op.drop_table('message')
+    op.drop_table('paper')
+    op.drop_table('project_members')
+    op.drop_table('collaboration_requests')
+    op.drop_table('project')
+    op.drop_index('ix_user_email', table_name='user')
+    op.drop_table('user')
@@ -0,0 +1,41 @@
+"""Index foreign keys and common filter columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_project_owner_id', 'project', ['owner_id']),
+    ('ix_project_status', 'project', ['status']),
+    ('ix_project_members_project_id', 'project_members', ['project_id']),
+    ('ix_collaboration_requests_receiver_id', 'collaboration_requests', ['receiver_id']),
+    ('ix_paper_author_id', 'paper', ['author_id']),
+    ('ix_paper_project_id', 'paper', ['project_id']),
+    ('ix_paper_updated_at', 'paper', ['updated_at']),
+    ('ix_paper_last_reviewed', 'paper', ['last_reviewed']),
+    ('ix_message_sender_id', 'message', ['sender_id']),
+    ('ix_message_recipient_id', 'message', ['recipient_id']),
+    ('ix_message_project_id', 'message', ['project_id']),
+    ('ix_message_recipient_unread', 'message', ['recipient_id', 'is_read']),
+    ('ix_ai_review_paper_id', 'ai_review', ['paper_id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
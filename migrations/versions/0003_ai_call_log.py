@@ -0,0 +1,48 @@
+"""AI call log for usage and capacity reports
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ai_call_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('provider', sa.String(length=20), nullable=True),
+        sa.Column('backend', sa.String(length=200), nullable=True),
+        sa.Column('model', sa.String(length=100), nullable=True),
+        sa.Column('section', sa.String(length=50), nullable=True),
+        sa.Column('prompt_version', sa.String(length=60), nullable=True),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+        sa.Column('completion_tokens', sa.Integer(), nullable=True),
+        sa.Column('latency_ms', sa.Float(), nullable=False),
+        sa.Column('cold_start', sa.Boolean(), nullable=True),
+        sa.Column('cache_hit', sa.Boolean(), nullable=True),
+        sa.Column('status', sa.String(length=10), nullable=True),
+        sa.Column('error_class', sa.String(length=100), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ai_call_log_created_at', 'ai_call_log', ['created_at'])
+    op.create_index('ix_ai_call_log_user_id', 'ai_call_log', ['user_id'])
+    op.create_index('ix_ai_call_log_model', 'ai_call_log', ['model'])
+
+
+def downgrade():
+    op.drop_index('ix_ai_call_log_model', table_name='ai_call_log')
+    op.drop_index('ix_ai_call_log_user_id', table_name='ai_call_log')
+    op.drop_index('ix_ai_call_log_created_at', table_name='ai_call_log')
+    op.drop_table('ai_call_log')
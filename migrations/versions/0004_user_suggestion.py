@@ -0,0 +1,37 @@
+"""Precomputed collaborator suggestions
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'user_suggestion',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('suggested_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.ForeignKeyConstraint(['suggested_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('user_id', 'rank')
+    )
+    op.create_index('ix_user_suggestion_suggested_id', 'user_suggestion', ['suggested_id'])
+    op.create_index('ix_user_suggestion_computed_at', 'user_suggestion', ['computed_at'])
+
+
+def downgrade():
+    op.drop_index('ix_user_suggestion_computed_at', table_name='user_suggestion')
+    op.drop_index('ix_user_suggestion_suggested_id', table_name='user_suggestion')
+    op.drop_table('user_suggestion')
@@ -0,0 +1,88 @@
+"""Full-text search documents for papers and projects
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE search_document_fts USING fts5("
+    "title, keywords, body, content='search_document', content_rowid='id', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER search_document_ai AFTER INSERT ON search_document BEGIN "
+    "INSERT INTO search_document_fts(rowid, title, keywords, body) "
+    "VALUES (new.id, new.title, new.keywords, new.body); END",
+    "CREATE TRIGGER search_document_ad AFTER DELETE ON search_document BEGIN "
+    "INSERT INTO search_document_fts(search_document_fts, rowid, title, keywords, body) "
+    "VALUES ('delete', old.id, old.title, old.keywords, old.body); END",
+    "CREATE TRIGGER search_document_au AFTER UPDATE ON search_document BEGIN "
+    "INSERT INTO search_document_fts(search_document_fts, rowid, title, keywords, body) "
+    "VALUES ('delete', old.id, old.title, old.keywords, old.body); "
+    "INSERT INTO search_document_fts(rowid, title, keywords, body) "
+    "VALUES (new.id, new.title, new.keywords, new.body); END",
+]
+POSTGRES_DDL = [
+    "ALTER TABLE search_document ADD COLUMN tsv tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(keywords, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(body, '')), 'C')) STORED",
+    "CREATE INDEX ix_search_document_tsv ON search_document USING GIN (tsv)",
+]
+
+PAPER_SECTIONS = ['objective', 'abstract', 'introduction', 'problem_statement', 'literature_review',
+                  'methodology', 'results', 'conclusion', 'future_work', 'references']
+
+
+def _joined(columns):
+    return " || ' ' || ".join(f"coalesce(\"{column}\", '')" for column in columns)
+
+
+def upgrade():
+    op.create_table(
+        'search_document',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=10), nullable=False),
+        sa.Column('object_id', sa.Integer(), nullable=False),
+        sa.Column('author_id', sa.Integer(), nullable=True),
+        sa.Column('project_id', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(length=300), nullable=True),
+        sa.Column('keywords', sa.String(length=700), nullable=True),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['author_id'], ['user.id']),
+        sa.ForeignKeyConstraint(['project_id'], ['project.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('kind', 'object_id', name='uq_search_document_object')
+    )
+    op.create_index('ix_search_document_author_id', 'search_document', ['author_id'])
+    op.create_index('ix_search_document_project_id', 'search_document', ['project_id'])
+
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_DDL, 'postgresql': POSTGRES_DDL}.get(dialect, []):
+        op.execute(statement)
+
+    # Existing papers and projects (the app keeps them current from here on)
+    op.execute(
+        "INSERT INTO search_document (kind, object_id, author_id, project_id, title, keywords, body, updated_at) "
+        f"SELECT 'paper', id, author_id, project_id, title, {_joined(['keywords', 'domain'])}, "
+        f"{_joined(PAPER_SECTIONS)}, updated_at FROM paper")
+    op.execute(
+        "INSERT INTO search_document (kind, object_id, author_id, project_id, title, keywords, body, updated_at) "
+        "SELECT 'project', id, owner_id, id, title, keywords, abstract, updated_at FROM project")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS search_document_fts")
+    op.drop_index('ix_search_document_project_id', table_name='search_document')
+    op.drop_index('ix_search_document_author_id', table_name='search_document')
+    op.drop_table('search_document')
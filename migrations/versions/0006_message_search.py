@@ -0,0 +1,47 @@
+"""Full-text index on chat messages
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE message_fts USING fts5("
+    "content, content='message', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER message_fts_ai AFTER INSERT ON message BEGIN "
+    "INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER message_fts_ad AFTER DELETE ON message BEGIN "
+    "INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER message_fts_au AFTER UPDATE OF content ON message BEGIN "
+    "INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content); END",
+    # Index the existing messages (the triggers keep it current from here on)
+    "INSERT INTO message_fts(message_fts) VALUES ('rebuild')",
+]
+POSTGRES_DDL = [
+    "CREATE INDEX ix_message_content_tsv ON message USING GIN (to_tsvector('english', content))",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_DDL, 'postgresql': POSTGRES_DDL}.get(dialect, []):
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('message_fts_ai', 'message_fts_ad', 'message_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS message_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_message_content_tsv")
@@ -0,0 +1,55 @@
+"""Per-conversation read watermarks replace per-message read flags
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'read_watermark',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=10), nullable=False),
+        sa.Column('conversation_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('last_read_message_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('user_id', 'kind', 'conversation_id')
+    )
+
+    # Everything before the first unread message of a 1-to-1 conversation
+    # counts as read; project chats were never tracked, so they start read
+    op.execute(
+        "INSERT INTO read_watermark (user_id, kind, conversation_id, last_read_message_id, updated_at) "
+        "SELECT recipient_id, 'user', sender_id, "
+        "COALESCE(MIN(CASE WHEN is_read THEN NULL ELSE id END) - 1, MAX(id)), CURRENT_TIMESTAMP "
+        "FROM message WHERE recipient_id IS NOT NULL GROUP BY recipient_id, sender_id")
+    op.execute(
+        "INSERT INTO read_watermark (user_id, kind, conversation_id, last_read_message_id, updated_at) "
+        "SELECT pm.user_id, 'project', pm.project_id, MAX(m.id), CURRENT_TIMESTAMP "
+        "FROM project_members pm JOIN message m ON m.project_id = pm.project_id "
+        "GROUP BY pm.user_id, pm.project_id")
+
+    op.create_index('ix_message_recipient_sender', 'message', ['recipient_id', 'sender_id', 'id'])
+    op.drop_index('ix_message_recipient_unread', table_name='message')
+
+
+def downgrade():
+    op.create_index('ix_message_recipient_unread', 'message', ['recipient_id', 'is_read'])
+    op.drop_index('ix_message_recipient_sender', table_name='message')
+    # Back to flags: messages at or below the watermark are read
+    op.execute(
+        "UPDATE message SET is_read = (id <= COALESCE((SELECT w.last_read_message_id "
+        "FROM read_watermark w WHERE w.user_id = message.recipient_id AND w.kind = 'user' "
+        "AND w.conversation_id = message.sender_id), 0)) WHERE recipient_id IS NOT NULL")
+    op.drop_table('read_watermark')
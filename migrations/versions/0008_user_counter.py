@@ -0,0 +1,37 @@
+"""Maintained dashboard counters
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # No backfill: a user's row is counted on first read, or for everyone
+    # by `flask counters reconcile`
+    op.create_table(
+        'user_counter',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('unread_messages', sa.Integer(), nullable=False),
+        sa.Column('pending_requests', sa.Integer(), nullable=False),
+        sa.Column('stale_reviews', sa.Integer(), nullable=False),
+        sa.Column('stale_reviews_due_at', sa.DateTime(), nullable=True),
+        sa.Column('reconciled_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_user_counter_reconciled_at', 'user_counter', ['reconciled_at'])
+
+
+def downgrade():
+    op.drop_index('ix_user_counter_reconciled_at', table_name='user_counter')
+    op.drop_table('user_counter')
@@ -0,0 +1,23 @@
+"""
+Shared pytest fixtures: app, database and client
+"""
+import pytest
+from app import create_app, db as _db
+
+@pytest.fixture
+def app():
+    """Fresh app with an empty in-memory database per test"""
+    app = create_app('testing')
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+@pytest.fixture
+def db(app):
+    return _db
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,66 @@
+"""
+Test data helpers: login and synthetic seed data sized to expose N+1 queries
+"""
+import itertools
+from app import db as _db
+from app.models import User, Project, Message, Paper, project_members, collaboration_requests
+
+_ids = itertools.count(1)
+
+def login(client, user):
+    """Authenticate the test client as user without going through the form"""
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+
+def make_user(**fields):
+    n = next(_ids)
+    user = User(
+        email=fields.pop('email', f'user{n}@example.org'),
+        name=fields.pop('name', f'Researcher {n}'),
+        institution=fields.pop('institution', 'Example University'),
+        **fields
+    )
+    # Hashing is deliberately slow; seed data never logs in with a password
+    user.password_hash = 'x'
+    _db.session.add(user)
+    return user
+
+def seed_conversations(user, count, messages_each=3):
+    """count 1-to-1 conversations with user, each with a few unread messages"""
+    partners = [make_user() for _ in range(count)]
+    _db.session.flush()
+    for partner in partners:
+        for i in range(messages_each):
+            sender, recipient = (partner, user) if i % 2 == 0 else (user, partner)
+            _db.session.add(Message(content=f'message {i}', sender_id=sender.id,
+                                    recipient_id=recipient.id))
+    _db.session.commit()
+    return partners
+
+def seed_project(owner, member_count, papers=0):
+    """Project with member_count extra members and some papers"""
+    project = Project(title='Synthetic project', owner_id=owner.id, status='Active')
+    _db.session.add(project)
+    members = [make_user() for _ in range(member_count)]
+    _db.session.flush()
+    _db.session.execute(project_members.insert(), [
+        {'user_id': owner.id, 'project_id': project.id, 'role': 'Lead'}
+    ] + [
+        {'user_id': m.id, 'project_id': project.id, 'role': 'Contributor'} for m in members
+    ])
+    for i in range(papers):
+        _db.session.add(Paper(title=f'Paper {i}', author_id=owner.id, project_id=project.id))
+    _db.session.commit()
+    return project
+
+def seed_collaboration_requests(user, count):
+    """count requests received by user and count sent by user"""
+    others = [make_user() for _ in range(count * 2)]
+    _db.session.flush()
+    _db.session.execute(collaboration_requests.insert(), [
+        {'sender_id': o.id, 'receiver_id': user.id, 'status': 'pending'} for o in others[:count]
+    ] + [
+        {'sender_id': user.id, 'receiver_id': o.id, 'status': 'pending'} for o in others[count:]
+    ])
+    _db.session.commit()
@@ -0,0 +1,49 @@
+"""
+Query-counting harness for N+1 detection
+
+    with count_queries() as queries:
+        client.get('/chat/')
+    assert len(queries) <= 3, queries.report()
+
+or, failing with the offending statements listed:
+
+    with query_budget(3):
+        client.get('/chat/')
+"""
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+
+class QueryLog(list):
+    """Statements executed inside a count_queries() block"""
+
+    def report(self):
+        lines = [f"{len(self)} queries:"]
+        lines += [f"  {i + 1}. {' '.join(sql.split())[:200]}" for i, sql in enumerate(self)]
+        return '\n'.join(lines)
+
+@contextmanager
+def count_queries():
+    """Record every SQL statement run on the app's engine"""
+    log = QueryLog()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        log.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield log
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+@contextmanager
+def query_budget(max_queries):
+    """Fail if the block issues more than max_queries statements"""
+    with count_queries() as log:
+        yield log
+    if len(log) > max_queries:
+        raise QueryBudgetExceeded(f"query budget of {max_queries} exceeded - {log.report()}")
@@ -0,0 +1,103 @@
+"""
+Approximate nearest-neighbour index: recall against the exact scan,
+tombstones, persistence and incremental sync of a saved profile index.
+"""
+import os
+import threading
+
+import numpy as np
+
+from app import db as _db
+from app.services.ann import HNSWIndex, load_ann, save_ann
+from app.services.matching import ProfileIndex, _build_lock, get_profile_index, measure_recall
+from tests.factories import make_user
+
+def _clustered(count, dim=64, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim))
+    vectors = centres[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def _profile_index(vectors):
+    index = ProfileIndex(dim=vectors.shape[1], min_score=-1.0)
+    for user_id, vector in enumerate(vectors, start=1):
+        index._put(user_id, vector)
+    return index
+
+def test_hnsw_recall_matches_exact_scan():
+    index = _profile_index(_clustered(1500))
+    index.build_ann('hnsw')
+    queries = list(_clustered(50, seed=1))
+    report = measure_recall(index, queries, k=10)
+    assert report['recall'] >= 0.95
+
+def test_removed_and_updated_vectors_are_tombstoned():
+    vectors = _clustered(300)
+    ann = HNSWIndex(vectors.shape[1])
+    ann.add_many(range(300), vectors)
+    assert ann.search(vectors[7], 1)[0][0] == 7
+    ann.remove(7)
+    assert 7 not in dict(ann.search(vectors[7], 10))
+    ann.add(8, vectors[7])
+    assert ann.search(vectors[7], 1, exclude=(9,))[0][0] == 8
+    assert len(ann) == 299 and ann.deleted_ratio == 2 / 301
+
+def test_ann_save_and_load_roundtrip(tmp_path):
+    vectors = _clustered(200)
+    ann = HNSWIndex(vectors.shape[1])
+    ann.add_many(range(200), vectors)
+    ann.remove(3)
+    save_ann(ann, str(tmp_path / 'ann'))
+    loaded = load_ann(str(tmp_path / 'ann'))
+    assert loaded.kind == 'hnsw' and loaded.deleted == {3}
+    assert loaded.search(vectors[42], 5) == ann.search(vectors[42], 5)
+    assert load_ann(str(tmp_path / 'missing')) is None
+
+def test_profile_edits_reach_the_ann_index():
+    index = ProfileIndex.build([(1, 'Machine Learning', '', ''), (2, 'Marine Biology', '', '')])
+    index.build_ann('hnsw')
+    index.upsert(3, 'Machine Learning, Robotics', '', '')
+    index.remove(1)
+    found = [user_id for user_id, _ in index.top_k(index.vector('Machine Learning', '', ''), 2)]
+    assert found == [3]
+
+def test_saved_index_syncs_only_changed_profiles(tmp_path):
+    profiles = [(1, 'Machine Learning', '', ''), (2, 'Marine Biology', '', ''), (3, 'Robotics', '', '')]
+    index = ProfileIndex.build(profiles)
+    index.build_ann('hnsw')
+    index.save(str(tmp_path))
+
+    loaded = ProfileIndex.load(str(tmp_path))
+    assert loaded.ann is not None and sorted(loaded.rows) == [1, 2, 3]
+    changed = loaded.sync([(1, 'Machine Learning', '', ''), (2, 'Computer Vision', '', ''),
+                           (4, 'Quantum Computing', '', '')])
+    assert changed == 3  # 2 edited, 4 added, 3 removed
+    assert sorted(loaded.rows) == [1, 2, 4] and sorted(loaded.ann.node_of) == [1, 2, 4]
+    assert loaded.top_k(loaded.vector('Computer Vision', '', ''), 1)[0][0] == 2
+
+def test_concurrent_saves_to_one_directory(tmp_path):
+    indexes = [ProfileIndex.build([(1, 'Machine Learning', '', ''), (user_id, 'Robotics', '', '')])
+               for user_id in range(2, 10)]
+    for index in indexes:
+        index.build_ann('hnsw')
+    threads = [threading.Thread(target=index.save, args=(str(tmp_path),)) for index in indexes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(os.listdir(tmp_path)) == ['ann.hnsw.npz', 'profiles.npz']
+    # Each file is whole; the two may come from different writers
+    assert len(ProfileIndex.load(str(tmp_path)).rows) == 2
+    assert len(load_ann(str(tmp_path / 'ann'))) == 2
+
+def test_app_index_uses_ann_above_threshold(app, tmp_path):
+    app.config.update(MATCHING_ANN='hnsw', MATCHING_ANN_MIN_PROFILES=2,
+                      MATCHING_PERSIST=True, MATCHING_INDEX_DIR=str(tmp_path))
+    make_user(research_domains='Machine Learning')
+    make_user(research_domains='Marine Biology')
+    _db.session.commit()
+    index = get_profile_index()
+    with _build_lock:
+        pass  # wait for the background build and save
+    assert index.ann is not None and len(index.ann) == 2
+    assert (tmp_path / 'profiles.npz').exists() and (tmp_path / 'ann.hnsw.npz').exists()
@@ -0,0 +1,64 @@
+"""
+Static asset pipeline: hashed copies with compressed variants, url_for
+linking to them, immutable precompressed responses, vendored scripts.
+"""
+import gzip
+import os
+
+from flask import url_for
+
+from app import assets
+
+def _static(tmp_path, css='body { color: #333; }\n' * 50):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'custom.css').write_text(css)
+    (tmp_path / 'img').mkdir()
+    (tmp_path / 'img' / 'logo.png').write_bytes(b'\x89PNG' + bytes(100))
+    (tmp_path / 'NOTES.md').write_text('not an asset')
+    return str(tmp_path)
+
+def test_build_fingerprints_compresses_and_prunes(tmp_path):
+    folder = _static(tmp_path)
+    manifest = assets.build(folder)
+    assert set(manifest) == {'css/custom.css', 'img/logo.png'}
+    css = os.path.join(folder, manifest['css/custom.css'])
+    assert manifest['css/custom.css'].startswith('dist/css/custom.') and os.path.isfile(css)
+    with open(css + '.gz', 'rb') as f:
+        assert gzip.decompress(f.read()) == (tmp_path / 'css' / 'custom.css').read_bytes()
+    assert not os.path.exists(os.path.join(folder, manifest['img/logo.png']) + '.gz')
+
+    (tmp_path / 'css' / 'custom.css').write_text('body { color: red; }\n' * 50)
+    rebuilt = assets.build(folder)
+    assert rebuilt['css/custom.css'] != manifest['css/custom.css']
+    assert not os.path.exists(css) and not os.path.exists(css + '.gz')
+
+def test_hashed_assets_are_linked_and_served_immutable(app, client, tmp_path):
+    app.static_folder = _static(tmp_path)
+    manifest = assets.build(app.static_folder)
+    assets.load_manifest(app)
+    with app.test_request_context():
+        url = url_for('static', filename='css/custom.css')
+        assert url == '/static/' + manifest['css/custom.css']
+        assert url_for('static', filename='img/missing.png') == '/static/img/missing.png'
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200 and response.content_encoding == 'gzip'
+    assert response.mimetype == 'text/css' and 'Accept-Encoding' in response.vary
+    assert response.cache_control.immutable and response.cache_control.max_age == assets.IMMUTABLE_MAX_AGE
+    assert gzip.decompress(response.get_data()) == (tmp_path / 'css' / 'custom.css').read_bytes()
+    plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert plain.content_encoding is None and plain.get_data() == (tmp_path / 'css' / 'custom.css').read_bytes()
+
+def test_vendored_scripts_load_locally_once_vendored(app, tmp_path):
+    app.static_folder = str(tmp_path)
+    with app.test_request_context():
+        assert assets.asset_url('vendor/socket.io.min.js').startswith('https://cdn.socket.io/')
+
+    script = tmp_path / 'socket.io.min.js'
+    script.write_text('/* socket.io client */')
+    [integrity] = assets.vendor(app.static_folder, {'vendor/socket.io.min.js': str(script)}).values()
+    assert integrity.startswith('sha384-')
+    assets.build(app.static_folder)
+    assets.load_manifest(app)
+    with app.test_request_context():
+        assert assets.asset_url('vendor/socket.io.min.js').startswith('/static/dist/vendor/socket.io.min.')
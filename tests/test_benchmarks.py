@@ -0,0 +1,15 @@
+"""
+Smoke test keeping the benchmark suite runnable
+"""
+import json
+from benchmarks.run import run_benchmarks, scenarios
+
+def test_benchmarks_run_offline():
+    report = run_benchmarks(scale='tiny', iterations=1, warmup=0, llm_latency=0,
+                            tokens_per_second=10000, max_output_tokens=8)
+
+    json.dumps(report)
+    names = [name for name, *_ in scenarios({'bench_partner_id': 1}, 1)]
+    assert sorted(report['results']) == sorted(names)
+    assert report['results']['paper_generate']['llm_calls'] == 3
+    assert report['results']['paper_review']['llm_calls'] == 1
@@ -0,0 +1,71 @@
+"""
+AI call log: one row per LLM call, batched writes and the usage report.
+"""
+import atexit
+import json
+import threading
+from datetime import datetime, timedelta
+
+from app.models import AICallLog
+from app.services.call_log import CallLogWriter, usage_report
+from tests.test_llm_router import StubProvider, make_router
+
+def test_router_logs_every_call(app, db):
+    router = make_router(StubProvider('bad', fail=True), fallback=StubProvider('good'))
+    router.call_log = CallLogWriter(app, flush_interval=0).record
+
+    router.generate('p', 10, section='abstract', prompt_version='sections/abstract@v1')
+
+    rows = AICallLog.query.order_by(AICallLog.id).all()
+    assert [(r.backend, r.status) for r in rows] == [('bad', 'error'), ('good', 'ok')]
+    assert rows[0].error_class == 'Exception'
+    assert all(r.section == 'abstract' and r.prompt_version == 'sections/abstract@v1' for r in rows)
+    assert rows[1].prompt_tokens == rows[1].completion_tokens == 1
+
+def test_writer_batches_until_flush(app, db):
+    writer = CallLogWriter(app, batch_size=2, flush_interval=60)
+    writer._started = True  # no background task in tests
+    for i in range(5):
+        writer.record(dict(provider='stub', backend='a', model='m', latency_ms=float(i), status='ok'))
+    assert AICallLog.query.count() == 0
+    assert writer.flush() == 5
+    assert AICallLog.query.count() == 5
+
+def test_writer_starts_one_flusher_under_concurrent_records(app, monkeypatch):
+    from app import socketio
+
+    started = []
+    monkeypatch.setattr(socketio, 'start_background_task', lambda target: started.append(target))
+    monkeypatch.setattr(atexit, 'register', lambda func: None)
+    writer = CallLogWriter(app, flush_interval=60)
+    barrier = threading.Barrier(8)
+
+    def record():
+        barrier.wait()
+        writer.record(dict(provider='stub', backend='a', model='m', latency_ms=1.0, status='ok'))
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(started) == 1 and len(writer.buffer) == 8
+
+def test_usage_report_and_cli(app, db):
+    writer = CallLogWriter(app, flush_interval=0)
+    for latency in range(1, 101):
+        writer.record(dict(provider='ollama', backend='gpu1', model='mistral', latency_ms=float(latency),
+                           completion_tokens=50, status='ok'))
+    writer.record(dict(provider='ollama', backend='gpu1', model='mistral', latency_ms=0.0,
+                       status='ok', cache_hit=True))
+    writer.record(dict(provider='ollama', backend='gpu1', model='mistral', latency_ms=5.0,
+                       status='error', error_class='ReadTimeout'))
+
+    [row] = usage_report(datetime.utcnow() - timedelta(hours=1))
+    assert (row['model'], row['calls'], row['errors'], row['cache_hits']) == ('mistral', 102, 1, 1)
+    assert row['p50_ms'] == 51 and row['p95_ms'] == 95
+    assert row['completion_tokens'] == 5000
+
+    result = app.test_cli_runner().invoke(args=['ai', 'usage', '--by', 'backend', '--json'])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)[0]['backend'] == 'gpu1'
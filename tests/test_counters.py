@@ -0,0 +1,112 @@
+"""
+Dashboard counters: adjusted by the write paths in the same transaction,
+read by primary key, recounted when a paper goes stale and reconciled
+against the source tables.
+"""
+import sys
+from datetime import datetime, timedelta
+
+from app import db as _db
+from app.models import Message, Paper, UserCounter
+from app.services.counters import get_counters, reconcile
+from tests.factories import login, make_user
+from tests.querycount import count_queries
+
+def send(client, user, method, url, **kwargs):
+    """Request as user (in an app context of its own, so the login isn't cached in g)"""
+    login(client, user)
+    with client.application.app_context():
+        assert getattr(client, method)(url, **kwargs).status_code == 200
+
+def _counts(user):
+    _db.session.expire_all()
+    row = _db.session.get(UserCounter, user.id)
+    return row.unread_messages, row.pending_requests, row.stale_reviews
+
+def test_write_paths_keep_counters_current(app, client):
+    me, partner = make_user(), make_user()
+    _db.session.commit()
+    get_counters(me.id)  # first read counts from scratch
+    assert _counts(me) == (0, 0, 0)
+
+    send(client, partner, 'post', '/chat/send', json={'content': 'hi', 'recipient_id': me.id})
+    send(client, partner, 'post', '/chat/send', json={'content': 'there', 'recipient_id': me.id})
+    send(client, partner, 'post', f'/research/request/{me.id}', data={'message': 'collaborate?'})
+    paper = Paper(title='Draft', author_id=me.id)
+    _db.session.add(paper)
+    _db.session.commit()
+    assert _counts(me) == (2, 1, 1)
+
+    send(client, me, 'get', f'/chat/user/{partner.id}')
+    send(client, me, 'post', f'/research/request/{partner.id}/respond', data={'action': 'accepted'})
+    send(client, me, 'post', f'/research/request/{partner.id}/respond',
+         data={'action': 'rejected'})  # was no longer pending
+    paper.last_reviewed = datetime.utcnow()
+    _db.session.commit()
+    assert _counts(me) == (0, 0, 0)
+
+    _db.session.delete(paper)
+    _db.session.add(Paper(title='Old', author_id=me.id, last_reviewed=datetime.utcnow() - timedelta(days=30)))
+    _db.session.commit()
+    assert _counts(me) == (0, 0, 1)
+
+def test_dashboard_reads_counters_by_primary_key(app, client):
+    me = make_user()
+    _db.session.commit()
+    login(client, me)
+    client.get('/dashboard/')  # creates the row
+    with count_queries() as queries:
+        client.get('/dashboard/')
+    assert not [q for q in queries if 'FROM message' in q or 'FROM paper' in q and 'count' in q.lower()], \
+        queries.report()
+    assert sum('FROM user_counter' in q for q in queries) == 1
+
+def test_reviews_going_stale_are_recounted_on_read(app):
+    me = make_user()
+    _db.session.commit()
+    _db.session.add(Paper(title='Reviewed', author_id=me.id,
+                          last_reviewed=datetime.utcnow() - timedelta(days=6, hours=23)))
+    _db.session.commit()
+    row = get_counters(me.id)
+    assert row.stale_reviews == 0 and row.stale_reviews_due_at < datetime.utcnow() + timedelta(hours=2)
+
+    row.stale_reviews_due_at = datetime.utcnow() - timedelta(seconds=1)  # an hour later, say
+    Paper.query.update({'last_reviewed': datetime.utcnow() - timedelta(days=8)})
+    _db.session.commit()
+    row = get_counters(me.id)
+    assert row.stale_reviews == 1 and row.stale_reviews_due_at is None
+
+def test_reconcile_corrects_drift(app):
+    me, partner = make_user(), make_user()
+    _db.session.commit()
+    reconcile(_db.session)
+    _db.session.execute(Message.__table__.insert(), [  # bulk load: bypasses the counters
+        {'content': f'm{i}', 'sender_id': partner.id, 'recipient_id': me.id} for i in range(3)])
+    _db.session.commit()
+    assert _counts(me) == (0, 0, 0)
+
+    assert reconcile(_db.session) == (2, 1)
+    assert _counts(me) == (3, 0, 0)
+
+def test_recount_on_read_leaves_the_transaction_to_the_caller(app):
+    me = make_user(name='Before')
+    _db.session.commit()
+    me.name = 'Pending edit'
+    assert get_counters(me.id).unread_messages == 0
+    _db.session.rollback()
+    assert me.name == 'Before' and _db.session.get(UserCounter, me.id) is None
+
+def test_background_reconcile_only_in_the_serving_process(app, monkeypatch):
+    from app import socketio
+    from app.services import counters
+
+    started = []
+    monkeypatch.setattr(socketio, 'start_background_task', started.append)
+    monkeypatch.setitem(app.config, 'COUNTERS_RECONCILE_SECONDS', 60)
+    monkeypatch.setattr(app, 'debug', False)
+    monkeypatch.setattr(sys, 'argv', ['/usr/bin/flask', 'counters', 'reconcile'])
+    counters.init_app(app)
+    assert not started
+    monkeypatch.setattr(sys, 'argv', ['/usr/bin/gunicorn', 'run:app'])
+    counters.init_app(app)
+    assert len(started) == 1
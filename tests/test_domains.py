@@ -0,0 +1,60 @@
+"""
+Research-domain autocomplete: prefix lookup, usage counts and updates
+from committed profile and project edits.
+"""
+import time
+
+from app import db as _db
+from app.models import Project
+from app.services.domains import DomainIndex, get_domain_index
+from tests.factories import login, make_user
+
+TEXTS = ['Machine Learning, Robotics', 'machine  learning, Deep Learning',
+         'Marine Biology', 'Machine Learning', 'Robotics']
+
+def test_prefix_word_and_abbreviation_matches():
+    index = DomainIndex.build(TEXTS)
+    assert index.suggest('ma') == [('Machine Learning', 3), ('Marine Biology', 1)]
+    assert [tag for tag, _ in index.suggest('learn')] == ['Machine Learning', 'Deep Learning']
+    assert index.suggest('ML')[0] == ('Machine Learning', 3)
+    assert index.suggest('') == [] and index.suggest('zz') == []
+
+def test_updates_adjust_counts_and_drop_unused_tags():
+    index = DomainIndex.build(TEXTS)
+    assert index.suggest('ma') == [('Machine Learning', 3), ('Marine Biology', 1)]  # cached
+    index.update('Marine Biology', 'Marine Ecology, Machine Learning')
+    assert index.suggest('ma') == [('Machine Learning', 4), ('Marine Ecology', 1)]
+    index.update('Robotics', None)
+    index.update('Robotics', None)
+    assert index.suggest('rob') == [] and 'robotics' not in index.counts
+
+def test_suggestions_are_sub_millisecond_at_scale():
+    texts = [f'Topic {i}, Field {i % 500}, Machine Learning' for i in range(20000)]
+    index = DomainIndex.build(texts)
+    prefixes = ('f', 'fi', 'field 4', 'top', 'topic 19', 'mach')
+    for prefix in prefixes:
+        index.suggest(prefix)  # broad prefixes are ranked once, then cached
+    index.update(None, 'Topic 5')
+    started = time.perf_counter()
+    for prefix in prefixes:
+        index.suggest(prefix)
+    assert (time.perf_counter() - started) / len(prefixes) < 0.001
+    assert index.suggest('top')[0] == index.suggest('topic 5')[0] == ('Topic 5', 2)
+
+def test_endpoint_follows_committed_edits(app, client):
+    user = make_user(research_domains='Computer Vision')
+    _db.session.commit()
+    login(client, user)
+    assert client.get('/research/domains/suggest?prefix=comp').get_json()['suggestions'] == [
+        {'tag': 'Computer Vision', 'count': 1}]
+
+    user.research_domains = 'Computational Biology'
+    _db.session.add(Project(title='P', owner_id=user.id, keywords='Computer Vision, Compilers'))
+    _db.session.commit()
+    tags = {s['tag']: s['count'] for s in
+            client.get('/research/domains/suggest?prefix=comp').get_json()['suggestions']}
+    assert tags == {'Computational Biology': 1, 'Computer Vision': 1, 'Compilers': 1}
+
+    user.is_active = False
+    _db.session.commit()
+    assert 'computational biology' not in get_domain_index().counts
@@ -0,0 +1,75 @@
+"""
+Cold-start regression test based on `python -X importtime`, and the lazily
+built AIService
+
+Run directly for a report of the slowest imports on the serverless path:
+    python tests/test_import_time.py
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The same startup app_production.py performs on a Vercel cold start
+STARTUP_CODE = "from app import create_app; create_app('production')"
+
+# Modules that must only be imported when the feature using them is hit
+DEFERRED_MODULES = ['weasyprint', 'openai', 'app.services.ai_service', 'numpy']
+
+def profile_imports(code=STARTUP_CODE):
+    """Run code under -X importtime and return {module: cumulative_us}"""
+    env = dict(os.environ, VERCEL='1', PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        imports[module.strip()] = int(cumulative)
+    return imports
+
+def format_report(imports, top=20):
+    """Top-level packages sorted by cumulative import time"""
+    roots = {}
+    for module, cumulative in imports.items():
+        root = module.split('.')[0]
+        roots[root] = max(roots.get(root, 0), cumulative)
+    lines = [f"{'package':<30} {'cumulative ms':>14}"]
+    for root, cumulative in sorted(roots.items(), key=lambda x: x[1], reverse=True)[:top]:
+        lines.append(f"{root:<30} {cumulative / 1000:>14.1f}")
+    return '\n'.join(lines)
+
+def test_cold_start_defers_heavy_imports():
+    imports = profile_imports()
+    print(format_report(imports))
+
+    loaded = [m for m in DEFERRED_MODULES if m in imports]
+    assert not loaded, f"imported at startup: {loaded}"
+
+def test_failed_ai_service_is_not_retried_on_every_request(monkeypatch):
+    import app.services as services
+    from app.services import ai_service
+
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise RuntimeError('provider misconfigured')
+
+    monkeypatch.setattr(ai_service, 'AIService', broken)
+    monkeypatch.setattr(services, '_ai_service', None)
+    monkeypatch.setattr(services, '_ai_service_failed_at', None)
+    assert services.get_ai_service() is None and services.get_ai_service() is None
+    assert len(attempts) == 1
+
+    services._ai_service_failed_at -= services.AI_SERVICE_RETRY_SECONDS
+    assert services.get_ai_service() is None and len(attempts) == 2
+
+if __name__ == '__main__':
+    print(format_report(profile_imports()))
@@ -0,0 +1,105 @@
+"""
+Review output parsing: tolerant JSON repair, schema validation and JSON
+mode requests to providers.
+"""
+import asyncio
+import json
+
+import pytest
+
+from app.services.ai_service import _parse_review
+from app.services.json_repair import IncrementalJSONParser, parse_json
+from app.services.providers import OllamaProvider
+from app.services.review_schema import REVIEW_SCHEMA, InvalidReview, validate_review
+from benchmarks.fake_llm import FakeLLMServer
+from tests.test_llm_router import StubProvider, make_router
+
+def test_valid_json_is_not_marked_repaired():
+    assert parse_json('```json\n{"a": [1, 2]}\n```') == ({'a': [1, 2]}, False)
+
+@pytest.mark.parametrize('text, expected', [
+    ('Sure! {"a": [1, 2,], "b": "x",} Hope this helps', {'a': [1, 2], 'b': 'x'}),
+    ('{"a": [1, 2, {"b": 3', {'a': [1, 2, {'b': 3}]}),
+    ('{"issue": "The intro is wea', {'issue': 'The intro is wea'}),
+    ("{score: 8, 'ok': True \"n\": null}", {'score': 8, 'ok': True, 'n': None}),
+    ('{"s": "a\nb \\u00e9 \\"q\\""}', {'s': 'a\nb é "q"'}),
+    ('{"a": 1]', {'a': 1}),
+])
+def test_repairs_malformed_output(text, expected):
+    value, repaired = parse_json(text)
+    assert value == expected and repaired
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        parse_json('I cannot review this paper.')
+
+def test_incremental_feed_matches_whole_text():
+    text = '{"findings": [{"issue": "abc"}, {"issue": "de'
+    parser = IncrementalJSONParser()
+    for i in range(0, len(text), 3):
+        parser.feed(text[i:i + 3])
+    assert parser.value() == {'findings': [{'issue': 'abc'}, {'issue': 'de'}]}
+    assert not parser.complete
+    parser.feed('f"}]}')
+    assert parser.complete and parser.value() == {'findings': [{'issue': 'abc'}, {'issue': 'def'}]}
+
+def test_validate_review_coerces_fields():
+    review, problems = validate_review({
+        'overall_score': '8/10',
+        'findings': [{'type': 'Clarity', 'severity': 'urgent', 'issue': 'Vague aims'}, {'type': 'logic'}],
+        'strengths': 'Clear title',
+    })
+    assert review == {
+        'overall_score': 8,
+        'findings': [{'type': 'clarity', 'severity': 'medium', 'section': 'general',
+                      'issue': 'Vague aims', 'suggestion': ''}],
+        'strengths': ['Clear title'],
+        'improvements': [],
+    }
+    assert 'finding without issue dropped' in problems
+
+def test_validate_review_rejects_empty_output():
+    with pytest.raises(InvalidReview):
+        validate_review({'strengths': ['x']})
+
+def test_truncated_review_keeps_findings():
+    review = _parse_review('{"overall_score": 6, "findings": [{"type": "logic", "severity": "high", '
+                           '"section": "methodology", "issue": "Sample size is not justif')
+    assert review['overall_score'] == 6
+    assert review['findings'][0]['issue'] == 'Sample size is not justif'
+
+def test_ollama_requests_schema_format():
+    provider = OllamaProvider('http://localhost:11434')
+    assert provider._payload('p', 10, 0.7, False, None, REVIEW_SCHEMA)['format'] == REVIEW_SCHEMA
+    assert 'format' not in provider._payload('p', 10, 0.7, False, None)
+    provider.json_mode = 'json'
+    assert provider._payload('p', 10, 0.7, False, None, REVIEW_SCHEMA)['format'] == 'json'
+
+def test_ollama_without_schema_support_falls_back_to_json():
+    with FakeLLMServer(latency=0, json_schema=False) as llm:
+        provider = OllamaProvider(llm.url)
+        text, _ = provider.generate('Return JSON', 50, schema=REVIEW_SCHEMA)
+        assert json.loads(text)['overall_score'] == 7
+        assert provider.json_mode == 'json' and llm.requests == 1
+
+        provider.json_mode = 'schema'
+        async def agenerate():
+            try:
+                return await provider.agenerate('Return JSON', 50, schema=REVIEW_SCHEMA)
+            finally:
+                await provider.aclose()
+
+        text, _ = asyncio.run(agenerate())
+        assert json.loads(text)['overall_score'] == 7 and provider.json_mode == 'json'
+
+def test_router_passes_schema_to_provider():
+    class SchemaStub(StubProvider):
+        def generate(self, prompt, max_tokens, temperature=0.7, model=None, schema=None):
+            self.calls.append(schema)
+            return '{}', {}
+
+    provider = SchemaStub('a')
+    router = make_router(provider)
+    router.generate('p', 10, schema=REVIEW_SCHEMA)
+    router.generate('q', 10)
+    assert provider.calls == [REVIEW_SCHEMA, None]
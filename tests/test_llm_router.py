@@ -0,0 +1,173 @@
+"""
+LLM routing: least-outstanding balancing, failover, circuit breaker,
+per-section models and request coalescing (threads and asyncio tasks
+together), against in-process providers.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.llm_router import Backend, LLMRouter, NoBackendAvailable, parse_section_models
+from app.services.providers import LLMProvider
+from app.services.singleflight import SingleFlight
+
+class StubProvider(LLMProvider):
+    name = 'stub'
+
+    def __init__(self, label, fail=False, delay=0):
+        super().__init__('default-model')
+        self._label = label
+        self.fail = fail
+        self.delay = delay
+        self.calls = []
+
+    @property
+    def label(self):
+        return self._label
+
+    def generate(self, prompt, max_tokens, temperature=0.7, model=None):
+        self.calls.append(model)
+        if self.fail:
+            raise Exception(f'{self._label} down')
+        return f'{self._label}:{model}', {'prompt_tokens': 1, 'completion_tokens': 1}
+
+    async def agenerate(self, prompt, max_tokens, temperature=0.7, model=None):
+        await asyncio.sleep(self.delay)
+        return self.generate(prompt, max_tokens, temperature, model)
+
+def make_router(*providers, fallback=None, **kwargs):
+    backends = [Backend(p, failure_threshold=2, reset_timeout=60) for p in providers]
+    if fallback:
+        backends.append(Backend(fallback, fallback=True))
+    return LLMRouter(backends, health_check_interval=0, **kwargs)
+
+def test_spreads_concurrent_requests_across_backends():
+    a, b = StubProvider('a', delay=0.05), StubProvider('b', delay=0.05)
+    router = make_router(a, b)
+
+    async def burst():
+        return await asyncio.gather(*(router.agenerate(f'p{i}', 10) for i in range(20)))
+
+    asyncio.run(burst())
+    assert len(a.calls) == len(b.calls) == 10
+
+def test_fails_over_and_opens_circuit():
+    bad, good = StubProvider('bad', fail=True), StubProvider('good')
+    router = make_router(bad, good)
+
+    for _ in range(4):
+        assert router.generate('p', 10).startswith('good')
+
+    assert router.backends[0].state == 'open'
+    assert len(bad.calls) == 2  # skipped once the circuit opened
+
+def test_fallback_only_when_primaries_fail():
+    primary, fallback = StubProvider('primary'), StubProvider('fallback')
+    router = make_router(primary, fallback=fallback)
+    assert router.generate('p', 10).startswith('primary')
+
+    primary.fail = True
+    assert router.generate('p', 10).startswith('fallback')
+
+def test_no_backend_available():
+    router = make_router(StubProvider('a', fail=True))
+    for _ in range(2):
+        with pytest.raises(Exception, match='a down'):
+            router.generate('p', 10)
+    with pytest.raises(NoBackendAvailable):
+        router.generate('p', 10)
+
+def test_section_models_apply_to_primaries_only():
+    primary, fallback = StubProvider('primary'), StubProvider('fallback')
+    router = make_router(primary, fallback=fallback,
+                         section_models=parse_section_models('abstract=small, literature_review=large'))
+
+    assert router.generate('p', 10, section='abstract') == 'primary:small'
+    assert router.generate('p', 10, section='methodology') == 'primary:default-model'
+    primary.fail = True
+    assert router.generate('p', 10, section='abstract') == 'fallback:default-model'
+
+def test_coalesces_identical_concurrent_prompts():
+    a = StubProvider('a', delay=0.05)
+    router = make_router(a)
+
+    async def burst():
+        return await asyncio.gather(*(router.agenerate('same', 10) for _ in range(10)),
+                                    router.agenerate('other', 10))
+
+    results = asyncio.run(burst())
+    assert len(a.calls) == 2
+    assert len(set(results[:10])) == 1
+
+def test_coalesces_across_threads():
+    class SlowProvider(StubProvider):
+        def generate(self, prompt, max_tokens, temperature=0.7, model=None):
+            time.sleep(0.05)
+            return super().generate(prompt, max_tokens, temperature, model)
+
+    slow = SlowProvider('slow')
+    router = make_router(slow)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(router.generate('same', 10)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8
+    assert len(slow.calls) == 1
+
+def test_coalesces_blocking_and_async_callers_together():
+    calls, results = [], []
+
+    def blocking():
+        calls.append('sync')
+        time.sleep(0.1)
+        return 'sync'
+
+    async def awaitable():
+        calls.append('async')
+        await asyncio.sleep(0.1)
+        return 'async'
+
+    flight = SingleFlight()
+
+    def join_blocking():
+        time.sleep(0.02)
+        results.append(flight.do('k', blocking))
+
+    async def async_leads():
+        thread = threading.Thread(target=join_blocking)
+        thread.start()
+        results.append(await flight.ado('k', awaitable))
+        await asyncio.get_running_loop().run_in_executor(None, thread.join)
+
+    asyncio.run(async_leads())
+    assert calls == ['async'] and results == ['async', 'async']
+
+    async def join_async():
+        await asyncio.sleep(0.02)
+        return await flight.ado('k', awaitable)
+
+    thread = threading.Thread(target=lambda: results.append(asyncio.run(join_async())))
+    thread.start()
+    results.append(flight.do('k', blocking))
+    thread.join()
+    assert calls == ['async', 'sync'] and results[2:] == ['sync', 'sync']
+
+def test_coalesced_waiters_time_out():
+    release = threading.Event()
+    flight = SingleFlight(timeout=0.05)
+    leader = threading.Thread(target=lambda: flight.do('k', release.wait))
+    leader.start()
+    time.sleep(0.02)
+
+    with pytest.raises(TimeoutError):
+        flight.do('k', lambda: 'unused')
+    with pytest.raises(TimeoutError):
+        asyncio.run(flight.ado('k', asyncio.sleep))
+    release.set()
+    leader.join()
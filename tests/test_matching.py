@@ -0,0 +1,108 @@
+"""
+Researcher matching: profile vectors, incremental updates and top-k queries.
+"""
+import re
+import time
+
+import numpy as np
+
+from app import db as _db
+from app.routes.dashboard import get_suggested_researchers
+from app.services.matching import ProfileIndex, get_profile_index, profile_features
+from tests.factories import login, make_user
+
+PROFILES = [
+    (1, 'Machine Learning, Computer Vision', 'image classification', ''),
+    (2, 'Marine Biology', 'coral reefs', 'I study ocean ecosystems'),
+    (3, 'Natural Language Processing', 'large language models', ''),
+    (4, 'Quantum Physics', '', 'Experimental work on qubits'),
+]
+
+def test_abbreviations_match_their_expansion():
+    index = ProfileIndex.build(PROFILES)
+    assert index.top_k(index.vector('ML', '', ''), 1)[0][0] == 1
+    assert index.top_k(index.vector('NLP, LLMs', '', ''), 1)[0][0] == 3
+    assert 'a:ml' in profile_features('Machine Learning', '', '')
+
+def test_unrelated_profiles_are_not_suggested():
+    index = ProfileIndex.build(PROFILES)
+    matches = dict(index.top_k(index.vector('Deep Learning, Computer Vision', '', ''), 4))
+    assert 1 in matches and 2 not in matches
+
+def test_upsert_and_remove_keep_rows_contiguous():
+    index = ProfileIndex.build(PROFILES)
+    index.remove(1)
+    assert len(index) == 3 and sorted(index.rows) == [2, 3, 4]
+    assert all(index.ids[row] == user_id for user_id, row in index.rows.items())
+    index.upsert(5, 'Computer Vision', '', '')
+    index.upsert(2, 'Computer Vision, Robotics', '', '')
+    assert {user_id for user_id, _ in index.top_k(index.vector('Computer Vision', '', ''), 2)} == {2, 5}
+    index.upsert(5, '', '', '')
+    assert 5 not in index.rows
+
+def test_exclude_and_scores():
+    index = ProfileIndex.build(PROFILES)
+    vector = index.vector('Machine Learning', '', '')
+    assert 1 not in dict(index.top_k(vector, 4, exclude=(1,)))
+    scores = index.scores(vector, [1, 2, 99])
+    assert scores[1] > 0.5 and scores[99] == 0.0
+
+def test_top_k_is_fast_at_100k_profiles():
+    index = ProfileIndex()
+    rng = np.random.default_rng(0)
+    index._reserve(100_000)
+    vectors = rng.standard_normal((100_000, index.dim)).astype(np.float32)
+    index.matrix[:100_000] = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    index.ids[:100_000] = np.arange(100_000)
+    index.rows = {i: i for i in range(100_000)}
+    index.size = 100_000
+
+    query = index.matrix[123]
+    index.top_k(query, 10)
+    started = time.perf_counter()
+    best = index.top_k(query, 10, exclude=(5,))
+    assert time.perf_counter() - started < 0.1
+    assert best[0][0] == 123
+
+def test_index_follows_committed_profile_edits(app):
+    me = make_user(research_domains='Machine Learning')
+    other = make_user(research_domains='Marine Biology')
+    _db.session.commit()
+    index = get_profile_index()
+    assert get_suggested_researchers(me) == []
+
+    other.research_domains = 'ML, Robotics'
+    _db.session.commit()
+    [match] = get_suggested_researchers(me)
+    assert match['user'].id == other.id and match['score'] > 0.3
+
+    newcomer = make_user(research_domains='Machine Learning')
+    _db.session.commit()
+    assert newcomer.id in index.rows
+
+    other.is_active = False
+    _db.session.commit()
+    assert other.id not in index.rows
+
+    newcomer.research_domains = 'Astronomy'
+    _db.session.rollback()
+    assert [m['user'].id for m in get_suggested_researchers(me)] == [newcomer.id]
+
+def test_discover_lists_everyone_a_page_at_a_time(app, client):
+    app.config['MATCHING_DISCOVER_LIMIT'] = 2
+    me = make_user(research_domains='Machine Learning')
+    close = make_user(name='Close match', research_domains='Machine Learning')
+    others = [make_user(name=f'Other {i}', research_domains='Marine Biology') for i in range(3)]
+    _db.session.commit()
+    login(client, me)
+
+    pages, page = [], client.get('/research/discover').get_data(as_text=True)
+    assert 'Found <strong>4</strong>' in page and 'showing 1&ndash;2' in page
+    while True:
+        pages.append(page)
+        more = re.search(r'href="(/research/discover\?page=\d+)"', page)
+        if not more:
+            break
+        page = client.get(more.group(1)).get_data(as_text=True)
+    assert len(pages) == 2 and 'Close match' in pages[0]
+    assert all(any(user.name in html for html in pages) for user in others + [close])
@@ -0,0 +1,90 @@
+"""
+Chat message search: both send paths are indexed on insert, results are
+scoped to the user's conversations and page by cursor, and a result
+opens its conversation around the message.
+"""
+from app import db as _db, socketio
+from app.models import Message, Project, project_members
+from app.services.search import message_context, search_messages
+from tests.factories import login, make_user
+
+def _say(sender, content, recipient=None, project=None):
+    _db.session.add(Message(content=content, sender_id=sender.id, project_id=project and project.id,
+                            recipient_id=recipient and recipient.id))
+    _db.session.commit()
+
+def test_both_send_paths_are_searchable(app, client):
+    me, partner = make_user(), make_user()
+    _db.session.commit()
+    login(client, me)
+    assert client.post('/chat/send', json={'content': 'Draft of the <b>survey</b> attached',
+                                           'recipient_id': partner.id}).get_json()['success']
+    live = socketio.test_client(app, flask_test_client=client)
+    live.emit('send_message', {'content': 'Survey results look noisy', 'recipient_id': partner.id})
+
+    found = client.get('/chat/search?q=survey').get_json()
+    assert [r['snippet'] for r in found['results']] == [
+        '<mark>Survey</mark> results look noisy', 'Draft of the &lt;b&gt;<mark>survey</mark>&lt;/b&gt; attached']
+    assert found['results'][0]['conversation'] == {'type': 'user', 'id': partner.id}
+    assert f'around={found["results"][0]["id"]}' in found['results'][0]['url']
+
+    Message.query.update({'is_read': True})  # read flags don't touch the index
+    _db.session.commit()
+    assert len(search_messages(partner, 'survey')[0]) == 2
+
+def test_results_are_scoped_to_own_conversations_and_projects(app):
+    me, partner, outsider = make_user(), make_user(), make_user()
+    _db.session.commit()
+    project = Project(title='Reef survey', owner_id=outsider.id)
+    _db.session.add(project)
+    _db.session.flush()
+    _db.session.execute(project_members.insert(), [{'user_id': me.id, 'project_id': project.id}])
+    _db.session.commit()
+    _say(partner, 'coral samples shipped', recipient=me)
+    _say(outsider, 'coral bleaching data', project=project)
+    _say(outsider, 'coral gossip', recipient=partner)
+
+    assert {r['snippet'].striptags() for r in search_messages(me, 'coral')[0]} == {
+        'coral samples shipped', 'coral bleaching data'}
+    assert [r['conversation'] for r in search_messages(me, 'coral', project_id=project.id)[0]] == [
+        ('project', project.id)]
+    assert [r['sender_id'] for r in search_messages(me, 'coral', partner_id=partner.id)[0]] == [partner.id]
+    assert search_messages(partner, 'bleaching') == ([], None)
+
+def test_cursor_pages_and_jump_to_context(app, client):
+    me, partner = make_user(), make_user()
+    _db.session.commit()
+    for i in range(30):
+        _say(me if i % 2 else partner, f'update {i}' + (' deadline' if i % 3 == 0 else ''),
+             recipient=partner if i % 2 else me)
+
+    first, cursor = search_messages(me, 'deadline', per_page=4)
+    second, end = search_messages(me, 'deadline', before=cursor, per_page=4)
+    ids = [r['id'] for r in first + second]
+    assert len(ids) == 8 == len(set(ids)) and ids == sorted(ids, reverse=True)
+    third, end = search_messages(me, 'deadline', before=end, per_page=4)
+    assert len(third) == 2 and end is None
+
+    target = second[0]['id']
+    context = message_context(me, target, before=3, after=2)
+    assert [m.id for m in context['messages']] == list(range(target - 3, target + 3))
+    assert context['earlier'] == target - 3 and context['later'] == target + 2
+    assert message_context(make_user(), target) is None
+
+    login(client, me)
+    html = client.get(f'/chat/user/{partner.id}?around={target}').get_data(as_text=True)
+    assert f'id="message-{target}"' in html and 'message-found' in html
+    assert client.get(f'/chat/messages/{target}/context?before=0&after=0').get_json()['messages'][0]['id'] == target
+
+def test_page_size_is_at_least_one(app, client):
+    me, partner = make_user(), make_user()
+    _db.session.commit()
+    for i in range(3):
+        _say(partner, f'budget draft {i}', recipient=me)
+    assert search_messages(me, 'budget', per_page=0) == ([], None)
+
+    login(client, me)
+    for per_page in (0, -5):
+        response = client.get(f'/chat/search?q=budget&per_page={per_page}')
+        assert response.status_code == 200
+        assert len(response.get_json()['results']) == 1
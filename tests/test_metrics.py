@@ -0,0 +1,48 @@
+"""
+Instrumentation: /metrics access control, SQL timing around failed
+statements and SQL counts per Socket.IO event.
+"""
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db as _db
+from app.metrics import metrics, timed_socket_event
+
+def test_metrics_endpoint_needs_allowed_ip_or_token(app, client):
+    assert client.get('/metrics').status_code == 200  # the test client is 127.0.0.1
+
+    outside = {'REMOTE_ADDR': '203.0.113.9'}
+    assert client.get('/metrics', environ_base=outside).status_code == 404
+    app.config['METRICS_TOKEN'] = 's3cret'
+    assert client.get('/metrics', environ_base=outside,
+                      headers={'Authorization': 'Bearer wrong'}).status_code == 404
+    response = client.get('/metrics', environ_base=outside, headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200 and b'db_queries_total' in response.data
+
+def test_failed_statement_leaves_no_timing_behind(app):
+    metrics.reset()
+    with _db.engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text('SELECT * FROM no_such_table'))
+        connection.execute(text('SELECT 1'))
+        assert not any('start' in key for key in connection.info)
+    assert metrics.get('db_queries_total') == 1
+
+def test_socket_event_counts_its_own_queries(app):
+    metrics.reset()
+
+    @timed_socket_event('probe')
+    def handler():
+        _db.session.execute(text('SELECT 1'))
+        _db.session.execute(text('SELECT 2'))
+
+    handler()
+    assert metrics.get('socketio_event_db_queries', event='probe').sum == 2
+    assert 'sql_query_count' not in g
+
+    g.sql_query_count, g.sql_query_time = 5, 0.0  # e.g. an enclosing request
+    handler()
+    assert metrics.get('socketio_event_db_queries', event='probe').sum == 4
+    assert g.sql_query_count == 7
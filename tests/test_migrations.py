@@ -0,0 +1,89 @@
+"""
+Schema migrations through the real `flask db` entry point: an empty
+database and a pre-migration database both upgrade to head, and a
+database kept by create_all() gets what later migrations added.
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+
+from app import db as _db
+from app.cli import cli_command
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _run(database, args):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}', FLASK_APP='run.py',
+               FLASK_DEBUG='false', LLM_WARMUP='false', DOMAINS_PREBUILD='false')
+    env.pop('DATABASE_MIGRATIONS', None)
+    result = subprocess.run([sys.executable, *args], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return result.stdout
+
+def flask_db(database, *args):
+    _run(database, ['-m', 'flask', 'db', *args])
+
+def in_app(database, code):
+    """Run code in a fresh app on database (created the create_all way) and return its output"""
+    return _run(database, ['-c', 'from app import create_app, db\n'
+                                 "app = create_app('development')\n"
+                                 'with app.app_context():\n' + textwrap.indent(code, '    ')])
+
+def pre_search_database(path):
+    """A database kept by create_all() before search existed, with a paper, a project and messages"""
+    database = str(path)
+    flask_db(database, 'upgrade', '0004')
+    with sqlite3.connect(database) as connection:
+        connection.execute('DROP TABLE alembic_version')
+        connection.execute("INSERT INTO user (id, email, password_hash, name, is_active) VALUES "
+                           "(1, 'a@example.org', 'x', 'Ada', 1), (2, 'b@example.org', 'x', 'Bo', 1)")
+        connection.execute("INSERT INTO paper (title, abstract, author_id) VALUES "
+                           "('Graphene sensors', 'Cheap graphene sensors', 1)")
+        connection.execute("INSERT INTO project (title, abstract, owner_id) VALUES ('Reef survey', '', 1)")
+        connection.execute("INSERT INTO message (content, sender_id, recipient_id, created_at) VALUES "
+                           "('hello from Bo', 2, 1, CURRENT_TIMESTAMP)")
+    return database
+
+def tables(database):
+    with sqlite3.connect(database) as connection:
+        return {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+
+def test_cli_command_is_read_from_the_command_line():
+    assert cli_command(['/usr/bin/flask', '--app', 'run.py', 'db', 'upgrade']) == 'db'
+    assert cli_command(['/x/flask/__main__.py', '-e', '.env', '--debug', 'run']) == 'run'
+    assert cli_command(['run.py']) is None and cli_command(['/usr/bin/flask']) is None
+
+def test_upgrade_creates_an_empty_database(app, tmp_path):
+    database = str(tmp_path / 'empty.db')
+    flask_db(database, 'upgrade')
+    assert set(_db.metadata.tables) <= tables(database)
+
+def test_stamp_then_upgrade_a_pre_migration_database(app, tmp_path):
+    database = str(tmp_path / 'old.db')
+    flask_db(database, 'upgrade', '0001')
+    with sqlite3.connect(database) as connection:
+        connection.execute('DROP TABLE alembic_version')  # as created by db.create_all() back then
+    flask_db(database, 'stamp', '0001')
+    assert 'ai_call_log' not in tables(database)
+    flask_db(database, 'upgrade')
+    assert set(_db.metadata.tables) <= tables(database)
+
+def test_search_works_on_a_database_created_before_it(tmp_path):
+    database = pre_search_database(tmp_path / 'existing.db')
+    found = in_app(database, 'from app.models import User\n'
+                             'from app.services.search import search\n'
+                             "print('found', len(search(db.session.get(User, 1), 'graphene')[0]))\n")
+    assert 'found 1' in found
+
+def test_message_search_works_on_a_database_created_before_it(tmp_path):
+    database = pre_search_database(tmp_path / 'existing.db')
+    code = ('client = app.test_client()\n'
+            "with client.session_transaction() as session:\n"
+            "    session['_user_id'] = '1'\n"
+            "response = client.get('/chat/search?q=hello')\n"
+            "print(response.status_code, len(response.get_json()['results']))\n")
+    assert '200 1' in in_app(database, code)
+    assert '200 1' in in_app(database, code)  # and again once the index exists
@@ -0,0 +1,67 @@
+"""
+Model warm-up: background load, business-hours window and cold/warm metrics.
+"""
+from datetime import datetime
+
+from app.metrics import metrics
+from app.services.llm_router import Backend, LLMRouter
+from app.services.model_warmup import ModelWarmer
+from app.services.providers import OllamaProvider
+from benchmarks.fake_llm import FakeLLMServer
+
+def make_router(url, **section_models):
+    provider = OllamaProvider(url, model='mistral', keep_alive='30m')
+    return LLMRouter([Backend(provider)], section_models=section_models, health_check_interval=0)
+
+def test_warm_up_avoids_cold_start():
+    metrics.reset()
+    with FakeLLMServer(latency=0, load_time=0.6) as llm:
+        router = make_router(llm.url, abstract='phi3:mini')
+        ModelWarmer(router).warm_all()
+        assert llm.loaded == {'mistral', 'phi3:mini'}
+
+        router.generate('prompt', 8)
+        router.generate('prompt', 8, section='abstract')
+
+    assert metrics.get('llm_warmups_total', provider='ollama', model='mistral') == 1
+    assert metrics.get('llm_cold_starts_total', provider='ollama', model='mistral') is None
+
+def test_cold_start_is_recorded():
+    metrics.reset()
+    with FakeLLMServer(latency=0, load_time=0.6) as llm:
+        router = make_router(llm.url)
+        router.generate('prompt', 8)
+        router.generate('other prompt', 8)
+
+    assert metrics.get('llm_cold_starts_total', provider='ollama', model='mistral') == 1
+
+def test_business_hours():
+    warmer = ModelWarmer(router=None, hours=(8, 19), days=(0, 4))
+    assert warmer.in_business_hours(datetime(2024, 3, 4, 9, 30))       # Monday
+    assert not warmer.in_business_hours(datetime(2024, 3, 4, 19, 0))
+    assert not warmer.in_business_hours(datetime(2024, 3, 9, 10, 0))   # Saturday
+    assert not ModelWarmer(router=None, hours=None).in_business_hours()
+
+def test_warm_up_only_in_the_serving_process(app, monkeypatch):
+    from app.cli import serving_process
+    monkeypatch.delenv('WERKZEUG_RUN_MAIN', raising=False)
+    monkeypatch.setattr(app, 'debug', False)
+    assert serving_process(app, ['/usr/bin/gunicorn', 'run:app'])
+    assert serving_process(app, ['/usr/bin/flask', 'run'])
+    assert not serving_process(app, ['/usr/bin/flask', 'db', 'upgrade'])
+    assert not serving_process(app, ['/usr/bin/flask', '--app', 'run.py', 'assets', 'build'])
+
+    monkeypatch.setattr(app, 'debug', True)
+    assert not serving_process(app, ['run.py'])  # reloader parent
+    monkeypatch.setenv('WERKZEUG_RUN_MAIN', 'true')
+    assert serving_process(app, ['run.py'])
+
+def test_unset_config_gives_the_class_defaults(app):
+    router = make_router('http://localhost:11434')
+    built = ModelWarmer(router)
+    for config in ({}, app.config):
+        warmer = ModelWarmer.from_config(router, config)
+        assert (warmer.hours, warmer.days, warmer.interval) == (built.hours, built.days, built.interval)
+    assert (built.hours, built.days) == ((8, 19), (0, 4))
+    off = ModelWarmer.from_config(router, {'LLM_KEEPWARM_HOURS': '', 'LLM_KEEPWARM_DAYS': ''})
+    assert off.hours is None and off.days == (0, 6)
@@ -0,0 +1,52 @@
+"""
+Prompt budgeting: context windows, trimming and max_tokens sizing.
+"""
+import pytest
+
+from app.services.prompt_budget import (PromptBudget, PromptTooLong, context_window,
+                                        estimate_tokens, trim_to_tokens)
+
+def test_context_window_lookup():
+    assert context_window('mistral') == 8192
+    assert context_window('mistral:7b-instruct') == 8192
+    assert context_window('gpt-4-turbo-preview') == 128000
+    assert context_window('gpt-4') == 8192
+    assert context_window('phi3:mini') == 4096
+    assert context_window('unknown-model') == 4096
+    assert context_window('mistral', override=32768) == 32768
+
+def test_trim_keeps_head_and_tail():
+    text = ' '.join(f'w{i}' for i in range(2000))
+    trimmed = trim_to_tokens(text, 200)
+    assert estimate_tokens(trimmed) <= 220
+    assert trimmed.startswith('w0 w1')
+    assert trimmed.endswith('w1999')
+    assert 'words omitted' in trimmed
+
+def test_fit_trims_large_parts_and_sizes_output():
+    budget = PromptBudget('llama2')
+    prompt, max_tokens = budget.fit('{title}\n{body}', {'title': 'Short title', 'body': 'text ' * 8000},
+                                    wanted_output=1500)
+    assert prompt.startswith('Short title\n')
+    assert budget.tokens(prompt) + max_tokens <= budget.window
+    assert max_tokens >= 1000
+
+def test_fit_leaves_small_prompts_alone():
+    budget = PromptBudget('mistral')
+    prompt, max_tokens = budget.fit('Improve: {text}', {'text': 'hello world'}, wanted_output=800)
+    assert prompt == 'Improve: hello world'
+    assert max_tokens == 800
+
+def test_fit_refuses_untrimmable_overflow():
+    with pytest.raises(PromptTooLong):
+        PromptBudget('phi').fit('{text}', {'text': 'word ' * 5000}, 500, keep=('text',))
+
+def test_max_output_refuses_a_full_window():
+    budget = PromptBudget('phi3')
+    assert budget.max_output('short prompt', 1000) == 1000
+    room = ' '.join(['word'] * 3000)
+    assert 256 <= budget.max_output(room, 4000) < 4000
+    full = ' '.join(['word'] * 4000)
+    assert budget.tokens(full) > budget.window - 256
+    with pytest.raises(PromptTooLong):
+        budget.max_output(full, 1000)
@@ -0,0 +1,24 @@
+"""
+Prompt template registry.
+"""
+from app.services.prompts import VERSIONS, get_prompt, section_prompt
+
+def test_all_templates_load_and_render():
+    fields = dict(context='CTX', domain='NLP', keywords='transformers', title='T', objective='O',
+                  method_type='Experimental', section_name='abstract', current_text='text',
+                  abstract='a', introduction='i', problem_statement='p', literature_review='l',
+                  methodology='m', conclusion='c', future_work='f')
+    for name in VERSIONS:
+        rendered = get_prompt(name).render(**fields)
+        assert '$' not in rendered, name
+
+def test_section_prompts_have_stable_prefix():
+    template = section_prompt('abstract')
+    first = template.render(context='Paper one', domain='', keywords='')
+    second = template.render(context='Paper two', domain='', keywords='')
+    prefix = len(first) - len('Paper one')
+    assert first[:prefix] == second[:prefix]
+    assert template.key == 'sections/abstract@v1'
+
+def test_unknown_section():
+    assert section_prompt('appendix') is None
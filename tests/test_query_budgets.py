@@ -0,0 +1,87 @@
+"""
+Query budgets for list views: the number of SQL statements a route issues
+must not grow with the number of rows it displays (N+1 detection)
+
+Each route is measured at a small and a large data size; both must fit the
+budget and issue the same number of queries. Budgets include the Flask-Login
+user load.
+"""
+import pytest
+from tests.factories import (login, make_user, seed_conversations, seed_project,
+                             seed_collaboration_requests)
+from tests.querycount import count_queries, query_budget
+from app import db
+
+SMALL, LARGE = 3, 60
+
+@pytest.fixture
+def stub_render(monkeypatch):
+    """Skip template rendering for views whose templates are not in the tree"""
+    def stub(module):
+        monkeypatch.setattr(module, 'render_template', lambda *args, **context: '')
+    return stub
+
+def measure(client, url):
+    # A fresh app context gives the request its own session, so objects the
+    # test created are not served from the identity map
+    with client.application.app_context(), count_queries() as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return queries
+
+def test_chat_inbox_budget(app, client):
+    user = make_user()
+    db.session.commit()
+    login(client, user)
+
+    seed_conversations(user, SMALL)
+    small = measure(client, '/chat/')
+    seed_conversations(user, LARGE - SMALL)
+    with query_budget(3):
+        large = measure(client, '/chat/')
+
+    assert len(small) == len(large), large.report()
+
+def test_chat_inbox_lists_every_conversation(app, client):
+    user = make_user()
+    db.session.commit()
+    names = [partner.name for partner in seed_conversations(user, 5)]
+    login(client, user)
+
+    html = client.get('/chat/').get_data(as_text=True)
+    for name in names:
+        assert name in html
+
+def test_project_view_budget(app, client, stub_render):
+    from app.routes import project as project_routes
+    stub_render(project_routes)
+
+    owner = make_user()
+    db.session.commit()
+    login(client, owner)
+
+    small_project = seed_project(owner, SMALL)
+    large_project = seed_project(owner, LARGE)
+    small_url = f'/project/{small_project.id}'
+    large_url = f'/project/{large_project.id}'
+    small = measure(client, small_url)
+    with query_budget(3):
+        large = measure(client, large_url)
+
+    assert len(small) == len(large), large.report()
+
+def test_collaboration_requests_budget(app, client, stub_render):
+    from app.routes import research as research_routes
+    stub_render(research_routes)
+
+    user = make_user()
+    db.session.commit()
+    login(client, user)
+
+    seed_collaboration_requests(user, SMALL)
+    small = measure(client, '/research/requests')
+    seed_collaboration_requests(user, LARGE - SMALL)
+    with query_budget(3):
+        large = measure(client, '/research/requests')
+
+    assert len(small) == len(large), large.report()
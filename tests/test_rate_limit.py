@@ -0,0 +1,116 @@
+"""
+Admission control: token buckets, concurrency caps, 429 responses and the
+per-backend cap in the LLM router.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import db as _db
+from app.models import Paper
+from app.services.llm_router import BackendsBusy
+from app.services.rate_limit import AdmissionController, MemoryStore, RateLimited
+from tests.factories import login, make_user
+from tests.test_llm_router import StubProvider, make_router
+
+def test_bucket_allows_burst_then_reports_wait():
+    store = MemoryStore()
+    assert [store.take('k', rate=1, burst=3) for _ in range(3)] == [0, 0, 0]
+    wait = store.take('k', rate=1, burst=3)
+    assert 0.9 < wait <= 1
+    assert store.take('other', rate=1, burst=3) == 0
+
+def test_bucket_refills():
+    store = MemoryStore()
+    store.take('k', rate=100, burst=1)
+    time.sleep(0.02)
+    assert store.take('k', rate=100, burst=1) == 0
+
+def test_rate_limit_per_user_and_cost():
+    controller = AdmissionController(MemoryStore(), user_rate=1, user_burst=5,
+                                     global_rate=0, user_concurrency=0, global_concurrency=0)
+    with controller.admit(1, cost=4):
+        pass
+    with pytest.raises(RateLimited) as error:
+        with controller.admit(1, cost=4):
+            pass
+    assert error.value.scope == 'user' and error.value.retry_after >= 60
+    with controller.admit(2, cost=4):
+        pass
+
+def test_global_rejection_does_not_charge_the_user():
+    controller = AdmissionController(MemoryStore(), user_rate=1, user_burst=5, global_rate=1,
+                                     global_burst=2, user_concurrency=0, global_concurrency=0)
+    with controller.admit(1, cost=2):
+        pass
+    for _ in range(3):
+        with pytest.raises(RateLimited) as error:
+            with controller.admit(2, cost=2):
+                pass
+        assert error.value.scope == 'global'
+    # user 2 was never admitted, so their own bucket is still full
+    assert controller.store.take('ratelimit:bucket:user:2', 1 / 60, 5, 5) == 0
+
+def test_burst_is_turned_away_fast_and_slots_are_released():
+    controller = AdmissionController(MemoryStore(), user_rate=0, global_rate=0,
+                                     user_concurrency=1, global_concurrency=2)
+    admitted, rejected, release = [], [], threading.Event()
+
+    def request(user_id):
+        try:
+            with controller.admit(user_id):
+                admitted.append(user_id)
+                release.wait(1)
+        except RateLimited as e:
+            rejected.append((e.scope, time.monotonic() - start))
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=request, args=(i % 5,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(admitted) == 2 and len(rejected) == 18
+    assert max(elapsed for _, elapsed in rejected) < 0.5
+    with controller.admit(0):
+        pass
+
+def test_improve_returns_429_with_retry_after(app, client):
+    user = make_user()
+    _db.session.flush()
+    paper = Paper(title='Paper', author_id=user.id)
+    _db.session.add(paper)
+    _db.session.commit()
+    login(client, user)
+    controller = app.extensions['admission'] = AdmissionController(
+        MemoryStore(), user_concurrency=1, busy_retry_after=7)
+
+    with controller.admit(user.id):
+        response = client.post(f'/paper/{paper.id}/improve', json={'section': 'abstract', 'text': 'x'})
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '7'
+    assert response.get_json()['retry_after'] == 7
+
+def test_router_caps_concurrency_per_backend():
+    provider = StubProvider('a', delay=0.2)
+    router = make_router(provider)
+    router.backends[0].max_concurrent = 1
+    router.queue_timeout = 0
+    router.inflight = None
+
+    async def burst():
+        return await asyncio.gather(router.agenerate('p1', 10), router.agenerate('p2', 10),
+                                    return_exceptions=True)
+
+    results = asyncio.run(burst())
+    assert results[0] == 'a:default-model'
+    assert isinstance(results[1], BackendsBusy)
+
+    router.queue_timeout = 1
+    assert asyncio.run(burst()) == ['a:default-model', 'a:default-model']
@@ -0,0 +1,102 @@
+"""
+Read watermarks: opening a conversation writes one row, unread counts are
+the messages past the watermark, and the watermark only moves forward.
+"""
+import re
+
+from sqlalchemy import event
+
+from app import db as _db, socketio
+from app.models import Message, ReadWatermark, UserCounter
+from app.services.counters import get_counters
+from app.services.read_state import mark_read, unread_total, watermarks_from_flags
+from tests.factories import login, make_user, seed_conversations
+from tests.querycount import count_queries
+
+def test_opening_a_chat_moves_one_watermark(app, client):
+    me = make_user()
+    _db.session.commit()
+    partner, other = seed_conversations(me, 2, messages_each=5)  # 3 unread from each
+    assert unread_total(me.id) == 6
+
+    login(client, me)
+    with count_queries() as queries:
+        client.get(f'/chat/user/{partner.id}')
+    written = sorted(re.match(r'\s*(?:INSERT INTO|UPDATE) (\w+)', q).group(1) for q in queries
+                     if re.match(r'\s*(INSERT|UPDATE)', q))
+    assert written == ['read_watermark', 'user_counter'], queries.report()  # no message rows
+    assert Message.query.filter_by(is_read=True).count() == 0  # no per-row updates
+    assert unread_total(me.id) == 3
+    assert client.get('/chat/').get_data(as_text=True).count('unread-badge">') == 1  # other's only
+
+    _db.session.add(Message(content='one more', sender_id=partner.id, recipient_id=me.id))
+    _db.session.commit()
+    assert unread_total(me.id) == 4
+
+def test_watermark_never_moves_back(app):
+    me, partner = make_user(), make_user()
+    _db.session.commit()
+    mark_read(_db.session, me.id, 'user', partner.id, 40)
+    mark_read(_db.session, me.id, 'user', partner.id, 25)
+    mark_read(_db.session, me.id, 'user', partner.id, 0)
+    _db.session.commit()
+    assert [w.last_read_message_id for w in ReadWatermark.query.filter_by(user_id=me.id)] == [40]
+
+def test_concurrent_mark_read_subtracts_each_message_once(app):
+    me, partner = make_user(), make_user()
+    _db.session.commit()
+    _db.session.add_all([Message(content=str(i), sender_id=partner.id, recipient_id=me.id) for i in range(6)])
+    _db.session.commit()
+    ids = [m.id for m in Message.query.order_by(Message.id)]
+    assert get_counters(me.id).unread_messages == 6
+
+    def other_request(conn, cursor, statement, *args):
+        # Another tab reads up to ids[1] between this call's read and its write
+        if statement.startswith('UPDATE read_watermark') and not raced:
+            raced.append(True)
+            cursor.connection.execute('UPDATE read_watermark SET last_read_message_id = ?', (ids[1],))
+            cursor.connection.execute('UPDATE user_counter SET unread_messages = unread_messages - 2')
+
+    _db.session.add(ReadWatermark(user_id=me.id, kind='user', conversation_id=partner.id))
+    _db.session.commit()
+    raced = []
+    event.listen(_db.engine, 'before_cursor_execute', other_request)
+    try:
+        mark_read(_db.session, me.id, 'user', partner.id, ids[3])
+    finally:
+        event.remove(_db.engine, 'before_cursor_execute', other_request)
+    _db.session.commit()
+    assert raced and unread_total(me.id) == 2
+    assert _db.session.get(UserCounter, me.id).unread_messages == 2
+
+def test_socket_mark_read_uses_the_newest_id_only(app, client):
+    me = make_user()
+    _db.session.commit()
+    [partner] = seed_conversations(me, 1, messages_each=5)
+    ids = [m.id for m in Message.query.order_by(Message.id)]
+    private = Message(content='not for me', sender_id=partner.id, recipient_id=make_user().id)
+    _db.session.add(private)
+    _db.session.commit()
+
+    login(client, me)
+    live = socketio.test_client(app, flask_test_client=client)
+    live.emit('mark_read', {'message_ids': [private.id]})
+    assert ReadWatermark.query.count() == 0
+
+    live.emit('mark_read', {'message_ids': ids[:3]})
+    assert _db.session.get(ReadWatermark, (me.id, 'user', partner.id)).last_read_message_id == ids[2]
+    assert unread_total(me.id) == 1
+
+def test_backfill_from_read_flags(app):
+    me, partner = make_user(), make_user()
+    _db.session.commit()
+    flags = [True, True, False, True, False]
+    _db.session.add_all([Message(content=str(i), sender_id=partner.id, recipient_id=me.id, is_read=read)
+                         for i, read in enumerate(flags)])
+    _db.session.commit()
+    first_unread = Message.query.filter_by(is_read=False).order_by(Message.id).first().id
+    watermarks_from_flags(_db.session.connection())
+    watermarks_from_flags(_db.session.connection())  # conversations that have one are skipped
+    _db.session.commit()
+    assert _db.session.get(ReadWatermark, (me.id, 'user', partner.id)).last_read_message_id == first_unread - 1
+    assert unread_total(me.id) == 3
@@ -0,0 +1,91 @@
+"""
+Response cache: LRU eviction, anonymous page caching, fragments keyed by
+object version, and conditional GETs answered with 304.
+"""
+import re
+import time
+
+from app import db as _db
+from app.metrics import metrics
+from app.models import Paper
+from app.routes import main
+from app.services.cache import MemoryCache
+from tests.factories import login, make_user
+
+def test_memory_cache_evicts_least_recently_used_and_expired():
+    cache = MemoryCache(max_entries=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # b is now the least recently used
+    cache.set('c', 3)
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+    cache.set('d', 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('d') is None and len(cache) == 1
+
+def test_anonymous_landing_page_is_rendered_once(app, client, monkeypatch):
+    renders = []
+    render = main.render_template
+    monkeypatch.setattr(main, 'render_template', lambda *a, **kw: renders.append(a) or render(*a, **kw))
+
+    first = client.get('/')
+    second = client.get('/')
+    assert first.status_code == second.status_code == 200 and len(renders) == 1
+    assert second.get_data() == first.get_data() and second.headers['ETag'] == first.headers['ETag']
+    assert client.get('/', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    user = make_user()
+    _db.session.commit()
+    login(client, user)
+    with client.application.app_context():
+        assert client.get('/').status_code == 302  # logged-in users still go to the dashboard
+
+def test_paper_view_revalidates_and_follows_edits(app, client):
+    author = make_user()
+    _db.session.commit()
+    paper = Paper(title='Cached paper', author_id=author.id, abstract='First abstract')
+    _db.session.add(paper)
+    _db.session.commit()
+    login(client, author)
+
+    first = client.get(f'/paper/{paper.id}')
+    assert first.status_code == 200 and 'First abstract' in first.get_data(as_text=True)
+    etag = first.headers['ETag']
+    assert client.get(f'/paper/{paper.id}', headers={'If-None-Match': etag}).status_code == 304
+
+    paper.abstract = 'Second abstract'
+    _db.session.commit()
+    with client.application.app_context():
+        second = client.get(f'/paper/{paper.id}', headers={'If-None-Match': etag})
+    assert second.status_code == 200 and second.headers['ETag'] != etag
+    assert 'Second abstract' in second.get_data(as_text=True)
+
+def test_researcher_cards_follow_profile_edits(app, client):
+    viewer, other = make_user(research_domains='Robotics'), make_user(research_domains='Robotics')
+    other.bio = 'Original bio'
+    _db.session.commit()
+    login(client, viewer)
+    assert 'Original bio' in client.get('/research/discover').get_data(as_text=True)
+
+    version = other.profile_version
+    other.bio = 'Edited bio'
+    _db.session.commit()
+    assert other.profile_version != version
+    with client.application.app_context():
+        html = client.get('/research/discover').get_data(as_text=True)
+    assert 'Edited bio' in html and 'Original bio' not in html
+
+def test_researcher_card_scores_follow_the_viewer(app, client):
+    other = make_user(research_domains='Robotics, Marine Biology', bio='Shared card')
+    robotics, marine = make_user(research_domains='Robotics'), make_user(research_domains='Marine Biology')
+    _db.session.commit()
+    metrics.reset()
+    pages = []
+    for viewer in (robotics, marine):
+        login(client, viewer)
+        with client.application.app_context():
+            pages.append(client.get('/research/discover').get_data(as_text=True))
+    assert all('Shared card' in html for html in pages)
+    tags = [re.findall(r'text-indigo-700 text-xs rounded-full">\s*(.+?)\s*<', html) for html in pages]
+    assert tags == [['Robotics'], ['Marine Biology']]
+    assert metrics.get('response_cache_total', kind='fragment', result='hit') >= 1  # one card, both viewers
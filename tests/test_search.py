@@ -0,0 +1,77 @@
+"""
+Full-text search: documents follow saves, results respect project
+membership, snippets are highlighted and escaped, pages are bounded.
+"""
+import time
+
+from app import db as _db
+from app.models import Paper, Project, SearchDocument, project_members
+from app.services.search import reindex, search
+from tests.factories import login, make_user
+
+def _paper(author, title, **sections):
+    paper = Paper(title=title, author_id=author.id, **sections)
+    _db.session.add(paper)
+    _db.session.commit()
+    return paper
+
+def test_documents_follow_paper_saves(app):
+    author = make_user()
+    _db.session.commit()
+    paper = _paper(author, 'Graph methods', abstract='We study graph neural networks.')
+    assert [r['id'] for r in search(author, 'neural')[0]] == [paper.id]
+
+    paper.methodology = 'A transformer <encoder> with attention.'
+    _db.session.commit()
+    [result] = search(author, 'transf')[0]  # last term matches as a prefix
+    assert '<mark>transformer</mark>' in result['snippet'] and '&lt;encoder&gt;' in result['snippet']
+    assert search(author, 'neural')[0]  # earlier sections are still indexed
+
+    _db.session.delete(paper)
+    _db.session.commit()
+    assert search(author, 'transformer') == ([], False)
+    assert SearchDocument.query.count() == 0
+
+def test_results_are_limited_to_own_and_member_projects(app):
+    owner, member, outsider = make_user(), make_user(), make_user()
+    _db.session.commit()
+    project = Project(title='Coral reef survey', owner_id=owner.id, abstract='Bleaching of reefs')
+    _db.session.add(project)
+    _db.session.flush()
+    _db.session.execute(project_members.insert(), [{'user_id': member.id, 'project_id': project.id}])
+    _db.session.commit()
+    paper = _paper(owner, 'Reef bleaching', project_id=project.id, results='Coral cover fell.')
+    _paper(outsider, 'Private reef notes')
+
+    found = {(r['kind'], r['id']) for r in search(member, 'reef')[0]}
+    assert found == {('project', project.id), ('paper', paper.id)}
+    assert [r['id'] for r in search(member, 'reef', project_id=project.id, kind='paper')[0]] == [paper.id]
+    assert {r['title'] for r in search(outsider, 'reef')[0]} == {'Private reef notes'}
+
+def test_pagination_and_search_page(app, client):
+    author = make_user()
+    _db.session.commit()
+    _db.session.add_all([Paper(title=f'Draft {i}', author_id=author.id, abstract='federated learning')
+                         for i in range(300)])
+    _db.session.commit()
+
+    started = time.perf_counter()
+    first, has_next = search(author, 'federated learning', per_page=20)
+    assert time.perf_counter() - started < 0.1
+    assert len(first) == 20 and has_next
+    last, has_next = search(author, 'federated learning', page=15, per_page=20)
+    assert len(last) == 20 and not has_next
+
+    login(client, author)
+    html = client.get('/paper/search?q=federated&page=2').get_data(as_text=True)
+    assert '<mark>federated</mark>' in html and 'page=3' in html
+
+def test_reindex_covers_bulk_loaded_rows(app):
+    author = make_user()
+    _db.session.commit()
+    _db.session.execute(Paper.__table__.insert(), [{'title': 'Bulk loaded', 'author_id': author.id,
+                                                     'conclusion': 'Quantum annealing'}])
+    _db.session.commit()
+    assert search(author, 'quantum')[0] == []
+    assert reindex(_db.session) == 1
+    assert [r['title'] for r in search(author, 'quantum')[0]] == ['Bulk loaded']
@@ -0,0 +1,66 @@
+"""
+Precomputed suggestions: batch job, incremental refresh after profile
+edits, and the single-query read used by the dashboard.
+"""
+from app import db as _db
+from app.models import UserSuggestion
+from app.routes.dashboard import get_suggested_researchers
+from app.services.matching import ProfileIndex, get_profile_index
+from app.services.suggestions import affected_users, refresh_all
+from tests.factories import make_user
+from tests.querycount import count_queries
+
+def _stored(user_id):
+    return [row.suggested_id for row in
+            UserSuggestion.query.filter_by(user_id=user_id).order_by(UserSuggestion.rank)]
+
+def test_top_k_many_matches_single_queries():
+    index = ProfileIndex.build([(1, 'Machine Learning', '', ''), (2, 'Deep Learning', '', ''),
+                                (3, 'Marine Biology', '', ''), (4, 'Machine Learning, Robotics', '', '')])
+    best = index.top_k_many([1, 3, 99], 2)
+    assert set(best) == {1, 3}
+    single = index.top_k(index.matrix[index.rows[1]], 2, exclude=(1,))
+    assert [user_id for user_id, _ in best[1]] == [user_id for user_id, _ in single]
+    assert all(user_id != 3 for user_id, _ in best[3])
+
+def test_batch_job_stores_top_k_and_dashboard_reads_it(app):
+    app.config['SUGGESTIONS_PRECOMPUTED'] = False  # no incremental refresh while seeding
+    me = make_user(research_domains='Machine Learning')
+    close = make_user(research_domains='Machine Learning, Robotics')
+    far = make_user(research_domains='Machine Learning, Marine Biology, Oceanography')
+    make_user(research_domains='Medieval History')
+    _db.session.commit()
+    app.config['SUGGESTIONS_PRECOMPUTED'] = True
+
+    users, rows = refresh_all(get_profile_index(), k=2)
+    assert users == 4 and _stored(me.id) == [close.id, far.id]
+
+    _db.session.expire_all()
+    me = _db.session.get(type(me), me.id)
+    with count_queries() as queries:
+        suggested = get_suggested_researchers(me, limit=5)
+    assert len(queries) == 1, queries.report()
+    assert [s['user'].id for s in suggested] == [close.id, far.id]
+    assert suggested[0]['common_tags'] == ['Machine Learning']
+
+def test_profile_edit_refreshes_only_affected_users(app):
+    app.config.update(SUGGESTIONS_K=1)
+    ml = make_user(research_domains='Machine Learning')
+    vision = make_user(research_domains='Computer Vision')
+    history = make_user(research_domains='Medieval History')
+    _db.session.commit()
+    refresh_all(get_profile_index(), k=1)
+    assert _stored(ml.id) == _stored(vision.id) == []
+
+    index = get_profile_index()
+    newcomer = make_user(research_domains='Computer Vision, Machine Learning')
+    _db.session.flush()
+    index.upsert(newcomer.id, newcomer.research_domains, '', '')
+    assert affected_users(_db.session, index, [newcomer.id], k=1) == {newcomer.id, ml.id, vision.id}
+    _db.session.commit()  # runs the refresh
+    assert _stored(ml.id) == [newcomer.id] and _stored(vision.id) == [newcomer.id]
+    assert _stored(history.id) == []
+
+    newcomer.is_active = False
+    _db.session.commit()
+    assert newcomer.id not in _stored(ml.id) + _stored(vision.id)